@@ -0,0 +1,325 @@
+#!/usr/bin/env python
+"""
+Headless JSON API serving the dashboard's numbers to other tools.
+
+Built on the same loading and aggregation code as app.py: the typed
+snapshot (data/snapshot.py), the aggregate cube (data/aggregates.py), the
+per-year gap frames and export tables (data/views.py) and the closed-form fits
+(data/regression.py), held once per process and rebuilt when the source
+files change.
+
+Endpoints (GET, JSON unless noted):
+
+  /api/health     data version, school years, response cache counters
+  /api/borough    borough totals                ?year=2020-21 (default: latest) or ?year=all
+  /api/shelter    housing type by borough       ?year=...
+  /api/top20      top 20 schools by % temp housing  ?year=...
+  /api/summary    citywide metrics              ?year=...
+  /api/gap        % temp housing vs % chronically absent fits: overall (with
+                  its confidence band) and per group. ?year= repeats or is
+                  "all"; ?group=borough (default) or school_year
+  /api/export     a data/export.py file: ?dataset=gap|scatter|borough|shelter|top20
+                  &year=...|all&format=csv|parquet
+
+Responses are cached per (data version, path, query) in a bounded LRU,
+gzipped once when the client accepts it, and carry an ETag derived from the
+same key, so If-None-Match is answered 304 without touching the cache (once
+the query has been validated: a malformed one is always a 400). Any other
+error is logged to stderr and answered with a JSON 500.
+Requests are served by a thread per connection (HTTP/1.1 keep-alive).
+benchmarks/bench_api.py load-tests it.
+
+Usage: python api.py [--host 127.0.0.1] [--port 8502]
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import math
+import os
+import shutil
+import sys
+import threading
+import time
+import traceback
+from collections import namedtuple
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from data.aggregates import build_cube
+from data.export import DATASETS, FORMATS, ExportCache, file_name, year_tables
+from data.gap import ABSENT_PCT, HOUSING_PCT, gap_join
+from data.partitions import LRUCache
+from data.regression import fit_groups
+from data.snapshot import load_frames, source_version
+from data.views import GapViews, export_lookup, make_gap_cache
+
+# How often the source files are stat'ed for a new data version
+RECHECK_SECONDS = 1.0
+# Bodies smaller than this are sent uncompressed
+GZIP_MIN_BYTES = 1024
+GROUPS = ("borough", "school_year")
+CUBE_VIEWS = ("borough", "shelter", "top20", "summary")
+
+Response = namedtuple("Response", "body gzipped")
+
+
+class BadRequest(ValueError):
+    """A query the API can't answer; sent back as 400 with the message."""
+
+
+def jsonable(value):
+    """value with frames (as records), arrays and numpy scalars turned into JSON types (NaN -> null)."""
+    if isinstance(value, pd.DataFrame):
+        columns = [[jsonable(item) for item in value[name].to_numpy()] for name in value.columns]
+        return [dict(zip(map(str, value.columns), row)) for row in zip(*columns)]
+    if isinstance(value, dict):
+        return {str(key): jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [jsonable(item) for item in value]
+    if isinstance(value, np.float32):
+        # Shortest float32 repr (49.3, not 49.29999923706055)
+        value = float(str(value))
+    elif isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+class Loaded:
+    """
+    Everything loaded for one data version: frames, aggregate cube and the
+    per-year gap views (joined on first use). Read-only once built, so handler
+    threads can keep using it while a newer version loads.
+    """
+
+    def __init__(self, data_version, join, gap_cache):
+        self.data_version = data_version
+        self.attendance, self.housing = load_frames()
+        self.cube = build_cube(self.housing)
+        self.years = sorted(self.cube["years"])
+        # The same per-year gap frames and scatter stacks app.py shows (data/views.py)
+        self.gap = GapViews(data_version, self.housing, self.attendance, join, gap_cache)
+
+    def pick_years(self, params, many=True):
+        """School years named by ?year= (default: the latest; "all": every year)."""
+        values = params.get("year") or [self.years[-1]]
+        if "all" in values:
+            return list(self.years)
+        unknown = [value for value in values if value not in self.cube["years"]]
+        if unknown:
+            raise BadRequest(f"Unknown school year {unknown[0]!r}; expected one of {self.years} or 'all'")
+        if not many and len(values) > 1:
+            raise BadRequest("Pass one year, or year=all")
+        return sorted(set(values))
+
+
+class Store:
+    """
+    The process's Loaded data. current() stats the source files at most
+    every RECHECK_SECONDS and loads a new version when they changed; the
+    (dbn, year) join is kept across versions so only changed years re-join.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._checked = 0.0
+        self._join = gap_join()
+        self.gap_frames = make_gap_cache()
+        self.loaded = None
+        self.current()
+
+    def current(self):
+        if time.monotonic() - self._checked < RECHECK_SECONDS:
+            return self.loaded
+        with self._lock:
+            version = source_version()
+            if self.loaded is None or version != self.loaded.data_version:
+                self.loaded = Loaded(version, self._join, self.gap_frames)
+            self._checked = time.monotonic()
+        return self.loaded
+
+
+# Each route is (parse, answer): parse(data, params) validates the query
+# (raising BadRequest) before any cache or ETag lookup, and
+# answer(data, query) builds the payload from what it returned.
+
+def cube_query(data, params):
+    years = data.pick_years(params)
+    return years, len(years) == 1 and params.get("year") != ["all"]
+
+
+def cube_view(data, query, view):
+    years, single = query
+    by_year = {year: data.cube["years"][year][view] for year in years}
+    if view == "top20":
+        by_year = {year: frame.rename_axis("Rank").reset_index() for year, frame in by_year.items()}
+    if single:
+        return {"year": years[0], view: by_year[years[0]]}
+    return {"years": years, view: by_year}
+
+
+def gap_query(data, params):
+    years = data.pick_years(params)
+    group = (params.get("group") or ["borough"])[-1]
+    if group not in GROUPS:
+        raise BadRequest(f"Unknown group {group!r}; expected one of {list(GROUPS)}")
+    return years, group
+
+
+def gap_fits(data, query):
+    years, group = query
+    fits = fit_groups(data.gap.scatter(years), HOUSING_PCT, ABSENT_PCT, group)
+    return {"years": years, "group": group, "x": HOUSING_PCT, "y": ABSENT_PCT, **fits}
+
+
+ROUTES = {f"/api/{view}": (cube_query, partial(cube_view, view=view)) for view in CUBE_VIEWS}
+ROUTES["/api/gap"] = (gap_query, gap_fits)
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.started = False
+        try:
+            self.route()
+        except (BrokenPipeError, ConnectionResetError):
+            # The client went away mid-response
+            self.close_connection = True
+        except Exception:
+            self.log_error("GET %s failed", self.path)
+            traceback.print_exc()
+            self.close_connection = True
+            if not self.started:
+                self.send_json(500, {"error": True, "message": "Internal server error"})
+
+    def send_response(self, code, message=None):
+        self.started = True
+        super().send_response(code, message)
+
+    def route(self):
+        url = urlsplit(self.path)
+        params = parse_qs(url.query)
+        data, cache = self.server.store.current(), self.server.responses
+        version = data.data_version
+
+        if url.path == "/api/health":
+            return self.send_json(200, {
+                "data_version": version, "years": data.years,
+                "responses": cache.stats(), "exports": self.server.exports.stats(),
+            })
+        if url.path == "/api/export":
+            return self.send_export(data, params)
+        route = ROUTES.get(url.path)
+        if route is None:
+            endpoints = sorted([*ROUTES, "/api/health", "/api/export"])
+            return self.send_json(404, {"error": True, "message": f"No endpoint {url.path}", "endpoints": endpoints})
+
+        parse, answer = route
+        try:
+            query = parse(data, params)
+        except BadRequest as e:
+            return self.send_json(400, {"error": True, "message": str(e)})
+
+        key = (version, url.path, tuple(sorted((name, tuple(values)) for name, values in params.items())))
+        etag = '"' + hashlib.blake2b(repr(key).encode(), digest_size=12).hexdigest() + '"'
+        if etag in self.headers.get("If-None-Match", ""):
+            return self.send_body(304, b"", {"ETag": etag})
+        response = cache.get_or_compute(key, lambda: self.render(answer, data, query))
+
+        headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding",
+                   "Content-Type": "application/json; charset=utf-8"}
+        if response.gzipped is not None and "gzip" in self.headers.get("Accept-Encoding", ""):
+            headers["Content-Encoding"] = "gzip"
+            return self.send_body(200, response.gzipped, headers)
+        self.send_body(200, response.body, headers)
+
+    @staticmethod
+    def render(answer, data, query):
+        body = json.dumps(jsonable(answer(data, query))).encode("utf-8")
+        # Compressed once here, so cache hits only pick a representation
+        gzipped = gzip.compress(body, compresslevel=6) if len(body) >= GZIP_MIN_BYTES else None
+        return Response(body, gzipped)
+
+    def send_export(self, data, params):
+        dataset = (params.get("dataset") or [""])[-1]
+        fmt = (params.get("format") or ["csv"])[-1]
+        if dataset not in DATASETS or fmt not in FORMATS:
+            return self.send_json(400, {"error": True, "message": "Pass dataset= one of "
+                                        f"{sorted(DATASETS)} and format= one of {sorted(FORMATS)}"})
+        try:
+            years = data.pick_years(params, many=False)
+        except BadRequest as e:
+            return self.send_json(400, {"error": True, "message": str(e)})
+        scope = "all-years" if params.get("year") == ["all"] else years[0]
+        with self.server.exports.open(
+            (dataset, scope, fmt, data.data_version),
+            lambda: year_tables(dataset, years, export_lookup(data.cube, data.gap, dataset)),
+        ) as f:
+            self.send_response(200)
+            self.send_header("Content-Type", FORMATS[fmt])
+            self.send_header("Content-Length", str(os.fstat(f.fileno()).st_size))
+            self.send_header("Content-Disposition", f'attachment; filename="{file_name(dataset, scope, fmt)}"')
+            self.end_headers()
+            shutil.copyfileobj(f, self.wfile)
+
+    def send_json(self, status, payload):
+        self.send_body(status, json.dumps(jsonable(payload)).encode("utf-8"),
+                       {"Content-Type": "application/json; charset=utf-8"})
+
+    def send_body(self, status, body, headers):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_request(self, code="-", size="-"):
+        # No access log; errors still go to stderr through log_error()
+        pass
+
+
+class Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # socketserver's default backlog of 5 drops bursts of new connections
+    request_queue_size = 256
+
+
+def make_server(host="127.0.0.1", port=8502, max_bytes=64 * 1024 * 1024):
+    """A threaded HTTP server over the current data (port 0 picks a free port)."""
+    server = Server((host, port), Handler)
+    server.store = Store()
+    server.responses = LRUCache(
+        max_entries=4096, max_bytes=max_bytes,
+        sizeof=lambda response: len(response.body) + len(response.gzipped or b""),
+    )
+    server.exports = ExportCache()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502, help="0 picks a free port")
+    parser.add_argument("--cache-mb", type=int, default=64, help="response cache size")
+    args = parser.parse_args(argv)
+
+    server = make_server(args.host, args.port, args.cache_mb * 1024 * 1024)
+    # First line of output is machine-readable so callers can find the port
+    print(f"Serving data version {server.store.loaded.data_version} on http://{args.host}:{server.server_port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,63 +1,124 @@
+import os
+import threading
+
+import profiling
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import numpy as np
+
+# Only streamlit and profiling load up front. data.snapshot (and pandas, pyarrow and
+# numpy behind it) loads inside load_data() once the page header is on screen, and
+# each tab imports its own data/ modules and chart builders when it first renders.
 
 st.set_page_config(layout="wide", page_title="The Absenteeism Gap")
 
-@st.cache_data
-def load_data():
-    try:
-        attendance = pd.read_csv("data/attendance_all_years.csv")
-    except FileNotFoundError:
-        attendance = pd.read_csv("data/attendance.csv")
-    housing_all_years = pd.read_csv("data/housing_all_years.csv")
-
-    for col in [
-        "students_in_temporary_housing",
-        "students_in_temporary_housing_1",
-        "students_residing_in_shelter",
-        "residing_in_dhs_shelter",
-        "residing_in_non_dhs_shelter",
-        "doubled_up",
-    ]:
-        if col in housing_all_years.columns:
-            housing_all_years[col] = (
-                housing_all_years[col]
-                .astype(str)
-                .str.replace("%", "", regex=False)
-                .replace("s", np.nan)
-                .replace("", np.nan)
-            )
-            housing_all_years[col] = pd.to_numeric(housing_all_years[col], errors="coerce")
-
-    borough_map = {
-        "M": "Manhattan",
-        "X": "Bronx",
-        "K": "Brooklyn",
-        "Q": "Queens",
-        "R": "Staten Island",
-    }
-    housing_all_years["borough"] = (
-        housing_all_years["dbn"].astype(str).str[2].map(borough_map).fillna("Citywide")
-    )
-    attendance["chronically_absent_1"] = pd.to_numeric(
-        attendance["chronically_absent_1"], errors="coerce"
-    )
-    attendance["total_enrollment"] = pd.to_numeric(
-        attendance["contributing_10_total_days"], errors="coerce"
-    )
+# Per-rerun stage timings, cache hits/misses and figure sizes (profiling.py);
+# payload sizes cost an extra serialization, so only with ?debug=1 or a trace file
+debug = bool(st.query_params.get("debug"))
+profiling.start_run(st.session_state, verbose=debug)
+
+@profiling.track_cache(st.cache_resource)
+def load_data(data_version):
+    # Cleaned frames come from the typed snapshot (data/snapshot.py) when it is
+    # fresh; otherwise the raw CSVs are parsed and the snapshot is rebuilt.
+    # Compact dtypes (data/compact.py), held once per process and shared
+    # read-only by all sessions instead of a pickled copy per caller.
+    attendance, housing_all_years = profiling.lazy_import("data.snapshot").load_frames()
     return attendance, housing_all_years
 
-attendance_df, housing_all_years = load_data()
+@profiling.track_cache(st.cache_resource)
+def load_cube(data_version):
+    # Per-(year, borough) aggregates for every tab, rebuilt only when the data changes;
+    # shared read-only like the frames
+    from data.aggregates import build_cube
+    _, housing_all_years = load_data(data_version)
+    return build_cube(housing_all_years)
+
+@profiling.track_cache(st.cache_resource)
+def load_partitions(data_version):
+    # Frames split by school year once per process and shared read-only by all sessions
+    from data.partitions import YearPartitions
+    attendance, housing_all_years = load_data(data_version)
+    return YearPartitions(housing_all_years, "school_year"), YearPartitions(attendance, "year")
+
+@profiling.track_cache(st.cache_resource)
+def load_panel(data_version):
+    # Dense school x year arrays and trend lines for the Trends tab, shared by all sessions
+    from data.panel import build_panel
+    attendance, housing_all_years = load_data(data_version)
+    return build_panel(housing_all_years, attendance)
+
+@profiling.track_cache(st.cache_resource)
+def load_rollup(data_version):
+    # Citywide -> borough -> district -> school sums and weighted rates, every year;
+    # drilling down is a slice of it, shared read-only by all sessions
+    from data.rollup import build_rollup
+    _, housing_all_years = load_data(data_version)
+    return build_rollup(load_panel(data_version), housing_all_years)
 
-available_years = sorted(housing_all_years["school_year"].dropna().unique())
+@profiling.track_cache(st.cache_resource)
+def load_search(data_version):
+    # DBN prefix + name trigram index over every school in the panel, shared by all sessions
+    from data.search import build_search_index
+    return build_search_index(load_panel(data_version))
 
+@profiling.track_cache(st.cache_resource)
+def year_join():
+    # One housing x attendance (dbn, year) join per process (data/join.py); a new
+    # data version re-joins only the years whose rows changed
+    from data.gap import gap_join
+    return gap_join()
+
+@profiling.track_cache(st.cache_resource)
+def gap_cache():
+    # Bounded LRU of per-year (gap_df, scatter_df) joins shared across sessions
+    from data.views import make_gap_cache
+    return make_gap_cache()
+
+@profiling.track_cache(st.cache_resource)
+def load_gap_views(data_version):
+    # Every year joined in one pass on first use, split per year through the gap LRU;
+    # the same data/views.py code api.py serves, shared read-only by all sessions
+    from data.views import GapViews
+    attendance, housing_all_years = load_data(data_version)
+    return GapViews(data_version, housing_all_years, attendance, year_join(), gap_cache())
+
+@profiling.track_cache(st.cache_resource)
+def figure_cache():
+    # Built per-year tab figures keyed by (kind, year, data version), shared across
+    # sessions and capped by serialized size. Cached figures are never mutated.
+    from charts import figure_nbytes
+    from data.partitions import LRUCache
+    return LRUCache(max_entries=64, max_bytes=64 * 1024 * 1024, sizeof=figure_nbytes)
+
+@profiling.track_cache(st.cache_resource)
+def export_cache():
+    # Finished CSV / Parquet downloads on disk, shared across sessions, keyed by data version
+    from data.export import ExportCache
+    return ExportCache(max_bytes=256 * 1024 * 1024)
+
+def lazy_tabs(labels):
+    # Only the selected tab's body runs on a rerun; the choice lives in ?tab=<label>.
+    # Streamlit versions without lazy tabs render every tab as before.
+    try:
+        return st.tabs(labels, key="tab", on_change="rerun", bind="query-params")
+    except TypeError:
+        return st.tabs(labels)
+
+def tab_open(tab):
+    return getattr(tab, "open", None) is not False
+
+# The header goes out before the data (and pandas) load on a cold start
 header_col, year_col = st.columns([5, 1])
 with header_col:
     st.title("The Absenteeism Gap")
     st.subheader("How Homelessness Steals School Days in NYC")
 
+with profiling.stage("load_data"):
+    data_version = profiling.lazy_import("data.snapshot").source_version()
+    housing_parts, attendance_parts = load_partitions(data_version)
+    cube = load_cube(data_version)
+
+available_years = housing_parts.years()
+
 with year_col:
     st.markdown("**School year**")
     selected_year = st.selectbox(
@@ -67,24 +128,122 @@ with year_col:
         label_visibility="collapsed",
     )
 
-housing_year_df = housing_all_years[housing_all_years["school_year"] == selected_year].copy()
+with profiling.stage("year_filter"):
+    year_views = cube["years"][selected_year]
+    attendance_year_df = attendance_parts.get(selected_year)
 
-attendance_year_df = attendance_df[attendance_df["year"] == selected_year].copy()
+def gap_frames(data_version, school_year):
+    with profiling.stage("gap_merge"):
+        return load_gap_views(data_version).year(school_year)
 
-gap_df = housing_year_df.merge(
-    attendance_year_df[["dbn", "school_name", "chronically_absent_1", "total_enrollment"]],
-    on="dbn",
-    how="inner",
-    suffixes=("_housing", "_attendance"),
-)
+def scatter_rows(data_version, years):
+    # Full-resolution scatter rows for one or more years; multi-year stacks share the gap LRU
+    with profiling.stage("gap_merge"):
+        return load_gap_views(data_version).scatter(years)
 
-gap_df = gap_df.rename(
-    columns={
-        "students_in_temporary_housing_1": "pct_students_temp_housing",
-        "chronically_absent_1": "pct_chronically_absent",
-        "school_name_housing": "school_name_housing",
+def export_menu(datasets, key):
+    # Downloads are written on click, streamed chunk by chunk to the shared export cache
+    from data.export import DATASETS, FORMATS, file_name, year_tables
+    from data.views import export_lookup
+    with st.popover("⬇️ Download data"):
+        dataset = st.selectbox(
+            "Table", datasets, format_func=lambda name: DATASETS[name][0], key=f"{key}_dataset",
+        )
+        all_years = st.radio(
+            "Years", [False, True], horizontal=True, key=f"{key}_scope",
+            format_func=lambda everything: "All years" if everything else selected_year,
+        )
+        years, scope = (available_years, "all-years") if all_years else ([selected_year], selected_year)
+        # Resolved in the script thread: download callables run on a separate thread
+        lookup = export_lookup(load_cube(data_version), load_gap_views(data_version), dataset)
+        cache = export_cache()
+        for col, (fmt, label) in zip(st.columns(2), (("csv", "CSV"), ("parquet", "Parquet"))):
+            col.download_button(
+                label, file_name=file_name(dataset, scope, fmt), mime=FORMATS[fmt], key=f"{key}_{fmt}",
+                data=lambda fmt=fmt: cache.open(
+                    (dataset, scope, fmt, data_version), lambda: year_tables(dataset, years, lookup),
+                ),
+                on_click="ignore", width="stretch",
+            )
+
+@profiling.track_cache(st.cache_resource)
+def load_peers(data_version, years):
+    # k-d tree over the scatter rows of one or more years, shared by all sessions
+    from data.peers import build_peer_index
+    return build_peer_index(scatter_rows(data_version, years))
+
+@profiling.track_cache(st.cache_data)
+def load_fits(data_version, years, group="borough"):
+    # Closed-form OLS (overall + per group) for the Gap scatter, once per year selection
+    from data.gap import ABSENT_PCT, HOUSING_PCT
+    from data.regression import fit_groups
+    return fit_groups(scatter_rows(data_version, years), HOUSING_PCT, ABSENT_PCT, group)
+
+@profiling.track_cache(st.cache_data)
+def load_scatter_sample(data_version, years):
+    # At most ~MAX_POINTS density-preserving points, so the payload stays flat as rows grow
+    from data.gap import ABSENT_PCT, HOUSING_PCT
+    from data.sampling import MAX_POINTS, density_sample
+    return density_sample(scatter_rows(data_version, years), HOUSING_PCT, ABSENT_PCT, MAX_POINTS)
+
+def year_figure(kind, year, build):
+    # One of the per-year tab figures, built at most once per data version
+    with profiling.stage(f"figure: {kind}"):
+        return figure_cache().get_or_compute((kind, year, data_version), build)
+
+@profiling.track_cache(st.cache_resource)
+def warm_figures(data_version):
+    # Opt-in (ABSGAP_WARM_FIGURES=1): build every year's tab figures on a background
+    # thread once per data version, so first visits to a year are cache hits too
+    from charts import borough_bar, gap_scatter, shelter_bar
+    from data.gap import ABSENT_PCT, HOUSING_PCT
+    from data.regression import fit_groups
+    views, gap, cache = load_cube(data_version)["years"], load_gap_views(data_version), figure_cache()
+
+    def scatter(year):
+        scatter_df = gap.year(year)[1]
+        return gap_scatter(scatter_df, fit_groups(scatter_df, HOUSING_PCT, ABSENT_PCT, "borough"), year)
+
+    builders = {
+        "borough_bar": lambda year: borough_bar(views[year]["borough"], year),
+        "shelter_bar": lambda year: shelter_bar(views[year]["shelter"], year),
+        "gap_scatter": scatter,
     }
-)
+
+    def run():
+        for year in reversed(sorted(views)):
+            for kind, build in builders.items():
+                cache.get_or_compute((kind, year, data_version), lambda: build(year))
+
+    thread = threading.Thread(target=run, name="figure-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+def show_chart(name, fig, **options):
+    # Figure serialization happens inside st.plotly_chart, so it is timed per chart
+    profiling.record_payload(name, fig)
+    with profiling.stage(f"chart: {name}"):
+        return st.plotly_chart(fig, width="stretch", **options)
+
+def starred(fig, rows, dbn, span):
+    # The searched-for school drawn over a Gap scatter, or a note when it has no point there
+    rows = rows[rows["dbn"] == dbn]
+    if rows.empty:
+        st.caption(f"{dbn} has no matched housing + attendance row for {span}.")
+        return fig
+    from charts import highlight_school
+    with profiling.stage("figure: highlight_school"):
+        return highlight_school(fig, rows, f"{dbn} · {rows['school_name_housing'].iloc[0]}")
+
+def fit_metrics(overall):
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Trend slope", f"{overall['slope']:+.2f} pts",
+                help="Change in % chronically absent per 1-point rise in % temporary housing")
+    col2.metric("R²", f"{overall['r2']:.3f}")
+    col3.metric("Schools in fit", f"{overall['n']:,}")
+
+if os.environ.get("ABSGAP_WARM_FIGURES") == "1":
+    warm_figures(data_version)
 
 if attendance_year_df.empty:
     st.warning(
@@ -99,116 +258,417 @@ This dashboard explores multi-year housing patterns and how housing instability
 **Chronically absent** means missing ≥10% of enrolled school days.
 """)
 
-tab1, tab2, tab3 = st.tabs(["📊 The Scale", "🔍 The Gap", "👥 The Invisible Majority"])
+tab_labels = ["📊 The Scale", "🔍 The Gap", "👥 The Invisible Majority", "📈 Trends", "🧭 Peers"]
 
-with tab1:
-    st.header("The Scale of Student Homelessness")
-    st.markdown("""
-    NYC's student homelessness crisis is not evenly distributed. The Bronx bears
-    a disproportionate share, while Staten Island has the fewest affected students.
-    """)
-    
-    borough_data = housing_year_df.groupby('borough').agg(
-        total_temp_housing=('students_in_temporary_housing', 'sum'),
-        total_schools=('dbn', 'count'),
-        avg_pct=('students_in_temporary_housing_1', 'mean')
-    ).reset_index().sort_values('total_temp_housing', ascending=False)
-    
-    fig = px.bar(
-        borough_data,
-        x='borough', y='total_temp_housing',
-        color='borough',
-        title=f'Students in Temporary Housing by Borough ({selected_year})',
-        labels={'total_temp_housing': 'Total Students', 'borough': 'Borough'}
-    )
-    st.plotly_chart(fig, use_container_width=True)
-    
-    # Summary metrics
-    col1, col2, col3 = st.columns(3)
-    col1.metric("Total Schools", f"{len(housing_year_df):,}")
-    col2.metric("Total Students in Temp Housing", f"{int(housing_year_df['students_in_temporary_housing'].sum()):,}")
-    col3.metric("Citywide Average", f"{housing_year_df['students_in_temporary_housing_1'].mean():.1f}%")
+def open_in_trends(data_version, dbn):
+    # Button callback: runs before the widgets below exist, so it can point them at the school
+    from data.cleaning import CITYWIDE
+    borough = load_panel(data_version).school(dbn)["borough"]
+    st.session_state["trend_area"] = borough or CITYWIDE
+    st.session_state["trend_school"] = dbn
+    st.session_state["tab"] = tab_labels[3]
 
-with tab2:
-    st.header("The Absenteeism Gap")
-    st.markdown("""
-    Each dot represents one NYC school. Schools with more students in temporary
-    housing tend to have higher rates of chronic absenteeism. The trendline
-    quantifies this relationship.
-    """)
-    
-    scatter_df = gap_df[gap_df['total_enrollment'] >= 20].copy()
-
-    if scatter_df.empty:
-        st.info(f"No matched housing + attendance rows for {selected_year}.")
+search_col, match_col = st.columns([2, 3])
+query = search_col.text_input(
+    "Find a school", key="school_search", placeholder='Name or DBN, e.g. "Robert Fulton" or "07X"',
+)
+highlight = None
+if query.strip():
+    with profiling.stage("school_search"):
+        matches = load_search(data_version).search(query, limit=10)
+    if not matches:
+        match_col.caption(f'No school matches "{query}".')
     else:
-        fig = px.scatter(
-            scatter_df,
-            x='pct_students_temp_housing',
-            y='pct_chronically_absent',
-            color='borough',
-            size='total_enrollment',
-            hover_data=['school_name_housing', 'dbn'],
-            trendline='ols',
-            title=f'Housing Instability vs Chronic Absenteeism ({selected_year})',
-            labels={
-                'pct_students_temp_housing': '% Students in Temporary Housing',
-                'pct_chronically_absent': '% Chronically Absent'
-            },
-            opacity=0.6
+        labels = {match.dbn: f"{match.dbn} · {match.name}" for match in matches}
+        highlight = match_col.selectbox("Matches", list(labels), format_func=labels.get, key="school_match")
+        match_col.button(
+            "Show its history in Trends", on_click=open_in_trends, args=(data_version, highlight),
         )
-        st.plotly_chart(fig, use_container_width=True)
+        match_col.caption("The school is also starred in the Gap scatter.")
+
+tab1, tab2, tab3, tab4, tab5 = lazy_tabs(tab_labels)
+
+with tab1:
+    if tab_open(tab1):
+        with profiling.first_render("The Scale"):
+            from charts import borough_bar, district_bar
+            from data.cleaning import CITYWIDE
+            from data.rollup import LABELS, district_label
+            st.header("The Scale of Student Homelessness")
+            st.markdown("""
+            NYC's student homelessness crisis is not evenly distributed. The Bronx bears
+            a disproportionate share, while Staten Island has the fewest affected students.
+            """)
+
+            fig = year_figure("borough_bar", selected_year, lambda: borough_bar(year_views["borough"], selected_year))
+            show_chart("borough_bar", fig)
+
+            # Summary metrics
+            summary = year_views["summary"]
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Total Schools", f"{summary['total_schools']:,}")
+            col2.metric("Total Students in Temp Housing", f"{int(summary['total_temp_housing']):,}")
+            col3.metric("Citywide Average", f"{summary['avg_pct']:.1f}%")
+            export_menu(["borough"], "scale_export")
+
+            st.subheader("Borough → District → School")
+            st.markdown("""
+            Each DBN starts with its community school district (e.g. **07X** is District 7 in the Bronx).
+            Rates here are weighted by enrollment, so large schools count for more than in the borough averages above.
+            """)
+            rollup = load_rollup(data_version)
+            borough_col, district_col = st.columns(2)
+            area = borough_col.selectbox("Borough", rollup.children("city", CITYWIDE), key="drill_borough")
+            districts = rollup.table("borough", area, selected_year)
+            fig = year_figure(f"district_bar:{area}", selected_year, lambda: district_bar(districts, area, selected_year))
+            show_chart("district_bar", fig)
+
+            district = district_col.selectbox(
+                "District", districts["key"], key="drill_district",
+                format_func=lambda key: f"{district_label(key)} ({key})",
+            )
+            if district is not None:
+                node = rollup.node("district", district)
+                column = rollup.years.index(selected_year)
+                housing_pct, absent_pct = (
+                    "n/a" if value != value else f"{value:.1f}%"
+                    for value in (node["housing_pct"][column], node["absent_pct"][column])
+                )
+                st.caption(
+                    f"{district_label(district)}, {area}: {node['schools'][column]:,.0f} schools, "
+                    f"{housing_pct} in temporary housing, {absent_pct} chronically absent ({selected_year})"
+                )
+                st.dataframe(
+                    rollup.table("district", district, selected_year)
+                    .drop(columns="schools").rename(columns={"key": "DBN", **LABELS}),
+                    column_config={
+                        LABELS[name]: st.column_config.NumberColumn(format=fmt) for name, fmt in (
+                            ("enrollment", "%d"), ("temp_housing", "%d"),
+                            ("housing_pct", "%.1f"), ("absent_pct", "%.1f"), ("doubled_up", "%d"),
+                            ("dhs_shelter", "%d"), ("non_dhs_shelter", "%d"),
+                        )
+                    },
+                    width="stretch", hide_index=True,
+                )
+            if summary["suppressed_schools"]:
+                st.caption(
+                    f"{summary['suppressed_schools']:,} schools reported 5 or fewer students in temporary "
+                    "housing; those counts are suppressed (\"s\") for privacy and left out of the totals."
+                )
+
+with tab2:
+    if tab_open(tab2):
+        with profiling.first_render("The Gap"):
+            from charts import gap_scatter, gap_scatter_gl
+            from data.gap import ABSENT_PCT, HOUSING_PCT
+            from data.sampling import rows_for_selection
+            st.header("The Absenteeism Gap")
+            st.markdown("""
+            Each dot represents one NYC school. Schools with more students in temporary
+            housing tend to have higher rates of chronic absenteeism. The trendline
+            quantifies this relationship.
+            """)
+
+            export_menu(["gap", "scatter"], "gap_export")
+
+            scatter_mode = st.radio(
+                "Scatter mode", ["Selected year", "All years", "Compare years"],
+                horizontal=True, key="scatter_mode",
+            )
+
+            # The join and fits only run when this tab is actually open
+            if scatter_mode == "Selected year":
+                gap_df, scatter_df = gap_frames(data_version, selected_year)
+                if scatter_df.empty:
+                    st.info(f"No matched housing + attendance rows for {selected_year}.")
+                else:
+                    fits = load_fits(data_version, (selected_year,))
+                    fig = year_figure("gap_scatter", selected_year, lambda: gap_scatter(scatter_df, fits, selected_year))
+                    if highlight is not None:
+                        fig = starred(fig, scatter_df, highlight, selected_year)
+                    show_chart("gap_scatter", fig)
+
+                    if fits["overall"] is not None:
+                        fit_metrics(fits["overall"])
+            else:
+                if scatter_mode == "All years":
+                    years, color = tuple(available_years), "borough"
+                else:
+                    years = tuple(st.multiselect(
+                        "Years to compare", available_years, default=available_years[-2:],
+                    ))
+                    color = "school_year"
+
+                if not years:
+                    st.info("Pick at least one year to compare.")
+                else:
+                    points = load_scatter_sample(data_version, years)
+                    # Weights sum to the number of plottable full-resolution rows
+                    total = int(round(points["weight"].sum()))
+                    fits = load_fits(data_version, years, color)
+                    span = years[0] if len(years) == 1 else f"{years[0]} to {years[-1]}"
+                    with profiling.stage("figure: gap_scatter_gl"):
+                        fig = gap_scatter_gl(
+                            points, fits, color,
+                            f'Housing Instability vs Chronic Absenteeism ({span}, {total:,} school-years)',
+                        )
+                    if highlight is not None:
+                        fig = starred(fig, scatter_rows(data_version, years), highlight, span)
+                    event = show_chart(
+                        "gap_scatter_gl", fig, key="gap_scatter_gl",
+                        on_select="rerun", selection_mode=("points", "box"),
+                    )
+                    if len(points) < total:
+                        st.caption(
+                            f"Showing a density-preserving sample of {len(points):,} of {total:,} points. "
+                            "Hovering shows only the sampled school and about how many schools its area "
+                            "stands for, not the schools under the cursor. "
+                            "Click a point or drag a box to list every school there at full resolution."
+                        )
+                    else:
+                        st.caption("Click a point or drag a box to list the schools there.")
+
+                    if fits["overall"] is not None:
+                        fit_metrics(fits["overall"])
+
+                    nearby = rows_for_selection(
+                        scatter_rows(data_version, years), HOUSING_PCT, ABSENT_PCT, event.selection,
+                    )
+                    if len(nearby):
+                        st.dataframe(
+                            nearby[["school_year", "dbn", "school_name_housing", "borough",
+                                    HOUSING_PCT, ABSENT_PCT, "total_enrollment"]],
+                            width="stretch", hide_index=True,
+                        )
 
 with tab3:
-    st.header("The Invisible Majority")
-    st.markdown("""
-    Most people picture shelters when they think of student homelessness.
-    But the **majority of students in temporary housing are "doubled up"** —
-    living with family or friends due to economic hardship. They don't appear
-    in shelter databases. They are the invisible majority.
-    """)
-    
-    # Stacked bar: shelter type by borough
-    shelter_data = housing_year_df.groupby('borough').agg(
-        doubled_up=('doubled_up', 'sum'),
-        dhs_shelter=('residing_in_dhs_shelter', 'sum'),
-        non_dhs_shelter=('residing_in_non_dhs_shelter', 'sum')
-    ).reset_index()
-    
-    shelter_melted = shelter_data.melt(
-        id_vars='borough',
-        value_vars=['doubled_up', 'dhs_shelter', 'non_dhs_shelter'],
-        var_name='Housing Type', value_name='Students'
-    )
-    shelter_melted['Housing Type'] = shelter_melted['Housing Type'].map({
-        'doubled_up': 'Doubled Up',
-        'dhs_shelter': 'DHS Shelter',
-        'non_dhs_shelter': 'Non-DHS Shelter'
-    })
-    
-    fig = px.bar(
-        shelter_melted, x='borough', y='Students',
-        color='Housing Type', barmode='stack',
-        title=f'Housing Type Breakdown by Borough ({selected_year})'
-    )
-    st.plotly_chart(fig, use_container_width=True)
-    
-    st.subheader("Top 20 Schools by % Students in Temporary Housing")
-    top20 = housing_year_df.nlargest(20, 'students_in_temporary_housing_1')[
-        ['school_name', 'borough', 'students_in_temporary_housing_1',
-         'students_in_temporary_housing', 'total_students']
-    ].reset_index(drop=True)
-    top20.index = top20.index + 1  # 1-indexed
-    top20.columns = ['School', 'Borough', '% Temp Housing', 'Students in Temp Housing', 'Enrollment']
-    st.dataframe(top20, use_container_width=True)
-    
-    st.markdown("---")
-    st.subheader("What Can Be Done?")
-    st.markdown("""
-    - **Better identification**: Schools need better systems to identify doubled-up students
-    - **Targeted resources**: Social workers at high-impact schools (research shows ~1.2 percentage point attendance improvement)
-    - **Data transparency**: Regular reporting on housing status and attendance outcomes
-    """)
-
-
-st.caption("Data sources: NYC Open Data — Students in Temporary Housing by school year (2017-18, 2018-19, 2019-20, 2020-21) and School End-of-Year Attendance (gqq2-hgxd, 2020-21).")
\ No newline at end of file
+    if tab_open(tab3):
+        with profiling.first_render("The Invisible Majority"):
+            from charts import shelter_bar
+            st.header("The Invisible Majority")
+            st.markdown("""
+            Most people picture shelters when they think of student homelessness.
+            But the **majority of students in temporary housing are "doubled up"** —
+            living with family or friends due to economic hardship. They don't appear
+            in shelter databases. They are the invisible majority.
+            """)
+
+            # Stacked bar: shelter type by borough
+            fig = year_figure("shelter_bar", selected_year, lambda: shelter_bar(year_views["shelter"], selected_year))
+            show_chart("shelter_bar", fig)
+
+            st.subheader("Top 20 Schools by % Students in Temporary Housing")
+            st.dataframe(year_views["top20"], width="stretch")
+            export_menu(["top20", "shelter"], "majority_export")
+
+            st.markdown("---")
+            st.subheader("What Can Be Done?")
+            st.markdown("""
+            - **Better identification**: Schools need better systems to identify doubled-up students
+            - **Targeted resources**: Social workers at high-impact schools (research shows ~1.2 percentage point attendance improvement)
+            - **Data transparency**: Regular reporting on housing status and attendance outcomes
+            """)
+
+with tab4:
+    if tab_open(tab4):
+        with profiling.first_render("Trends"):
+            from charts import area_trends, school_trend
+            from data.cleaning import CITYWIDE
+            from data.panel import METRICS, RATES
+            st.header("Trends Across School Years")
+            st.markdown("""
+            How each borough and school has moved across every loaded school year.
+            This tab ignores the year picker: lines run from the first year to the last,
+            and changes are year over year.
+            """)
+
+            panel = load_panel(data_version)
+            area_col, metric_col = st.columns([1, 2])
+            # Citywide by default; a search result's "Show its history" sets it to the school's borough
+            st.session_state.setdefault("trend_area", CITYWIDE)
+            area = area_col.selectbox("Borough", panel.areas, key="trend_area")
+            metric = metric_col.radio(
+                "Measure", list(METRICS), format_func=METRICS.get, horizontal=True, key="trend_metric",
+            )
+
+            with profiling.stage("figure: area_trends"):
+                fig = area_trends(
+                    panel.years, {name: panel.area_trend(name)[metric] for name in panel.areas},
+                    metric, METRICS[metric], highlight=area,
+                )
+            show_chart("area_trends", fig)
+
+            latest = panel.years[-1]
+            previous = panel.years[-2] if len(panel.years) > 1 else None
+            dbn = st.selectbox(
+                "School", panel.area_dbns(area), key="trend_school",
+                format_func=lambda d: f"{d} · {panel.names[panel.codes[d]]}",
+            )
+            if dbn is not None:
+                school = panel.school(dbn)
+                cols = st.columns(3)
+                for col, name in zip(cols, METRICS):
+                    value = school[name][-1]
+                    delta = school[f"{name}_delta"][-1] if previous else float("nan")
+                    unit = "%" if name in RATES else ""
+                    col.metric(
+                        f"{METRICS[name]} ({latest})",
+                        "n/a" if value != value else f"{value:,.1f}{unit}" if unit else f"{value:,.0f}",
+                        None if delta != delta else (f"{delta:+.1f} pts" if unit else f"{delta:+,.0f}") + f" vs {previous}",
+                        delta_color="inverse" if name in RATES else "normal",
+                    )
+                with profiling.stage("figure: school_trend"):
+                    fig = school_trend(panel.years, school, area, panel.area_trend(area))
+                show_chart("school_trend", fig)
+
+            st.subheader(f"Schools in {area}" if area != CITYWIDE else "All schools")
+            st.dataframe(
+                panel.tables[area],
+                column_config={
+                    "dbn": "DBN",
+                    "school_name": "School",
+                    "borough": "Borough",
+                    "housing_pct_trend": st.column_config.LineChartColumn(f"% Temp Housing, {panel.years[0]}–{latest}"),
+                    "housing_pct": st.column_config.NumberColumn("% Temp Housing", format="%.1f"),
+                    "housing_pct_delta": st.column_config.NumberColumn("YoY change", format="%+.1f"),
+                    "absent_pct_trend": st.column_config.LineChartColumn(f"% Chronically Absent, {panel.years[0]}–{latest}"),
+                    "absent_pct": st.column_config.NumberColumn("% Chronically Absent", format="%.1f"),
+                    "absent_pct_delta": st.column_config.NumberColumn("YoY change ", format="%+.1f"),
+                    "enrollment": st.column_config.NumberColumn("Enrollment", format="%d"),
+                },
+                width="stretch", hide_index=True,
+            )
+
+with tab5:
+    if tab_open(tab5):
+        with profiling.first_render("Peers"):
+            from charts import peer_scatter
+            from data.gap import ABSENT_PCT, HOUSING_PCT
+            from data.peers import OUTLIER_Z, peer_table
+            st.header("Schools Like This One")
+            st.markdown("""
+            A school's peers are the schools closest to it on % students in temporary housing,
+            % doubled up and enrollment, each measured in standard deviations. Chronic absenteeism
+            is left out of the match, so peers that differ on it stand out: similar students,
+            different attendance.
+            """)
+
+            scope_col, match_col, size_col = st.columns(3)
+            scope = scope_col.radio("Compare with", ["Selected year", "All years"], horizontal=True, key="peer_scope")
+            years = (selected_year,) if scope == "Selected year" else tuple(available_years)
+            with profiling.stage("peer_index"):
+                peers = load_peers(data_version, years)
+            match = match_col.radio("Peers", ["Nearest", "Within a distance"], horizontal=True, key="peer_match")
+            if match == "Nearest":
+                k = size_col.slider("How many", 5, 50, 10, key="peer_k")
+                radius = None
+            else:
+                k = None
+                radius = size_col.slider("Distance (standard deviations)", 0.1, 1.5, 0.5, 0.05, key="peer_radius")
+
+            if not len(peers):
+                st.info(f"No schools with complete housing and attendance data for {selected_year}.")
+            else:
+                # The searched-for school when it is indexed, otherwise the first one
+                dbn = st.selectbox(
+                    "School", peers.dbns, index=peers.codes.get(highlight, 0),
+                    format_func=lambda d: f"{d} · {peers.names[peers.codes[d]]}",
+                )
+                row = peers.school_row(dbn, selected_year)
+                with profiling.stage("peer_query"):
+                    found, distances = peers.peers(row, k=k, radius=radius)
+                    table = peer_table(peers, row, found, distances)
+                school = peers.frame.iloc[[row]]
+                absent = float(school[ABSENT_PCT].iat[0])
+
+                if table.empty:
+                    st.info("No peers that close; widen the distance.")
+                else:
+                    peer_absent = table[ABSENT_PCT].to_numpy(dtype="float64")
+                    spread = peer_absent.std()
+                    col1, col2, col3 = st.columns(3)
+                    col1.metric(f"% Chronically Absent ({school['school_year'].iat[0]})", f"{absent:.1f}%")
+                    col2.metric(
+                        f"Peer average ({len(table)} peers)", f"{peer_absent.mean():.1f}%",
+                        f"this school {absent - peer_absent.mean():+.1f} pts", delta_color="inverse",
+                    )
+                    col3.metric(
+                        "This school vs its peers",
+                        "n/a" if spread == 0 else f"{(absent - peer_absent.mean()) / spread:+.1f} sd",
+                    )
+
+                    label = f"{dbn} · {peers.names[peers.codes[dbn]]}"
+                    with profiling.stage("figure: peer_scatter"):
+                        fig = peer_scatter(table, school, label)
+                    show_chart("peer_scatter", fig)
+                    st.caption(
+                        f"Outliers are peers at least {OUTLIER_Z:g} standard deviations from the peer group's "
+                        f"average absenteeism: {int(table['outlier'].sum())} of {len(table)} here."
+                    )
+                    st.dataframe(
+                        table.sort_values("outlier", ascending=False, kind="stable"),
+                        column_config={
+                            "dbn": "DBN",
+                            "school_name_housing": "School",
+                            "borough": "Borough",
+                            "school_year": "Year",
+                            HOUSING_PCT: st.column_config.NumberColumn("% Temp Housing", format="%.1f"),
+                            "pct_doubled_up": st.column_config.NumberColumn("% Doubled Up", format="%.1f"),
+                            "total_students": st.column_config.NumberColumn("Enrollment", format="%d"),
+                            ABSENT_PCT: st.column_config.NumberColumn("% Chronically Absent", format="%.1f"),
+                            "distance": st.column_config.NumberColumn("Distance (sd)", format="%.2f"),
+                            "absent_gap": st.column_config.NumberColumn("vs this school (pts)", format="%+.1f"),
+                            "absent_z": st.column_config.NumberColumn("vs peers (sd)", format="%+.1f"),
+                            "outlier": "Outlier",
+                        },
+                        width="stretch", hide_index=True,
+                    )
+                if peers.skipped:
+                    st.caption(
+                        f"{peers.skipped:,} school-years with a suppressed doubled-up count or no "
+                        "% temporary housing are left out of the match."
+                    )
+
+st.caption(
+    "Data sources: NYC Open Data — Students in Temporary Housing (2017-18 b22r-9izv, "
+    "2018-19 4e3j-75af, 2019-20 ec4f-sy8r, 2020-21 3wtp-43m9) and School End-of-Year "
+    "Attendance (gqq2-hgxd: 2017-18, 2018-19, 2019-20, 2020-21)."
+)
+
+last_run = profiling.end_run()
+
+if debug:
+    with st.sidebar.expander("Rerun timings", expanded=True):
+        st.caption(f"Run {last_run['run']} of session {last_run['session']}: "
+                   f"{last_run['total_seconds'] * 1000:.1f} ms before this panel")
+        st.dataframe(
+            [{"stage": "  " * s["depth"] + s["name"], "ms": round(s["seconds"] * 1000, 2)}
+             for s in last_run["stages"]],
+            hide_index=True, width="stretch",
+        )
+        st.markdown("**Cache hits / misses (this run)**")
+        st.json(last_run["cache"])
+        if last_run["payload_bytes"]:
+            st.markdown("**Figure payload bytes**")
+            st.json(last_run["payload_bytes"])
+        st.markdown("**This session, p50 / p95**")
+        session = profiling.session_summary(st.session_state)
+        st.dataframe(
+            [{"stage": name, "runs": s["count"], "p50 ms": round(s["p50_ms"], 2), "p95 ms": round(s["p95_ms"], 2)}
+             for name, s in session.get("stages", {}).items()],
+            hide_index=True, width="stretch",
+        )
+    with st.sidebar.expander("Gap join cache", expanded=True):
+        st.json(gap_cache().stats())
+        if year_join().last_update:
+            st.markdown("**(dbn, year) join: last update**")
+            st.json(year_join().last_update, expanded=1)
+    with st.sidebar.expander("Figure cache"):
+        st.json(figure_cache().stats())
+    with st.sidebar.expander("Export cache"):
+        st.json(export_cache().stats())
+
+if profiling.enabled(st.query_params):
+    with st.sidebar.expander("Cold-start profile", expanded=True):
+        st.json(profiling.report())
+profiling.export()
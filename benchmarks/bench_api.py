@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+"""
+Load test for api.py: concurrent keep-alive clients against one server process.
+
+Starts api.py on a free port (on the shipped data, or on
+benchmarks/synthetic.py data at --scale in a scratch copy of the repo),
+requests every endpoint once cold, then runs --processes x --clients
+client threads for --seconds. Each client holds one HTTP/1.1 connection and
+cycles through a mix of endpoints and years; --gzip and --revalidate set the
+share of requests sent with Accept-Encoding: gzip and with the ETag from an
+earlier response in If-None-Match.
+
+Reports cold latency per endpoint, then requests per second, latency
+percentiles, status counts and the server's response cache counters.
+
+Usage: python benchmarks/bench_api.py [--seconds 10] [--processes 4]
+       [--clients 32] [--scale 10]
+"""
+
+import argparse
+import contextlib
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+from run_suite import make_tree, repo_root
+
+YEARS = ["2017-18", "2018-19", "2019-20", "2020-21", "all"]
+PATHS = ["/api/borough", "/api/shelter", "/api/top20", "/api/summary", "/api/gap"]
+
+
+def request_mix():
+    """Every (path, year) combination the clients cycle through."""
+    return [f"{path}?year={year}" for path in PATHS for year in YEARS] + [
+        "/api/gap?year=all&group=school_year", "/api/health",
+    ]
+
+
+@contextlib.contextmanager
+def api_server(tree):
+    """Run tree/api.py on a free port for the duration; yields its base URL."""
+    process = subprocess.Popen(
+        [sys.executable, "api.py", "--port", "0"], cwd=tree, stdout=subprocess.PIPE, text=True,
+    )
+    try:
+        banner = process.stdout.readline()
+        if not banner:
+            sys.exit("api.py exited before serving")
+        yield banner.strip().rsplit(" ", 1)[-1]
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def get(connection, url, headers=None):
+    """(status, headers, body) for one GET on a kept-alive connection."""
+    connection.request("GET", url, headers=headers or {})
+    response = connection.getresponse()
+    return response.status, dict(response.getheaders()), response.read()
+
+
+def client(base_url, seconds, gzip_share, revalidate_share, seed):
+    """One connection hammering the mix until the deadline; returns (latencies, statuses)."""
+    host = urlsplit(base_url).netloc
+    connection = http.client.HTTPConnection(host, timeout=30)
+    rng = random.Random(seed)
+    urls = request_mix()
+    etags, latencies, statuses = {}, [], Counter()
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        url = rng.choice(urls)
+        headers = {}
+        if rng.random() < gzip_share:
+            headers["Accept-Encoding"] = "gzip"
+        if url in etags and rng.random() < revalidate_share:
+            headers["If-None-Match"] = etags[url]
+        start = time.perf_counter()
+        try:
+            status, response_headers, _ = get(connection, url, headers)
+        except (OSError, http.client.HTTPException):
+            statuses["error"] += 1
+            connection.close()
+            connection = http.client.HTTPConnection(host, timeout=30)
+            continue
+        latencies.append(time.perf_counter() - start)
+        statuses[status] += 1
+        if "ETag" in response_headers:
+            etags[url] = response_headers["ETag"]
+    connection.close()
+    return latencies, statuses
+
+
+def worker(args):
+    """One process running `clients` client threads; returns their merged results."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    base_url, clients, seconds, gzip_share, revalidate_share, seed = args
+    with ThreadPoolExecutor(clients) as pool:
+        results = list(pool.map(
+            lambda i: client(base_url, seconds, gzip_share, revalidate_share, seed * 1000 + i), range(clients),
+        ))
+    latencies = [value for result, _ in results for value in result]
+    statuses = sum((counts for _, counts in results), Counter())
+    return latencies, statuses
+
+
+def percentile(values, q):
+    return statistics.quantiles(values, n=1000)[int(q * 10) - 1] if len(values) > 1 else values[0]
+
+
+def run(base_url, args):
+    host = urlsplit(base_url).netloc
+    connection = http.client.HTTPConnection(host, timeout=600)
+    cold = {}
+    for url in request_mix():
+        start = time.perf_counter()
+        status, _, body = get(connection, url)
+        cold[url] = {"status": status, "ms": (time.perf_counter() - start) * 1000, "bytes": len(body)}
+    connection.close()
+
+    jobs = [(base_url, args.clients, args.seconds, args.gzip, args.revalidate, seed)
+            for seed in range(args.processes)]
+    start = time.perf_counter()
+    with multiprocessing.Pool(args.processes) as pool:
+        results = pool.map(worker, jobs)
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(value for result, _ in results for value in result)
+    statuses = sum((counts for _, counts in results), Counter())
+    with contextlib.closing(http.client.HTTPConnection(host, timeout=30)) as connection:
+        health = json.loads(get(connection, "/api/health")[2])
+    return {
+        "connections": args.processes * args.clients,
+        "seconds": elapsed,
+        "requests": len(latencies),
+        "requests_per_second": len(latencies) / elapsed,
+        "latency_ms": {
+            "p50": percentile(latencies, 50) * 1000,
+            "p95": percentile(latencies, 95) * 1000,
+            "p99": percentile(latencies, 99) * 1000,
+            "max": latencies[-1] * 1000,
+        },
+        "statuses": {str(status): count for status, count in sorted(statuses.items(), key=str)},
+        "cold_ms": cold,
+        "server": health,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--processes", type=int, default=4, help="client processes")
+    parser.add_argument("--clients", type=int, default=32, help="connections per client process")
+    parser.add_argument("--gzip", type=float, default=0.5, help="share of requests accepting gzip")
+    parser.add_argument("--revalidate", type=float, default=0.3, help="share sent with If-None-Match")
+    parser.add_argument("--scale", type=float, default=0, help="synthetic data scale (0 = shipped CSVs)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tree = repo_root
+        if args.scale:
+            sys.path.insert(0, os.path.join(repo_root, "benchmarks"))
+            import synthetic
+            tree = make_tree(tmp)
+            synthetic.generate(os.path.join(tree, "data"), args.scale, args.seed)
+        with api_server(tree) as base_url:
+            result = run(base_url, args)
+
+    print(f"{result['connections']} connections for {result['seconds']:.1f} s: "
+          f"{result['requests']:,} requests, {result['requests_per_second']:,.0f} req/s")
+    latency = result["latency_ms"]
+    print(f"  latency p50 {latency['p50']:.2f} ms, p95 {latency['p95']:.2f} ms, "
+          f"p99 {latency['p99']:.2f} ms, max {latency['max']:.1f} ms")
+    print(f"  statuses {result['statuses']}")
+    slowest = max(result["cold_ms"].items(), key=lambda item: item[1]["ms"])
+    print(f"  slowest cold request {slowest[0]} {slowest[1]['ms']:.0f} ms")
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+"""
+Cleaning/merge benchmark: vectorized clean_data vs. the original row loop.
+
+The original script cleaned one cell at a time with clean_pct(), renamed
+keys per row and joined through a dict keyed on dbn alone, for 2020-21
+only. legacy_merge() below reproduces it so both can be timed on the same
+input, at 1x (shipped data) and on a synthetic scale-up that replicates
+every school under fresh DBNs.
+
+Usage: python benchmarks/bench_clean.py [--scale 100] [--runs 3]
+"""
+
+import argparse
+import csv
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, repo_root)
+
+import pandas as pd
+
+from data import clean_data
+from data.cleaning import ATTENDANCE_NUMERIC_COLS, BOROUGH_MAP, HOUSING_NUMERIC_COLS
+
+
+def legacy_clean_pct(value):
+    """Per-cell cleaner from the original pure-Python pipeline."""
+    if not value or str(value).strip() == '':
+        return ''
+    s = str(value).strip()
+    if s.lower() == 's':
+        return ''
+    s = s.replace('%', '')
+    try:
+        return str(float(s))
+    except (ValueError, TypeError):
+        return ''
+
+
+def legacy_merge(housing, attendance):
+    """Original dict-per-row clean + dbn-keyed join. Mutates the row dicts."""
+    for row in housing:
+        for col in HOUSING_NUMERIC_COLS:
+            if col in row:
+                row[col] = legacy_clean_pct(row[col])
+        dbn = row.get('dbn', '')
+        row['borough'] = BOROUGH_MAP.get(dbn[2], 'Citywide') if len(dbn) >= 3 else 'Citywide'
+    for row in housing:
+        for old_col, new_col in clean_data.HOUSING_COL_MAP.items():
+            if old_col in row:
+                row[new_col] = row.pop(old_col)
+    for row in attendance:
+        for col in ATTENDANCE_NUMERIC_COLS:
+            if col in row:
+                row[col] = legacy_clean_pct(row[col])
+        dbn = row.get('dbn', '')
+        row['borough'] = BOROUGH_MAP.get(dbn[2], 'Citywide') if len(dbn) >= 3 else 'Citywide'
+    for row in attendance:
+        for old_col, new_col in clean_data.ATTENDANCE_COL_MAP.items():
+            if old_col in row:
+                row[new_col] = row.pop(old_col)
+
+    attendance_by_dbn = {row['dbn']: row for row in attendance if row.get('dbn')}
+    merged = []
+    for h_row in housing:
+        a_row = attendance_by_dbn.get(h_row.get('dbn', ''))
+        if a_row is None:
+            continue
+        merged_row = {}
+        for key, value in h_row.items():
+            merged_row[f'{key}_housing' if key in ['school_name', 'borough'] else key] = value
+        for key, value in a_row.items():
+            if key != 'dbn':
+                merged_row[f'{key}_attendance' if key in ['school_name', 'borough'] else key] = value
+        merged.append(merged_row)
+    return [row for row in merged if all(row.get(col, '') != '' for col in clean_data.KEY_COLS)]
+
+
+def scale_up(frame, scale):
+    """Replicate every row `scale` times under distinct DBNs (borough char kept)."""
+    if scale == 1:
+        return frame
+    copies = []
+    for i in range(scale):
+        copy = frame.copy()
+        copy['dbn'] = copy['dbn'] + f'-{i}'
+        copies.append(copy)
+    return pd.concat(copies, ignore_index=True)
+
+
+def time_it(fn, runs):
+    """Median wall-clock seconds of fn() over `runs` runs, plus its last result."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), result
+
+
+def bench(housing_path, attendance_path, runs, legacy=True):
+    """Time read + clean + merge for both implementations on the same CSV files."""
+    def vectorized():
+        housing = clean_data.read_csv(housing_path)
+        attendance = clean_data.read_csv(attendance_path)
+        return clean_data.merge_years(
+            clean_data.clean_housing(housing), clean_data.clean_attendance(attendance)
+        )[0]
+
+    def row_loop():
+        with open(housing_path, newline='') as f:
+            housing = list(csv.DictReader(f))
+        with open(attendance_path, newline='') as f:
+            attendance = list(csv.DictReader(f))
+        return legacy_merge(housing, attendance)
+
+    result = {}
+    seconds, merged = time_it(vectorized, runs)
+    result['vectorized'] = {'seconds': seconds, 'rows': len(merged)}
+    if legacy:
+        seconds, merged = time_it(row_loop, runs)
+        result['legacy'] = {'seconds': seconds, 'rows': len(merged)}
+        result['speedup'] = result['legacy']['seconds'] / result['vectorized']['seconds']
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scale', type=int, default=100)
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    # Raw strings, so the scale-up round-trips the original "s"/"%" cells
+    housing = pd.read_csv(os.path.join(clean_data.data_dir, 'housing_all_years.csv'),
+                          dtype=str, keep_default_na=False)
+    attendance = pd.read_csv(os.path.join(clean_data.data_dir, 'attendance_all_years.csv'),
+                             dtype=str, keep_default_na=False)
+    housing_2021 = housing[housing['school_year'] == '2020-21']
+    attendance_2021 = attendance[attendance['year'] == '2020-21']
+
+    cases = {
+        # The legacy loop is single-year only, so compare on 2020-21
+        '2020-21 x1': (housing_2021, attendance_2021, True),
+        f'2020-21 x{args.scale}': (scale_up(housing_2021, args.scale),
+                                   scale_up(attendance_2021, args.scale), True),
+        # All years in one run is only possible with the (dbn, school_year) join
+        'all years x1': (housing, attendance, False),
+        f'all years x{args.scale}': (scale_up(housing, args.scale),
+                                     scale_up(attendance, args.scale), False),
+    }
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, (h, a, legacy) in cases.items():
+            housing_path = os.path.join(tmp, 'housing.csv')
+            attendance_path = os.path.join(tmp, 'attendance.csv')
+            h.to_csv(housing_path, index=False)
+            a.to_csv(attendance_path, index=False)
+            r = bench(housing_path, attendance_path, args.runs, legacy)
+            results[name] = r
+            line = f"{name:>16}: vectorized {r['vectorized']['seconds'] * 1000:9.1f} ms ({r['vectorized']['rows']} rows)"
+            if legacy:
+                line += (f", legacy {r['legacy']['seconds'] * 1000:9.1f} ms ({r['legacy']['rows']} rows)"
+                         f", {r['speedup']:.1f}x")
+            print(line)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+"""
+Cold-start benchmark: import cost per module and time to first render per tab.
+
+Every measurement runs in a fresh interpreter so nothing is already in
+sys.modules or the Streamlit caches. Import costs are the marginal time to
+import each module after streamlit (which the server has always loaded by
+the time app.py runs). Each tab is then rendered once with AppTest, opened
+directly via ?tab=<label>, and the app's own profile (profiling.py) is
+collected: load_data stage, lazy imports, and time from the first script
+run to the end of the tab's first render. The snapshot is built first so
+every run starts from the same on-disk state.
+
+Usage: python benchmarks/bench_cold_start.py [--runs 3] [--output results.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, repo_root)
+
+from data.snapshot import build_snapshot
+
+MODULES = [
+    "pandas", "numpy", "pyarrow", "plotly.express", "plotly.graph_objects",
+    "data.snapshot", "data.aggregates", "data.regression", "data.export", "charts",
+]
+TABS = ["📊 The Scale", "🔍 The Gap", "👥 The Invisible Majority", "📈 Trends", "🧭 Peers"]
+
+IMPORT_PROBE = """
+import sys, time
+import streamlit
+start = time.perf_counter()
+try:
+    __import__(sys.argv[1])
+except ImportError:
+    print("null")
+else:
+    print(time.perf_counter() - start)
+"""
+
+RENDER_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=120)
+at.query_params["tab"] = sys.argv[2]
+at.run()
+wall = time.perf_counter() - start
+if at.exception:
+    sys.exit(str(at.exception))
+print(json.dumps({"wall_seconds": wall}))
+"""
+
+
+def run_python(code, *args, env=None):
+    result = subprocess.run(
+        [sys.executable, "-c", code, *args],
+        cwd=repo_root, env=env, capture_output=True, text=True, check=True,
+    )
+    return result.stdout.strip().splitlines()[-1]
+
+
+def import_cost(module, runs):
+    """Median marginal import time of module after streamlit, or None if missing."""
+    timings = []
+    for _ in range(runs):
+        value = json.loads(run_python(IMPORT_PROBE, module))
+        if value is None:
+            return None
+        timings.append(value)
+    return statistics.median(timings)
+
+
+def render_tab(label, runs):
+    """Median cold-start profile for opening one tab in a fresh process."""
+    profiles = []
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory() as tmp:
+            profile_file = os.path.join(tmp, "profile.jsonl")
+            env = dict(os.environ, ABSGAP_PROFILE_FILE=profile_file)
+            wall = json.loads(run_python(RENDER_PROBE, os.path.join(repo_root, "app.py"), label, env=env))
+            with open(profile_file) as f:
+                report = json.loads(f.readlines()[-1])
+        render = next(iter(report["first_renders"].values()), {})
+        profiles.append({
+            "wall_seconds": wall["wall_seconds"],
+            "load_data_seconds": report["stages"].get("load_data"),
+            "render_seconds": render.get("render_seconds"),
+            "time_to_first_render_seconds": render.get("seconds_since_start"),
+            "lazy_imports": report["imports"],
+            "modules_loaded": report["modules_loaded"],
+            "tabs_rendered": sorted(report["first_renders"]),
+        })
+    summary = {
+        key: statistics.median(p[key] for p in profiles)
+        for key in ("wall_seconds", "load_data_seconds", "render_seconds", "time_to_first_render_seconds")
+        if all(p[key] is not None for p in profiles)
+    }
+    last = profiles[-1]
+    summary.update(
+        lazy_imports=last["lazy_imports"],
+        modules_loaded=last["modules_loaded"],
+        tabs_rendered=last["tabs_rendered"],
+    )
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--output", help="also write the JSON results to this file")
+    args = parser.parse_args()
+
+    build_snapshot()
+
+    results = {"python": sys.version.split()[0], "runs": args.runs, "imports": {}, "tabs": {}}
+    for module in MODULES:
+        cost = import_cost(module, args.runs)
+        results["imports"][module] = cost
+        print(f"import {module:<22} " + ("not installed" if cost is None else f"{cost * 1000:7.1f} ms"))
+
+    for label in TABS:
+        r = render_tab(label, args.runs)
+        results["tabs"][label] = r
+        print(
+            f"{label}: first render {r['time_to_first_render_seconds'] * 1000:.0f} ms after start"
+            f" (load_data {r['load_data_seconds'] * 1000:.0f} ms, tab {r['render_seconds'] * 1000:.0f} ms),"
+            f" rendered {r['tabs_rendered']}, loaded {r['modules_loaded']}"
+        )
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
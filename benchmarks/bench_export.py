@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+"""
+Export benchmark: streamed CSV / Parquet downloads vs building them in memory.
+
+Generates benchmarks/synthetic.py data at each --scales value, joins it the
+way the dashboard does (per-year gap frames) and exports the all-years gap
+table, timing each case and recording its peak memory above the cached
+frames (tracemalloc for Python and numpy buffers, plus Arrow's allocator
+sampled per chunk):
+
+  in memory csv       pd.concat of every year, then to_csv() -> one string -> bytes
+  in memory parquet   pd.concat of every year, then to_parquet() into BytesIO
+  stream csv          data/export.py chunks written straight to a file
+  stream parquet      one row group per chunk, written straight to a file
+  cache hit           ExportCache: the same selection again
+
+The streamed peaks should stay flat as the scale grows; the in-memory ones
+grow with the export.
+
+Usage: python benchmarks/bench_export.py [--scales 1 10 100] [--runs 3]
+"""
+
+import io
+import os
+import sys
+import tempfile
+import tracemalloc
+
+from run_suite import repo_root, run_scales, scale_parser, time_case
+
+sys.path.insert(0, repo_root)
+
+import pandas as pd
+import pyarrow as pa
+
+import synthetic
+from data.export import ExportCache, stream, year_tables
+
+
+def peak_bytes(fn):
+    """(result, peak bytes allocated while fn runs): tracemalloc peak + Arrow's high-water mark."""
+    arrow_base = pa.total_allocated_bytes()
+    arrow_peak = [0]
+
+    def sample():
+        arrow_peak[0] = max(arrow_peak[0], pa.total_allocated_bytes() - arrow_base)
+
+    tracemalloc.start()
+    try:
+        result = fn(sample)
+        sample()
+        return result, tracemalloc.get_traced_memory()[1] + arrow_peak[0]
+    finally:
+        tracemalloc.stop()
+
+
+def in_memory(tables, fmt, sample):
+    frame = pd.concat(tables.values(), ignore_index=True)
+    if fmt == "csv":
+        data = frame.to_csv(index=False).encode("utf-8")
+    else:
+        buffer = io.BytesIO()
+        frame.to_parquet(buffer, index=False)
+        sample()
+        data = buffer.getvalue()
+    sample()
+    return len(data)
+
+
+def streamed(tables, fmt, path, sample):
+    size = 0
+    with open(path, "wb") as out:
+        for data in stream(year_tables("gap", list(tables), tables.get), fmt):
+            size += out.write(data)
+            sample()
+    return size
+
+
+def bench_scale(scale, seed, runs):
+    attendance, housing = synthetic.frames(scale, seed)
+    # {year: gap_df}, as the app's gap cache holds them
+    tables = {year: gap_df for year, (gap_df, _) in synthetic.gap_years(housing, attendance).items()}
+    rows = sum(len(frame) for frame in tables.values())
+    cases, peaks, sizes = {}, {}, {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt in ("csv", "parquet"):
+            path = os.path.join(tmp, f"export.{fmt}")
+            for name, fn in (
+                (f"in memory {fmt}", lambda sample: in_memory(tables, fmt, sample)),
+                (f"stream {fmt}", lambda sample: streamed(tables, fmt, path, sample)),
+            ):
+                cases[name] = time_case(lambda: fn(lambda: None), runs)
+                sizes[name], peaks[name] = peak_bytes(fn)
+
+        cache = ExportCache(os.path.join(tmp, "cache"))
+        key = ("gap", "all-years", "parquet", "bench")
+        frames = lambda: year_tables("gap", list(tables), tables.get)
+        cache.get_or_write(key, frames)
+        cases["cache hit"] = time_case(lambda: cache.get_or_write(key, frames), runs)
+
+    return {
+        "rows": rows,
+        "cases": cases,
+        "peak_bytes": peaks,
+        "file_bytes": sizes,
+        "cache": cache.stats(),
+    }
+
+
+def main():
+    args = scale_parser(__doc__).parse_args()
+
+    def report(label, result):
+        print(f"{label}: {result['rows']:,} gap rows across all years")
+        for name, case in result["cases"].items():
+            peak = result["peak_bytes"].get(name)
+            print(f"  {name:<18} {case['median_seconds'] * 1000:9.1f} ms"
+                  + (f"  peak {peak / 2**20:7.1f} MiB" if peak is not None else ""))
+
+    run_scales(args.scales, lambda scale: bench_scale(scale, args.seed, args.runs), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+"""
+Fetch load test: data/fetch_data.py against the local Socrata stand-in.
+
+Serves the shipped raw CSVs from benchmarks/socrata_standin.py under a
+series of network profiles (clean, slow, throttled bandwidth, 5xx, 429,
+truncated bodies, everything at once) and runs a full refresh into a
+scratch copy of the code for each. Records wall-clock, requests served,
+bytes sent and faults injected, the size of the raw CSVs written and how
+long the snapshot's CSV parse takes on them, and checks every rewritten
+CSV holds exactly the rows it was served from (for the columns it kept),
+so retries never drop or duplicate rows. --columns all (or both) repeats
+each profile with --all-columns to show what the $select projection saves.
+
+Usage: python benchmarks/bench_fetch.py [--workers 8] [--page-size 500]
+       [--profiles clean 5xx ...] [--columns spec|all|both]
+"""
+
+import argparse
+import contextlib
+import csv
+import io
+import itertools
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import urllib.request
+
+from run_suite import make_tree, repo_root, standin, time_case
+
+# name -> stand-in options
+PROFILES = {
+    "clean": [],
+    "latency": ["--latency", "0.05", "--jitter", "0.05"],
+    "bandwidth": ["--bandwidth", "2000000"],
+    "5xx": ["--error-rate", "0.1"],
+    "429": ["--throttle-rate", "0.1", "--retry-after", "1"],
+    "truncated": ["--truncate-rate", "0.1"],
+    "mixed": ["--latency", "0.02", "--jitter", "0.05", "--bandwidth", "5000000",
+              "--error-rate", "0.03", "--throttle-rate", "0.02", "--truncate-rate", "0.03"],
+}
+
+# Median of this many snapshot.read_csv_frames() runs on the fetched CSVs
+PARSE_RUNS = 5
+
+
+def same_rows(source, output):
+    """True if output has source's rows in order, compared on the columns output kept."""
+    with open(source, newline="") as src, open(output, newline="") as out:
+        source_rows, output_rows = csv.DictReader(src), csv.DictReader(out)
+        columns = output_rows.fieldnames or []
+        if not set(columns) <= set(source_rows.fieldnames or []):
+            return False
+        for a, b in itertools.zip_longest(source_rows, output_rows):
+            if a is None or b is None or any(a[c] != b[c] for c in columns):
+                return False
+    return True
+
+
+def run_profile(options, workers, page_size, seed, all_columns=False):
+    with tempfile.TemporaryDirectory() as tmp:
+        tree = make_tree(tmp)
+        source_dir = os.path.join(repo_root, "data")
+        data_dir = os.path.join(tree, "data")
+        for filename in os.listdir(source_dir):
+            if filename.endswith(".csv"):
+                shutil.copy2(os.path.join(source_dir, filename), data_dir)
+
+        sys.path.insert(0, tree)
+        from data import fetch_data, snapshot
+
+        with standin(source_dir, *options, "--seed", str(seed)) as base_url:
+            start = time.perf_counter()
+            error = None
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    written = fetch_data.refresh(
+                        base_url, workers, full=True, page_size=page_size, all_columns=all_columns,
+                    )
+            except Exception as e:
+                written, error = [], f"{type(e).__name__}: {e}"
+            elapsed = time.perf_counter() - start
+            with urllib.request.urlopen(base_url + "/_standin/stats") as response:
+                stats = json.load(response)
+
+        parse_seconds = None
+        if error is None:
+            parse_seconds = time_case(snapshot.read_csv_frames, PARSE_RUNS)["median_seconds"]
+        sys.path.remove(tree)
+        # The next profile imports its own tree's copy of the data package
+        for module in [m for m in sys.modules if m == "data" or m.startswith("data.")]:
+            del sys.modules[module]
+
+        mismatched = [
+            filename for filename in fetch_data.OUTPUTS
+            if not same_rows(os.path.join(source_dir, filename), os.path.join(data_dir, filename))
+        ]
+        raw_bytes = sum(os.path.getsize(os.path.join(data_dir, filename)) for filename in fetch_data.OUTPUTS)
+        columns = {
+            filename: len(fetch_data.csv_header(os.path.join(data_dir, filename)))
+            for filename in ("housing_all_years.csv", "attendance_all_years.csv")
+        }
+    return {
+        "all_columns": all_columns,
+        "seconds": elapsed,
+        "written": len(written),
+        "identical": not mismatched and error is None,
+        "mismatched": mismatched,
+        "error": error,
+        "raw_bytes": raw_bytes,
+        "columns": columns,
+        "parse_seconds": parse_seconds,
+        "standin": stats,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--profiles", nargs="+", default=list(PROFILES), choices=list(PROFILES))
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--page-size", type=int, default=500,
+                        help="smaller than fetch_data's default so each dataset takes several pages")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--columns", choices=["spec", "all", "both"], default="spec",
+                        help="fetch the declared column specs, every column, or both for comparison")
+    parser.add_argument("--output", help="also write the JSON results to this file")
+    args = parser.parse_args()
+
+    modes = {"spec": [False], "all": [True], "both": [False, True]}[args.columns]
+    results = {"workers": args.workers, "page_size": args.page_size, "profiles": {}}
+    for name, all_columns in itertools.product(args.profiles, modes):
+        label = name + (" (all columns)" if all_columns else "")
+        r = run_profile(PROFILES[name], args.workers, args.page_size, args.seed, all_columns)
+        results["profiles"][label] = r
+        stats = r["standin"]
+        faults = {k: v for k, v in stats.items() if k.startswith("injected_")}
+        parse = f"{r['parse_seconds'] * 1000:5.0f} ms" if r["parse_seconds"] is not None else "    -"
+        print(
+            f"{label:<24} {r['seconds']:6.2f}s  {stats.get('requests', 0):4d} requests"
+            f"  {stats.get('bytes_sent', 0) / 1e6:5.1f} MB sent  {r['raw_bytes'] / 1e6:5.1f} MB written"
+            f"  parse {parse}  faults {faults or '{}'}"
+            f"  {'identical' if r['identical'] else 'MISMATCH ' + str(r['mismatched'] or r['error'])}"
+        )
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if not all(r["identical"] for r in results["profiles"].values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+"""
+Figure cache benchmark: building the per-year tab figures vs reusing them.
+
+Generates benchmarks/synthetic.py data at each --scales value, loads it
+the way the dashboard does and, for each figure the tabs draw per school
+year (borough_bar, shelter_bar, gap_scatter), times:
+
+  build        the Plotly Express figure from the cached frames (a cache miss)
+  hit          LRUCache lookup of the built figure
+  hit + send   the lookup plus what st.plotly_chart still does with it:
+               to_dict() and the JSON spec for the browser
+
+It also times the warm-up pass (every kind for every year) and reports
+the cache's bytes, i.e. serialized spec sizes.
+
+Usage: python benchmarks/bench_figures.py [--scales 1 10] [--runs 3]
+"""
+
+import sys
+import time
+
+from run_suite import repo_root, run_scales, scale_parser, time_case
+
+sys.path.insert(0, repo_root)
+
+import plotly.io as pio
+import plotly.tools
+
+import synthetic
+from charts import borough_bar, figure_nbytes, gap_scatter, shelter_bar
+from data.aggregates import build_cube
+from data.gap import ABSENT_PCT, HOUSING_PCT
+from data.partitions import LRUCache
+from data.regression import fit_groups
+
+
+def builders_at(scale, seed):
+    """({kind: build(year)}, years) over synthetic data at `scale`."""
+    attendance, housing = synthetic.frames(scale, seed)
+    views = build_cube(housing)["years"]
+    scatter = {year: scatter_df for year, (_, scatter_df) in synthetic.gap_years(housing, attendance).items()}
+    fits = {year: fit_groups(frame, HOUSING_PCT, ABSENT_PCT, "borough") for year, frame in scatter.items()}
+    return {
+        "borough_bar": lambda year: borough_bar(views[year]["borough"], year),
+        "shelter_bar": lambda year: shelter_bar(views[year]["shelter"], year),
+        "gap_scatter": lambda year: gap_scatter(scatter[year], fits[year], year),
+    }, sorted(views)
+
+
+def send(fig):
+    """st.plotly_chart's work on a ready figure: to_dict(), then the JSON spec."""
+    return pio.to_json(plotly.tools.return_figure_from_figure_or_data(fig, validate_figure=True), validate=False)
+
+
+def bench_scale(scale, seed, runs):
+    builders, years = builders_at(scale, seed)
+    year = years[-1]
+    cache = LRUCache(max_entries=64, max_bytes=64 * 1024 * 1024, sizeof=figure_nbytes)
+    start = time.perf_counter()
+    for each in years:
+        for kind, build in builders.items():
+            cache.get_or_compute((kind, each, "bench"), lambda: build(each))
+    warm_up = time.perf_counter() - start
+
+    kinds = {}
+    for kind, build in builders.items():
+        key = (kind, year, "bench")
+        hit = lambda: cache.get_or_compute(key, lambda: build(year))
+        kinds[kind] = {
+            "build": time_case(lambda: build(year), runs),
+            "hit": time_case(hit, runs),
+            "hit + send": time_case(lambda: send(hit()), runs),
+            "spec_bytes": figure_nbytes(hit()),
+        }
+    return {"year": year, "kinds": kinds, "warm_up_seconds": warm_up, "cache": cache.stats()}
+
+
+def main():
+    args = scale_parser(__doc__, scales=(1, 10)).parse_args()
+
+    def report(label, result):
+        print(f"{label} ({result['year']}): warm-up of every year {result['warm_up_seconds']:.2f} s, "
+              f"{result['cache']['bytes'] / 2**20:.1f} MiB cached")
+        for kind, case in result["kinds"].items():
+            print(f"  {kind:<12} build {case['build']['median_seconds'] * 1000:8.1f} ms   "
+                  f"hit {case['hit']['median_seconds'] * 1e6:6.1f} us   "
+                  f"hit + send {case['hit + send']['median_seconds'] * 1000:7.1f} ms   "
+                  f"spec {case['spec_bytes'] / 1024:,.0f} KiB")
+
+    run_scales(args.scales, lambda scale: bench_scale(scale, args.seed, args.runs), report)
+
+
+if __name__ == "__main__":
+    main()
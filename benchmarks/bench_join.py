@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+"""
+Join benchmark: the (dbn, year) hash join vs the per-year pandas merge it replaced.
+
+Generates benchmarks/synthetic.py data at each --scales value, cleans and
+compacts it the way the dashboard does, then times:
+
+  per-year merge      one housing.merge(attendance, on="dbn") per school year
+  join_years          data/join.py's single pass over every year
+  YearJoin cold       the app's per-process join on first load
+  YearJoin unchanged  update() with the same frames (digests only)
+  YearJoin one year   update() after one year's attendance values changed
+
+Time per input row should stay flat as the scale grows. It also roughs up
+some attendance DBNs (lower case, spaces, dropped zero padding) and
+reports how many joined rows each approach keeps.
+
+Usage: python benchmarks/bench_join.py [--scales 1 10 100] [--runs 3]
+"""
+
+import sys
+
+from run_suite import repo_root, run_scales, scale_parser, time_case
+
+sys.path.insert(0, repo_root)
+
+import numpy as np
+import pandas as pd
+
+import synthetic
+from data.gap import ATTENDANCE_COLUMNS, build_gap_frames, gap_join
+from data.join import join_years
+from data.partitions import YearPartitions
+
+# Share of attendance DBNs rewritten into each quirk for the dirty-key check
+DIRTY_SHARE = 0.05
+
+
+def merge_per_year(housing, attendance):
+    """The previous Gap join: partition by year, then one merge on raw dbn per year."""
+    housing_parts = YearPartitions(housing, "school_year")
+    attendance_parts = YearPartitions(attendance, "year")
+    return {
+        year: housing_parts.get(year).merge(
+            attendance_parts.get(year)[ATTENDANCE_COLUMNS], on="dbn", how="inner",
+            suffixes=("_housing", "_attendance"),
+        )
+        for year in housing_parts.years()
+    }
+
+
+def roughen(dbns, rng):
+    """Copy of a DBN column with a few values lower-cased, space-padded or unpadded."""
+    out = dbns.astype("str").to_numpy(dtype=object).copy()
+    for quirk in (str.lower, lambda dbn: f" {dbn} ", lambda dbn: dbn.lstrip("0")):
+        rows = np.flatnonzero(rng.random(len(out)) < DIRTY_SHARE)
+        out[rows] = [quirk(dbn) for dbn in out[rows]]
+    return pd.Series(out, index=dbns.index, dtype="str")
+
+
+def bench_scale(scale, seed, runs):
+    attendance, housing = synthetic.frames(scale, seed)
+    rows = len(housing) + len(attendance)
+    cases = {}
+
+    cases["per-year merge"] = time_case(lambda: merge_per_year(housing, attendance), runs)
+    cases["join_years"] = time_case(
+        lambda: join_years(housing, attendance, right_columns=ATTENDANCE_COLUMNS), runs,
+    )
+    cases["YearJoin cold"] = time_case(lambda: gap_join().update(housing, attendance), runs)
+
+    warm = gap_join()
+    warm.update(housing, attendance)
+    cases["YearJoin unchanged"] = time_case(lambda: warm.update(housing, attendance), runs)
+
+    years = sorted(housing["school_year"].dropna().unique())
+    changed = attendance.copy()
+    last_year = (changed["year"] == years[-1]).to_numpy()
+    bumps = iter(range(1, runs + 1))
+
+    def one_year():
+        changed.loc[last_year, "chronically_absent_1"] += next(bumps)
+        return warm.update(housing, changed)
+
+    cases["YearJoin one year"] = time_case(one_year, runs)
+    recomputed = warm.last_update["recomputed"]
+
+    # Same joined rows as the per-year merge, year by year
+    old = merge_per_year(housing, attendance)
+    new, diagnostics = join_years(
+        housing, attendance, right_columns=ATTENDANCE_COLUMNS, suffixes=("_housing", "_attendance"),
+    )
+    by_year = new["school_year"].astype("str")
+    same = all(
+        old[year].equals(new[(by_year == str(year)).to_numpy()].reset_index(drop=True)) for year in old
+    )
+
+    dirty = attendance.copy()
+    dirty["dbn"] = roughen(attendance["dbn"], np.random.default_rng(seed))
+    dirty_merge = sum(
+        len(housing[housing["school_year"] == year].merge(
+            dirty[dirty["year"] == year][ATTENDANCE_COLUMNS], on="dbn", how="inner"))
+        for year in years
+    )
+    dirty_join = len(build_gap_frames(housing, dirty)[0])
+
+    return {
+        "housing_rows": len(housing),
+        "attendance_rows": len(attendance),
+        "cases": {
+            name: {**case, "ns_per_row": case["median_seconds"] * 1e9 / rows}
+            for name, case in cases.items()
+        },
+        "same_rows": same,
+        "joined_rows": diagnostics["joined_rows"],
+        "recomputed_after_one_year_changed": recomputed,
+        "dirty_keys": {"per-year merge": dirty_merge, "join_years": dirty_join, "clean": len(new)},
+    }
+
+
+def main():
+    args = scale_parser(__doc__).parse_args()
+
+    def report(label, result):
+        rows = result["housing_rows"] + result["attendance_rows"]
+        print(f"{label}: {rows:,} input rows, {result['joined_rows']:,} joined, "
+              f"{'same rows as' if result['same_rows'] else 'DIFFERENT rows from'} the per-year merge")
+        for name, case in result["cases"].items():
+            print(f"  {name:<20} {case['median_seconds'] * 1000:9.1f} ms  {case['ns_per_row']:7.0f} ns/row")
+        print(f"  one changed year re-joins {result['recomputed_after_one_year_changed']}")
+        dirty = result["dirty_keys"]
+        print(f"  roughed-up DBNs: per-year merge keeps {dirty['per-year merge']:,}, "
+              f"join_years keeps {dirty['join_years']:,} of {dirty['clean']:,}")
+
+    run_scales(args.scales, lambda scale: bench_scale(scale, args.seed, args.runs), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+"""
+Cold-load benchmark: raw CSV parse + clean vs. memory-mapped snapshot.
+
+Each run happens in a fresh interpreter so nothing is cached in-process.
+Reports wall-clock load time (imports excluded) and peak RSS per path.
+
+Usage: python benchmarks/bench_load.py [--runs N]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import json, resource, time
+import pandas, pyarrow
+from data import snapshot
+
+def rss_kb():
+    # Current resident set; ru_maxrss alone is dominated by the import peak
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+before_kb = rss_kb()
+start = time.perf_counter()
+frames = {loader}
+elapsed = time.perf_counter() - start
+assert frames is not None, "snapshot missing or stale"
+print(json.dumps({{
+    "seconds": elapsed,
+    "rows": [len(df) for df in frames],
+    "baseline_rss_kb": before_kb,
+    "rss_kb": rss_kb(),
+    "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+}}))
+"""
+
+LOADERS = {
+    "csv": "snapshot.read_csv_frames()",
+    "snapshot": "snapshot.read_snapshot()",
+}
+
+
+def run_once(loader):
+    """Run one loader in a fresh interpreter and return its measurements."""
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD.format(loader=LOADERS[loader])],
+        cwd=repo_root,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    sys.path.insert(0, repo_root)
+    from data import snapshot
+    snapshot.build_snapshot()
+
+    results = {}
+    for loader in LOADERS:
+        runs = [run_once(loader) for _ in range(args.runs)]
+        results[loader] = {
+            "median_seconds": statistics.median(r["seconds"] for r in runs),
+            "min_seconds": min(r["seconds"] for r in runs),
+            "peak_rss_mb": max(r["peak_rss_kb"] for r in runs) / 1024,
+            "load_rss_mb": max(r["rss_kb"] - r["baseline_rss_kb"] for r in runs) / 1024,
+            "rows": runs[0]["rows"],
+        }
+
+    for loader, r in results.items():
+        print(
+            f"{loader:>9}: median {r['median_seconds'] * 1000:7.1f} ms, "
+            f"min {r['min_seconds'] * 1000:7.1f} ms, "
+            f"peak RSS {r['peak_rss_mb']:6.1f} MB (+{r['load_rss_mb']:.1f} MB for load)"
+        )
+    speedup = results["csv"]["median_seconds"] / results["snapshot"]["median_seconds"]
+    print(f"snapshot speedup: {speedup:.1f}x")
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+"""
+Memory benchmark: compact frame dtypes and process RSS under many sessions.
+
+Reports deep bytes per cleaned frame (and per column) as parsed from the
+CSVs vs after data/compact.py, then starts a fresh interpreter that runs N
+simulated dashboard sessions through Streamlit's AppTest (one process, so
+they share st.cache_resource/st.cache_data like sessions on one server),
+each opening a different tab and kept alive until the end, and records
+VmRSS after every session. --baseline REV repeats the RSS run against the
+code at an earlier git revision for comparison; --scale runs on
+benchmarks/synthetic.py data instead of the shipped CSVs.
+
+Usage: python benchmarks/bench_memory.py [--sessions 20] [--scale 10]
+       [--baseline HEAD~1] [--output FILE]
+"""
+
+import argparse
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tarfile
+import tempfile
+
+from run_suite import make_tree, repo_root
+
+TABS = ["📊 The Scale", "🔍 The Gap", "👥 The Invisible Majority", "📈 Trends"]
+
+CHILD = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+
+def rss_kb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+
+tabs = json.loads(sys.argv[2])
+samples = [{"sessions": 0, "rss_kb": rss_kb()}]
+sessions = []
+for i in range(int(sys.argv[1])):
+    at = AppTest.from_file("app.py", default_timeout=120)
+    at.query_params["tab"] = tabs[i % len(tabs)]
+    start = time.perf_counter()
+    at.run()
+    if at.exception:
+        sys.exit(f"session {i} failed: {at.exception[0].message}")
+    sessions.append(at)
+    samples.append({"sessions": i + 1, "rss_kb": rss_kb(), "seconds": time.perf_counter() - start})
+print(json.dumps(samples))
+"""
+
+
+def frame_report(data_dir):
+    """Bytes per frame/column for the CSV-parsed frames vs their compact form."""
+    from data import snapshot
+    from data.compact import compact_frames, memory_report
+
+    paths = {
+        "housing": os.path.join(data_dir, snapshot.HOUSING_SOURCE),
+        "attendance": os.path.join(data_dir, snapshot.ATTENDANCE_SOURCES[0]),
+    }
+    attendance, housing = snapshot.read_csv_frames(paths)
+    compact_attendance, compact_housing = compact_frames(attendance, housing)
+    return memory_report(
+        {"attendance": attendance, "housing": housing},
+        {"attendance": compact_attendance, "housing": compact_housing},
+    )
+
+
+def checkout(rev, dest):
+    """The app code and data files at git revision `rev`, extracted into dest."""
+    archive = subprocess.run(
+        ["git", "archive", rev, "app.py", "charts.py", "profiling.py", "data"],
+        cwd=repo_root, capture_output=True, check=True,
+    ).stdout
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(dest, filter="data")
+    return dest
+
+
+def fill_data(tree, scale, seed):
+    """Shipped CSVs (or synthetic data at `scale`) in tree/data, plus a fresh snapshot."""
+    data_dir = os.path.join(tree, "data")
+    if scale:
+        sys.path.insert(0, os.path.join(repo_root, "benchmarks"))
+        import synthetic
+        synthetic.generate(data_dir, scale, seed)
+    else:
+        for filename in os.listdir(os.path.join(repo_root, "data")):
+            if filename.endswith(".csv"):
+                shutil.copy2(os.path.join(repo_root, "data", filename), data_dir)
+    subprocess.run([sys.executable, os.path.join("data", "snapshot.py")], cwd=tree, check=True,
+                   capture_output=True)
+    return data_dir
+
+
+def rss_run(tree, sessions):
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD, str(sessions), json.dumps(TABS)],
+        cwd=tree, capture_output=True, text=True,
+    )
+    if result.returncode:
+        sys.exit(f"RSS run in {tree} failed:\n{result.stderr[-2000:]}")
+    samples = json.loads(result.stdout.strip().splitlines()[-1])
+    first, last = samples[1]["rss_kb"], samples[-1]["rss_kb"]
+    return {
+        "samples": samples,
+        "rss_mb_first_session": first / 1024,
+        "rss_mb_all_sessions": last / 1024,
+        "mb_per_extra_session": (last - first) / 1024 / max(1, sessions - 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--scale", type=float, default=0, help="synthetic data scale (0 = shipped CSVs)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", help="git revision to compare RSS against")
+    parser.add_argument("--output", help="also write the JSON results to this file")
+    args = parser.parse_args()
+
+    results = {"sessions": args.sessions, "scale": args.scale or 1, "rss": {}}
+    with tempfile.TemporaryDirectory() as tmp:
+        os.makedirs(os.path.join(tmp, "current"))
+        trees = {"current": make_tree(os.path.join(tmp, "current"))}
+        if args.baseline:
+            trees[args.baseline] = checkout(args.baseline, os.path.join(tmp, "baseline"))
+        for label, tree in trees.items():
+            data_dir = fill_data(tree, args.scale, args.seed)
+            if label == "current":
+                sys.path.insert(0, tree)
+                results["frames"] = frame_report(data_dir)
+            results["rss"][label] = rss_run(tree, args.sessions)
+
+    for name, frame in results["frames"].items():
+        print(f"{name:<11} {frame['rows']:>8,} rows  {frame['bytes_before'] / 1e6:7.2f} MB -> "
+              f"{frame['bytes_after'] / 1e6:6.2f} MB  ({frame['bytes_before'] / frame['bytes_after']:.1f}x smaller)")
+        for column, c in frame["columns"].items():
+            print(f"  {column:<34} {c['dtype_before']:>8} -> {c['dtype_after']:<9}"
+                  f" {c['bytes_before'] / 1e3:9.1f} -> {c['bytes_after'] / 1e3:8.1f} KB")
+    for label, r in results["rss"].items():
+        print(f"RSS {label:<10} 1 session {r['rss_mb_first_session']:7.1f} MB, "
+              f"{args.sessions} sessions {r['rss_mb_all_sessions']:7.1f} MB "
+              f"(+{r['mb_per_extra_session']:.2f} MB per extra session)")
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+"""
+Numeric parsing benchmark: data/numeric.parse_numeric vs the parsers it replaced.
+
+Times cells/second on the raw housing columns (counts with "s", "30.7%"
+strings), replicated up to --cells per column, for:
+
+  per-cell           the original pure-Python clean_pct() (one float() per cell)
+  clean_data (old)   clean_data.clean_pct() before parse_numeric: strip, isin mask, replace, cast
+  snapshot (old)     snapshot.clean_housing()'s astype(str)/replace/to_numeric chain
+  parse_numeric      the shared parser (also returns the suppression mask)
+
+and checks every implementation parses the same numbers.
+
+Usage: python benchmarks/bench_parse.py [--cells 1000000] [--runs 3]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, repo_root)
+
+import numpy as np
+import pandas as pd
+
+from bench_clean import legacy_clean_pct
+from data.numeric import parse_numeric
+from data.cleaning import HOUSING_SUPPRESSIBLE_COLS
+from data.snapshot import HOUSING_SOURCE, data_dir
+
+
+def per_cell(values):
+    return pd.Series([legacy_clean_pct(v) for v in values], index=values.index).replace("", np.nan).astype("float64")
+
+
+def clean_data_previous(values):
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype('float64')
+    s = values.astype(str).str.strip()
+    s = s.mask(s.str.lower().isin(['s', '', 'nan'])).str.replace('%', '', regex=False)
+    try:
+        return s.astype('float64')
+    except (ValueError, TypeError):
+        return pd.to_numeric(s, errors='coerce').astype('float64')
+
+
+def snapshot_previous(values):
+    values = values.astype(str).str.replace("%", "", regex=False).replace("s", np.nan).replace("", np.nan)
+    return pd.to_numeric(values, errors="coerce")
+
+
+PARSERS = {
+    "per-cell": per_cell,
+    "clean_data (old)": clean_data_previous,
+    "snapshot (old)": snapshot_previous,
+    "parse_numeric": lambda values: parse_numeric(values)[0],
+}
+
+
+def time_parser(parse, columns, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        results = [parse(column) for column in columns]
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cells", type=int, default=1_000_000, help="cells per column")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--skip-per-cell", action="store_true", help="leave out the slow per-cell parser")
+    args = parser.parse_args()
+
+    raw = pd.read_csv(os.path.join(data_dir, HOUSING_SOURCE), dtype=str, keep_default_na=False)
+    repeats = -(-args.cells // len(raw))
+    columns = [
+        pd.Series(np.tile(raw[col].to_numpy(dtype=object), repeats)[:args.cells], dtype="str")
+        for col in HOUSING_SUPPRESSIBLE_COLS
+    ]
+    cells = sum(len(column) for column in columns)
+    suppressed = sum(int(parse_numeric(column)[1].sum()) for column in columns)
+    print(f"{cells:,} cells in {len(columns)} columns ({suppressed:,} suppressed)")
+
+    results, reference = {}, None
+    for name, parse in PARSERS.items():
+        if name == "per-cell" and args.skip_per_cell:
+            continue
+        seconds, parsed = time_parser(parse, columns, args.runs)
+        if reference is None:
+            reference = parsed
+        same = all(np.array_equal(a.to_numpy(), b.to_numpy(), equal_nan=True) for a, b in zip(reference, parsed))
+        results[name] = {"seconds": seconds, "cells_per_second": cells / seconds, "same_numbers": same}
+        print(f"{name:<18} {seconds * 1000:9.1f} ms  {cells / seconds / 1e6:7.2f} M cells/s"
+              f"  {'same numbers' if same else 'DIFFERENT numbers'}")
+
+    print(json.dumps({"cells": cells, "suppressed": suppressed, "parsers": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
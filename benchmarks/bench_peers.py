@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+"""
+Peer-finder benchmark: the data/peers.py k-d tree vs brute force.
+
+Generates benchmarks/synthetic.py data at each --scales value, joins it the
+way the dashboard does and, for the latest year and for all years stacked,
+times:
+
+  build        build_peer_index(): features, standardization and the tree
+  nearest      PeerIndex.peers(row, k=--k) per query row
+  within       PeerIndex.peers(row, radius=--radius) per query row
+  brute        the same k nearest by computing every row's distance (O(n)
+               per query; doing it for every school is the O(n^2) the tree avoids)
+
+Every nearest query is checked against the brute-force distances. When SciPy
+is installed its cKDTree is timed on the same features as a reference; the
+dashboard does not need SciPy.
+
+Usage: python benchmarks/bench_peers.py [--scales 1 10 100] [--queries 200]
+"""
+
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from run_suite import repo_root, run_scales, scale_parser, time_case
+
+sys.path.insert(0, repo_root)
+
+import synthetic
+from data.gap import stack_years
+from data.peers import build_peer_index
+
+
+def per_query(fn, rows):
+    """(median, p95) seconds of fn(row) over the rows."""
+    times = []
+    for row in rows:
+        start = time.perf_counter()
+        fn(row)
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return {"median_seconds": statistics.median(times), "p95_seconds": times[int(0.95 * (len(times) - 1))]}
+
+
+def brute_nearest(index, row, k):
+    """k nearest rows by scanning every row (same-school rows excluded), as distances."""
+    distances = np.sqrt(((index.features - index.features[row]) ** 2).sum(axis=1))
+    distances[index.rows(index.frame["dbn"].iat[row])] = np.inf
+    nearest = np.argpartition(distances, k - 1)[:k]
+    return np.sort(distances[nearest])
+
+
+def bench_frame(frame, args, rng):
+    build = time_case(lambda: build_peer_index(frame), args.runs)
+    index = build_peer_index(frame)
+    rows = rng.integers(0, len(index), args.queries)
+    mismatches = sum(
+        not np.allclose(index.peers(row, k=args.k)[1], brute_nearest(index, row, args.k)) for row in rows
+    )
+    result = {
+        "rows": len(index),
+        "build": build,
+        "nearest": per_query(lambda row: index.peers(row, k=args.k), rows),
+        "within": per_query(lambda row: index.peers(row, radius=args.radius), rows),
+        "within_mean_peers": float(np.mean([len(index.peers(row, radius=args.radius)[0]) for row in rows])),
+        "brute": per_query(lambda row: brute_nearest(index, row, args.k), rows),
+        "mismatches": mismatches,
+        "index_bytes": index.nbytes(),
+    }
+    try:
+        from scipy.spatial import cKDTree
+    except ImportError:
+        return result
+    result["scipy_build"] = time_case(lambda: cKDTree(index.features), args.runs)
+    tree = cKDTree(index.features)
+    result["scipy_nearest"] = per_query(lambda row: tree.query(index.features[row], args.k + 1), rows)
+    return result
+
+
+def bench_scale(scale, args):
+    """The latest year's scatter rows and every year's stacked, at `scale`."""
+    attendance, housing = synthetic.frames(scale, args.seed)
+    frames = {year: scatter_df for year, (_, scatter_df) in synthetic.gap_years(housing, attendance).items()}
+    rng = np.random.default_rng(args.seed)
+    latest = list(frames)[-1]
+    return {
+        latest: bench_frame(frames[latest], args, rng),
+        "all years": bench_frame(stack_years(frames.values()), args, rng),
+    }
+
+
+def main():
+    parser = scale_parser(__doc__)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--radius", type=float, default=0.5, help="standard deviations")
+    args = parser.parse_args()
+
+    def report(label, scopes):
+        for scope, result in scopes.items():
+            print(f"{label} {scope}: {result['rows']:,} rows, built in {result['build']['median_seconds'] * 1000:.0f} ms"
+                  + (f" (SciPy {result['scipy_build']['median_seconds'] * 1000:.0f} ms)" if "scipy_build" in result else ""))
+            for name in ("nearest", "within", "brute", "scipy_nearest"):
+                if name in result:
+                    case = result[name]
+                    print(f"  {name:<14} p50 {case['median_seconds'] * 1e6:8.0f} us   p95 {case['p95_seconds'] * 1e6:8.0f} us")
+            print(f"  {result['within_mean_peers']:.0f} peers within {args.radius:g} sd on average; "
+                  f"{result['mismatches']} of {args.queries} nearest queries differ from brute force")
+
+    run_scales(args.scales, lambda scale: bench_scale(scale, args), report)
+
+
+if __name__ == "__main__":
+    main()
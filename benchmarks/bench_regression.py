@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+"""
+Regression benchmark: data.regression vs. statsmodels / px trendline="ols".
+
+For every school year it checks that the closed-form fits (overall and per
+borough) match statsmodels OLS to tolerance: slope, intercept, r² and the
+95% mean confidence band. It then times fit + figure build + JSON
+serialization for the old trendline="ols" chart and the new overlay chart.
+statsmodels is only needed here, not by the dashboard.
+
+Usage: python benchmarks/bench_regression.py [--runs 5]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, repo_root)
+
+import numpy as np
+import plotly.express as px
+
+from charts import add_trendlines
+from data.gap import build_gap_frames
+from data.partitions import YearPartitions
+from data.regression import confidence_band, fit_groups, fit_line
+from data.snapshot import load_frames
+
+X, Y = "pct_students_temp_housing", "pct_chronically_absent"
+TOLERANCE = 1e-8
+
+
+def scatter_frames():
+    """{school_year: scatter_df} exactly as the dashboard builds them."""
+    attendance, housing = load_frames()
+    housing_parts = YearPartitions(housing, "school_year")
+    attendance_parts = YearPartitions(attendance, "year")
+    return {
+        year: build_gap_frames(housing_parts.get(year), attendance_parts.get(year))[1]
+        for year in housing_parts.years()
+    }
+
+
+def check_against_statsmodels(frame):
+    """Largest relative difference from statsmodels across all fits of one year."""
+    import statsmodels.api as sm
+
+    def compare(rows):
+        rows = rows[np.isfinite(rows[X]) & np.isfinite(rows[Y])]
+        ours = fit_line(rows[X], rows[Y])
+        model = sm.OLS(rows[Y].to_numpy(), sm.add_constant(rows[X].to_numpy())).fit()
+        xs = np.linspace(rows[X].min(), rows[X].max(), 7)
+        frame_ci = model.get_prediction(sm.add_constant(xs)).summary_frame(alpha=0.05)
+        yhat, lower, upper = confidence_band(ours, xs, 0.95)
+        pairs = [
+            (ours["intercept"], model.params[0]),
+            (ours["slope"], model.params[1]),
+            (ours["r2"], model.rsquared),
+            (ours["slope_se"], model.bse[1]),
+        ]
+        pairs += list(zip(yhat, frame_ci["mean"]))
+        pairs += list(zip(lower, frame_ci["mean_ci_lower"]))
+        pairs += list(zip(upper, frame_ci["mean_ci_upper"]))
+        return max(abs(a - b) / max(abs(b), 1e-12) for a, b in pairs)
+
+    worst = compare(frame)
+    for _, rows in frame.groupby("borough"):
+        if len(rows) >= 3:
+            worst = max(worst, compare(rows))
+    return worst
+
+
+def figure_kwargs(frame):
+    return dict(
+        data_frame=frame, x=X, y=Y, color="borough", size="total_enrollment",
+        hover_data=["school_name_housing", "dbn"], opacity=0.6,
+    )
+
+
+def time_it(fn, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    import statsmodels.api  # noqa: F401 - the import px trendline="ols" pays on first use
+    statsmodels_import = time.perf_counter() - start
+
+    results = {"statsmodels_import_seconds": statsmodels_import, "years": {}}
+    for year, frame in scatter_frames().items():
+        worst = check_against_statsmodels(frame)
+
+        def old_chart():
+            px.scatter(**figure_kwargs(frame), trendline="ols").to_json()
+
+        def new_chart():
+            fits = fit_groups(frame, X, Y, "borough")
+            add_trendlines(px.scatter(**figure_kwargs(frame)), fits).to_json()
+
+        def fit_only():
+            fit_groups(frame, X, Y, "borough")
+
+        r = {
+            "rows": len(frame),
+            "max_rel_diff_vs_statsmodels": float(worst),
+            "within_tolerance": bool(worst < TOLERANCE),
+            "fit_seconds": time_it(fit_only, args.runs),
+            "trendline_ols_chart_seconds": time_it(old_chart, args.runs),
+            "closed_form_chart_seconds": time_it(new_chart, args.runs),
+        }
+        results["years"][year] = r
+        print(
+            f"{year}: {r['rows']} schools, max rel diff {worst:.1e}"
+            f" ({'ok' if r['within_tolerance'] else 'FAIL'}), fit {r['fit_seconds'] * 1000:.2f} ms,"
+            f" chart ols {r['trendline_ols_chart_seconds'] * 1000:.1f} ms"
+            f" vs closed-form {r['closed_form_chart_seconds'] * 1000:.1f} ms"
+        )
+    print(f"statsmodels import (avoided at runtime): {statsmodels_import * 1000:.0f} ms")
+    print(json.dumps(results, indent=2))
+    if not all(r["within_tolerance"] for r in results["years"].values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+"""
+All-years scatter benchmark: payload and build time as the point count grows.
+
+Stacks the Gap scatter rows for every school year, replicates them
+1x..Nx with a little jitter (so copies don't sit on top of each other),
+and for each scale times density sampling, figure build and JSON
+serialization of the WebGL chart the dashboard draws, alongside the
+per-year SVG px.scatter applied to every point. The WebGL payload should
+stay flat once the sample cap is reached.
+
+Usage: python benchmarks/bench_scatter.py [--scales 1 10 100] [--legacy-max-scale 10]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, repo_root)
+
+import numpy as np
+import pandas as pd
+
+from charts import gap_scatter, gap_scatter_gl
+from data.gap import ABSENT_PCT, HOUSING_PCT, build_gap_frames, stack_years
+from data.partitions import YearPartitions
+from data.regression import fit_groups
+from data.sampling import MAX_POINTS, density_sample
+from data.snapshot import load_frames
+
+
+def all_years_rows():
+    attendance, housing = load_frames()
+    housing_parts = YearPartitions(housing, "school_year")
+    attendance_parts = YearPartitions(attendance, "year")
+    return stack_years([
+        build_gap_frames(housing_parts.get(year), attendance_parts.get(year))[1]
+        for year in housing_parts.years()
+    ])
+
+
+def scale_up(rows, scale, seed=0):
+    """rows repeated `scale` times; copies after the first get ±0.5 pt jitter."""
+    if scale == 1:
+        return rows
+    rng = np.random.default_rng(seed)
+    out = pd.concat([rows] * scale, ignore_index=True)
+    out["dbn"] = out["dbn"] + np.repeat([f"-{i}" for i in range(scale)], len(rows))
+    jitter = np.r_[np.zeros(len(rows)), rng.uniform(-0.5, 0.5, len(out) - len(rows))]
+    out[HOUSING_PCT] = (out[HOUSING_PCT] + jitter).clip(lower=0)
+    out[ABSENT_PCT] = (out[ABSENT_PCT] + jitter[::-1]).clip(lower=0)
+    return out
+
+
+def time_it(fn, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--legacy-max-scale", type=int, default=10,
+                        help="skip the full-resolution SVG chart above this scale")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    base = all_years_rows()
+    results = {"max_points": MAX_POINTS, "scales": {}}
+    for scale in args.scales:
+        rows = scale_up(base, scale)
+        fits = fit_groups(rows, HOUSING_PCT, ABSENT_PCT, "borough")
+        sample_seconds, points = time_it(lambda: density_sample(rows, HOUSING_PCT, ABSENT_PCT), args.runs)
+        gl_seconds, payload = time_it(
+            lambda: gap_scatter_gl(points, fits, "borough", "All years").to_json(), args.runs
+        )
+        r = {
+            "rows": len(rows),
+            "points_drawn": len(points),
+            "sample_seconds": sample_seconds,
+            "webgl_build_json_seconds": gl_seconds,
+            "webgl_payload_bytes": len(payload),
+        }
+        if scale <= args.legacy_max_scale:
+            svg_seconds, svg_payload = time_it(
+                lambda: gap_scatter(rows, fits, "all years").to_json(), args.runs
+            )
+            r.update(svg_build_json_seconds=svg_seconds, svg_payload_bytes=len(svg_payload))
+        results["scales"][scale] = r
+
+        line = (
+            f"x{scale}: {r['rows']:,} rows -> {r['points_drawn']:,} points,"
+            f" sample {sample_seconds * 1000:.1f} ms, webgl {gl_seconds * 1000:.0f} ms"
+            f" / {r['webgl_payload_bytes'] / 1024:.0f} KiB"
+        )
+        if "svg_payload_bytes" in r:
+            line += f"; full svg {r['svg_build_json_seconds'] * 1000:.0f} ms / {r['svg_payload_bytes'] / 1024:.0f} KiB"
+        print(line)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+"""
+School search benchmark: the data/search.py index vs scanning every name.
+
+Generates benchmarks/synthetic.py data at each --scales value, builds the
+school panel the way the dashboard does, then times:
+
+  build     build_search_index() over every school (once per data version)
+  index     SchoolIndex.search() per query
+  scan      the obvious alternative: str.startswith over DBNs plus a
+            case-insensitive str.contains over every name, per query
+            (exact substrings only, so no typo tolerance)
+
+Queries are drawn from the schools themselves, --queries of each kind:
+DBN prefixes ("07X"), whole DBNs, whole names, a name's last two words,
+names with one typo, and strings that match nothing. Reports median and
+p95 latency per kind, and how often the intended school is in the top 10.
+
+Usage: python benchmarks/bench_search.py [--scales 1 10 100] [--queries 200]
+"""
+
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from run_suite import repo_root, run_scales, scale_parser, time_case
+
+sys.path.insert(0, repo_root)
+
+import pandas as pd
+
+import synthetic
+from data.panel import build_panel
+from data.search import build_search_index
+
+
+def panel_at(scale, seed):
+    """The school panel over synthetic data at `scale`."""
+    attendance, housing = synthetic.frames(scale, seed)
+    return build_panel(housing, attendance)
+
+
+def typo(text, rng):
+    """text with one letter replaced."""
+    letters = [i for i, char in enumerate(text) if char.isalpha()]
+    if not letters:
+        return text
+    i = letters[rng.integers(len(letters))]
+    return text[:i] + ("x" if text[i].lower() != "x" else "z") + text[i + 1:]
+
+
+def query_mix(panel, n, rng):
+    """{kind: [(query, intended dbn or None)]}, n queries per kind."""
+    rows = rng.integers(0, len(panel), n)
+    dbns, names = panel.dbns[rows], panel.names[rows]
+    return {
+        "dbn prefix": [(dbn[:3], None) for dbn in dbns],
+        "whole dbn": [(dbn, dbn) for dbn in dbns],
+        "whole name": [(name, dbn) for name, dbn in zip(names, dbns)],
+        "last words": [(" ".join(name.split()[-2:]), None) for name in names],
+        "one typo": [(typo(name, rng), dbn) for name, dbn in zip(names, dbns)],
+        "no match": [(f"qzx{i}vk", None) for i in range(n)],
+    }
+
+
+def scan(dbns, names, query, limit=10):
+    """DBNs starting with the query, then names containing it (case-insensitive)."""
+    upper = query.strip().upper()
+    hits = dbns[dbns.str.startswith(upper)].tolist()[:limit]
+    if len(hits) < limit:
+        hits += dbns[names.str.contains(query.strip(), case=False, regex=False)].tolist()[:limit - len(hits)]
+    return hits
+
+
+def latencies(fn, queries):
+    """(median, p95) seconds over the queries, and the results."""
+    times, results = [], []
+    for query, _ in queries:
+        start = time.perf_counter()
+        results.append(fn(query))
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return {"median_seconds": statistics.median(times), "p95_seconds": times[int(0.95 * (len(times) - 1))]}, results
+
+
+def recall(queries, results):
+    """Share of queries with an intended school that found it in the top 10 (None if no query has one)."""
+    wanted = [(dbn, found) for (_, dbn), found in zip(queries, results) if dbn is not None]
+    return sum(dbn in found for dbn, found in wanted) / len(wanted) if wanted else None
+
+
+def bench_scale(scale, seed, n_queries, runs):
+    panel = panel_at(scale, seed)
+    build = time_case(lambda: build_search_index(panel), runs)
+    index = build_search_index(panel)
+    dbns, names = pd.Series(panel.dbns, dtype="object"), pd.Series(panel.names, dtype="object")
+
+    kinds = {}
+    for kind, queries in query_mix(panel, n_queries, np.random.default_rng(seed)).items():
+        index.search(queries[0][0])
+        indexed, found = latencies(lambda query: [match.dbn for match in index.search(query)], queries)
+        scanned, scan_found = latencies(lambda query: scan(dbns, names, query), queries)
+        kinds[kind] = {
+            "index": {**indexed, "recall": recall(queries, found)},
+            "scan": {**scanned, "recall": recall(queries, scan_found)},
+        }
+    return {"schools": len(panel), "build": build, "index_bytes": index.nbytes(), "kinds": kinds}
+
+
+def main():
+    parser = scale_parser(__doc__)
+    parser.add_argument("--queries", type=int, default=200, help="queries per kind")
+    args = parser.parse_args()
+
+    def report(label, result):
+        print(f"{label}: {result['schools']:,} schools, index built in "
+              f"{result['build']['median_seconds'] * 1000:.0f} ms ({result['index_bytes'] / 2**20:.1f} MiB)")
+        for kind, case in result["kinds"].items():
+            index, scanned = case["index"], case["scan"]
+            found = "" if index["recall"] is None else f"   top-10 recall {index['recall']:.0%} vs {scanned['recall']:.0%}"
+            print(f"  {kind:<11} index p50 {index['median_seconds'] * 1e6:7.0f} us  p95 {index['p95_seconds'] * 1e6:7.0f} us"
+                  f"   scan p50 {scanned['median_seconds'] * 1e3:7.1f} ms{found}")
+
+    run_scales(args.scales, lambda scale: bench_scale(scale, args.seed, args.queries, args.runs), report)
+
+
+if __name__ == "__main__":
+    main()
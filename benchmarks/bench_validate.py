@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+"""
+Validation benchmark: data/validate.py vs the row-by-row QA scenario scripts.
+
+Replicates merged.csv --scales times (each copy gets its own DBNs, so keys
+stay unique), writes it to a scratch file and times:
+
+  qa scenarios        the original qa_scenario_1 + qa_scenario_2 loops:
+                      csv.DictReader, then float()/substring tests per cell
+  validate (full)     read_csv + every check in MERGED_SPEC, all years
+  validate (reuse)    the in-memory frame (as clean_data.py validates it)
+                      with stored per-year results and no change
+  validate (one year) after one year's rows changed: only that year re-checked
+
+The QA loops check 2-4 columns; the validator checks every spec column.
+
+Usage: python benchmarks/bench_validate.py [--scales 1 10 100] [--runs 3]
+"""
+
+import csv
+import os
+import sys
+import tempfile
+
+from run_suite import repo_root, run_scales, scale_parser, time_case
+
+sys.path.insert(0, repo_root)
+
+import numpy as np
+import pandas as pd
+
+from data.cleaning import read_csv
+from data.validate import validate_outputs
+
+QA_SHAPE_COLS = ['pct_students_temp_housing', 'pct_chronically_absent']
+QA_CLEAN_COLS = ['pct_students_temp_housing', 'pct_chronically_absent',
+                 'n_students_temp_housing', 'total_enrollment']
+
+
+def legacy_qa(path):
+    """qa_scenario_1.py and qa_scenario_2.py as they were: two DictReader passes."""
+    for cols, check in ((QA_SHAPE_COLS, float), (QA_CLEAN_COLS, None)):
+        with open(path) as f:
+            data = list(csv.DictReader(f))
+        assert len(data) > 1300
+        for row in data:
+            for col in cols:
+                if check:
+                    check(row[col])
+                else:
+                    value = str(row[col])
+                    assert 's' not in value.lower() and '%' not in value
+
+
+def scaled(merged, scale):
+    """merged repeated `scale` (a whole number) times, each copy with its own school numbers."""
+    scale = int(scale)
+    if scale == 1:
+        return merged
+    out = pd.concat([merged] * scale, ignore_index=True)
+    copy = np.repeat(np.arange(scale), len(merged))
+    # Keep DBNs canonical: copies prefix the school number ("01M015" -> "01M1015")
+    prefix = pd.Series(copy).map("{:d}".format).where(copy > 0, "")
+    out["dbn"] = out["dbn"].str[:3] + prefix + out["dbn"].str[3:]
+    return out
+
+
+def bench_scale(merged, scale, runs):
+    frame = scaled(merged, scale)
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "merged.csv")
+        state_path = os.path.join(tmp, "validation.json")
+        frame.to_csv(csv_path, index=False)
+
+        cases = {
+            "qa scenarios": time_case(lambda: legacy_qa(csv_path), runs),
+            "validate (full)": time_case(
+                lambda: validate_outputs({"merged": read_csv(csv_path)}, state_path, full=True), runs,
+            ),
+        }
+        # As clean_data.py does it: the frame in memory, stored results from the last run
+        cases["validate (reuse)"] = time_case(lambda: validate_outputs({"merged": frame}, state_path), runs)
+        report = validate_outputs({"merged": frame}, state_path)["outputs"]["merged"]
+
+        years = sorted(frame["school_year"].unique())
+        changed = frame.copy()
+        last_year = (changed["school_year"] == years[-1]).to_numpy()
+        bumps = iter(range(1, runs + 1))
+
+        def one_year():
+            changed.loc[last_year, "attendance"] -= 0.01 * next(bumps)
+            return validate_outputs({"merged": changed}, state_path)
+
+        cases["validate (one year)"] = time_case(one_year, runs)
+        changed.loc[last_year, "attendance"] += 0.5
+        rechecked = validate_outputs({"merged": changed}, state_path)["outputs"]["merged"]
+
+    return {
+        "rows": len(frame),
+        "cases": cases,
+        "ok": report["ok"],
+        "checks": len(report["checks"]),
+        "check_seconds": report["seconds"],
+        "rechecked_after_one_year_changed": rechecked["revalidated"],
+    }
+
+
+def main():
+    args = scale_parser(__doc__, seed=False).parse_args()
+    merged = read_csv(os.path.join(repo_root, "data", "merged.csv"))
+
+    def report(label, result):
+        print(f"{label}: {result['rows']:,} rows, {result['checks']} checks, "
+              f"{'OK' if result['ok'] else 'FAILED'}")
+        for name, case in result["cases"].items():
+            print(f"  {name:<20} {case['median_seconds'] * 1000:9.1f} ms")
+        print(f"  one changed year re-checks {result['rechecked_after_one_year_changed']}")
+
+    run_scales(args.scales, lambda scale: bench_scale(merged, scale, args.runs), report)
+
+
+if __name__ == "__main__":
+    main()
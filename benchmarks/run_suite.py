@@ -0,0 +1,297 @@
+#!/usr/bin/env python
+"""
+Benchmark suite: the data pipeline and dashboard hot paths on synthetic data.
+
+For each scale, the repo's code is copied into a scratch tree, that tree's
+data/ is filled by benchmarks/synthetic.py, and every case runs in a fresh
+interpreter against it:
+
+  clean_data.main          raw CSVs -> merged.csv
+  snapshot.build           raw CSVs -> Arrow snapshot
+  app.load_data            snapshot load (and the CSV fallback) behind app.load_data
+  year_filter              per-year selection: boolean mask vs YearPartitions
+  gap_merge                same-year housing x attendance join, every year
+  join.join_years          the same join as one (dbn, year) pass over all years
+  aggregates.build_cube    borough/shelter/top-20 views behind the tabs
+  regression.fit_groups    Gap trendlines, every year
+  panel.build_panel        school x year panel behind the Trends tab, and
+                           switching the selected school/borough on it
+  rollup.build_rollup      borough -> district -> school rollup, and drilling
+                           into every district of every borough on it vs
+                           a groupby over that year's school rows per click
+  fetch_data.refresh       full and incremental refresh against a local
+                           Socrata stand-in (benchmarks/socrata_standin.py)
+
+Results (median/min seconds per case, row counts, commit, machine) are
+written as JSON, by default to benchmarks/results/suite-<commit>.json;
+--compare prints the ratio of every case against an earlier results file.
+
+Usage: python benchmarks/run_suite.py [--scales 1 10 100] [--runs 3]
+       [--output FILE] [--compare BASELINE.json] [--no-fetch]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+benchmarks_dir = os.path.join(repo_root, "benchmarks")
+RESULTS_DIR = os.path.join(benchmarks_dir, "results")
+
+
+def time_case(fn, runs):
+    """Median/min wall-clock seconds of fn() over `runs` runs, its output silenced."""
+    timings = []
+    for _ in range(runs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+    return {"median_seconds": statistics.median(timings), "min_seconds": min(timings), "runs": runs}
+
+
+def scale_parser(doc, scales=(1, 10, 100), seed=True):
+    """Argument parser with the --scales/--runs (and --seed) options of the per-scale benchmarks."""
+    parser = argparse.ArgumentParser(description=doc.strip().splitlines()[0])
+    parser.add_argument("--scales", type=float, nargs="+", default=list(scales))
+    parser.add_argument("--runs", type=int, default=3)
+    if seed:
+        parser.add_argument("--seed", type=int, default=0)
+    return parser
+
+
+def run_scales(scales, bench, report):
+    """
+    {"<scale>x": bench(scale)} over `scales`; report(label, result) prints
+    each scale's summary as it finishes, and the whole dict is printed as JSON.
+    """
+    results = {}
+    for scale in scales:
+        label = f"{scale:g}x"
+        results[label] = bench(scale)
+        report(label, results[label])
+    print(json.dumps(results, indent=2))
+    return results
+
+
+def run_worker(tree, runs, base_url=None):
+    """Time every case against the code and data in `tree` (runs in the child)."""
+    sys.path.insert(0, tree)
+    from data import aggregates, clean_data, fetch_data, gap, join, panel, regression, rollup, snapshot
+    from data.partitions import YearPartitions
+
+    cases = {}
+    cases["clean_data.main"] = time_case(clean_data.main, runs)
+    cases["snapshot.build"] = time_case(snapshot.build_snapshot, runs)
+    cases["app.load_data (snapshot)"] = time_case(snapshot.load_frames, runs)
+    cases["app.load_data (csv)"] = time_case(snapshot.read_csv_frames, runs)
+
+    attendance, housing = snapshot.load_frames()
+    years = sorted(housing["school_year"].dropna().unique())
+
+    def mask_filter():
+        for year in years:
+            housing[housing["school_year"] == year]
+            attendance[attendance["year"] == year]
+
+    def partition_filter():
+        housing_parts = YearPartitions(housing, "school_year")
+        attendance_parts = YearPartitions(attendance, "year")
+        for year in years:
+            housing_parts.get(year)
+            attendance_parts.get(year)
+
+    housing_parts = YearPartitions(housing, "school_year")
+    attendance_parts = YearPartitions(attendance, "year")
+    scatter = {}
+
+    def merge_all():
+        for year in years:
+            scatter[year] = gap.build_gap_frames(housing_parts.get(year), attendance_parts.get(year))[1]
+
+    def fit_all():
+        for frame in scatter.values():
+            regression.fit_groups(frame, gap.HOUSING_PCT, gap.ABSENT_PCT, "borough")
+
+    cases["year_filter (mask)"] = time_case(mask_filter, runs)
+    cases["year_filter (partitions)"] = time_case(partition_filter, runs)
+    cases["gap_merge"] = time_case(merge_all, runs)
+    cases["join.join_years (all years)"] = time_case(
+        lambda: join.join_years(housing, attendance, right_columns=gap.ATTENDANCE_COLUMNS), runs,
+    )
+    cases["aggregates.build_cube"] = time_case(lambda: aggregates.build_cube(housing), runs)
+    cases["regression.fit_groups"] = time_case(fit_all, runs)
+
+    school_panel = panel.build_panel(housing, attendance)
+
+    def switch_all():
+        for dbn in school_panel.dbns:
+            school_panel.school(dbn)
+        for area in school_panel.areas:
+            school_panel.area_trend(area)
+            school_panel.tables[area]
+
+    cases["panel.build_panel"] = time_case(lambda: panel.build_panel(housing, attendance), runs)
+    cases["panel lookups (every school)"] = time_case(switch_all, runs)
+
+    school_rollup = rollup.build_rollup(school_panel, housing)
+    latest = school_rollup.years[-1]
+
+    def drill_rollup():
+        for borough in school_rollup.children("city", panel.CITYWIDE):
+            for district in school_rollup.table("borough", borough, latest)["key"]:
+                school_rollup.table("district", district, latest)
+
+    def drill_groupby():
+        year_rows = housing[housing["school_year"] == latest]
+        for borough in school_rollup.children("city", panel.CITYWIDE):
+            rows = year_rows[year_rows["borough"] == borough]
+            districts = rows["dbn"].astype("str").str[:3]
+            sums = rows.groupby(districts)[list(rollup.COUNTS.values())].sum()
+            for district in sums.index:
+                rows[(districts == district).to_numpy()]
+
+    cases["rollup.build_rollup"] = time_case(lambda: rollup.build_rollup(school_panel, housing), runs)
+    cases["rollup drill-down (every district)"] = time_case(drill_rollup, runs)
+    cases["groupby drill-down (every district)"] = time_case(drill_groupby, runs)
+
+    if base_url:
+        # Full refresh rewrites every raw CSV (same content) and the downstream files;
+        # the incremental one should get 304s and write nothing.
+        cases["fetch_data.refresh (full)"] = time_case(lambda: fetch_data.refresh(base_url, full=True), runs)
+        cases["fetch_data.refresh (incremental)"] = time_case(lambda: fetch_data.refresh(base_url), runs)
+
+    rows = {"housing": len(housing), "attendance": len(attendance), "years": len(years)}
+    print(json.dumps({"rows": rows, "cases": cases}))
+
+
+def make_tree(dest):
+    """Copy the repo's code (no data files) into dest."""
+    for name in ("app.py", "api.py", "charts.py", "profiling.py"):
+        shutil.copy2(os.path.join(repo_root, name), dest)
+    shutil.copytree(
+        os.path.join(repo_root, "data"), os.path.join(dest, "data"),
+        ignore=shutil.ignore_patterns("*.csv", "*.json", "snapshot", "__pycache__"),
+    )
+    return dest
+
+
+@contextlib.contextmanager
+def standin(data_dir, *options):
+    """Run the Socrata stand-in on a free port for the duration; yields its base URL."""
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(benchmarks_dir, "socrata_standin.py"), "--data-dir", data_dir, *options],
+        stdout=subprocess.PIPE, text=True,
+    )
+    try:
+        banner = process.stdout.readline()
+        yield banner.strip().rsplit(" ", 1)[-1]
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def bench_scale(scale, runs, seed, fetch):
+    sys.path.insert(0, benchmarks_dir)
+    import synthetic
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tree = make_tree(tmp)
+        start = time.perf_counter()
+        counts = synthetic.generate(os.path.join(tree, "data"), scale, seed)
+        generate_seconds = time.perf_counter() - start
+
+        command = [sys.executable, os.path.abspath(__file__), "--worker", tree, "--runs", str(runs)]
+        with contextlib.ExitStack() as stack:
+            if fetch:
+                command += ["--base-url", stack.enter_context(standin(os.path.join(tree, "data")))]
+            result = subprocess.run(command, cwd=tree, capture_output=True, text=True)
+        if result.returncode:
+            sys.exit(f"scale {scale} failed:\n{result.stderr}")
+        report = json.loads(result.stdout.strip().splitlines()[-1])
+    report["generated"] = dict(counts, seconds=generate_seconds)
+    return report
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=repo_root, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], cwd=repo_root, capture_output=True, text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit + ("-dirty" if dirty else "")
+
+
+def compare(results, baseline):
+    """Print current vs baseline median per (scale, case)."""
+    print(f"\nvs {baseline.get('commit')} ({baseline.get('timestamp')}):")
+    for scale, report in results["scales"].items():
+        old_cases = baseline.get("scales", {}).get(scale, {}).get("cases", {})
+        for case, r in report["cases"].items():
+            old = old_cases.get(case)
+            if not old:
+                continue
+            ratio = r["median_seconds"] / old["median_seconds"] if old["median_seconds"] else float("nan")
+            print(f"  x{scale:<6} {case:<34} {old['median_seconds'] * 1000:10.1f} -> "
+                  f"{r['median_seconds'] * 1000:10.1f} ms  ({ratio:.2f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scales", type=float, nargs="+", default=[1, 10])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="results file (default benchmarks/results/suite-<commit>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--no-fetch", action="store_true", help="skip the fetch_data cases")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--base-url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        return run_worker(args.worker, args.runs, args.base_url)
+
+    commit = git_commit()
+    results = {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "runs": args.runs,
+        "scales": {},
+    }
+    for scale in args.scales:
+        label = f"{scale:g}"
+        report = bench_scale(scale, args.runs, args.seed, fetch=not args.no_fetch)
+        results["scales"][label] = report
+        print(f"x{label}: {report['rows']['housing']:,} housing / {report['rows']['attendance']:,} attendance rows")
+        for case, r in report["cases"].items():
+            print(f"  {case:<34} {r['median_seconds'] * 1000:10.1f} ms")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"suite-{commit or 'unknown'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Wrote {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,464 @@
+#!/usr/bin/env python
+"""
+Local stand-in for the Socrata resource API, with latency and failure injection.
+
+Serves the raw CSVs in a data directory (the shipped data/ by default)
+under the dataset ids data/fetch_data.py requests: each housing year's
+file without the school_year column fetch_data adds, and attendance as
+one dataset. Rows are JSON objects of strings with empty fields omitted,
+like Socrata's. Rows are loaded into memory at startup, so the directory
+can be rewritten by the fetch under test.
+
+Query parameters: $limit (default 1000), $offset, $select (columns, with
+optional AS aliases), $order (columns with ASC/DESC, or :id for file
+order; numeric values sort numerically), and $where (=, !=, <>, <, <=,
+>, >=, IN (...), LIKE, BETWEEN, IS [NOT] NULL, combined with AND/OR/NOT
+and parentheses). Responses carry X-SODA2-Fields and an ETag that is
+honoured via If-None-Match.
+
+Fault injection (all rates are per request, seeded): --latency adds a
+delay before each response, --bandwidth throttles the body, --error-rate
+answers 500/502/503, --throttle-rate answers 429 with Retry-After, and
+--truncate-rate sends only part of the body before closing the
+connection. GET /_standin/stats returns request and fault counters.
+
+Usage: python benchmarks/socrata_standin.py [--data-dir data] [--port 0]
+       [--latency 0.05] [--bandwidth 1000000] [--error-rate 0.05] ...
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, repo_root)
+
+from data.fetch_data import ATTENDANCE_DATASET, ATTENDANCE_FILE, HOUSING_DATASETS, HOUSING_FILES
+
+DEFAULT_LIMIT = 1000  # Socrata's page size when $limit is absent
+RESOURCE_PATH = re.compile(r"/resource/([\w-]+)\.json")
+STATS_PATH = "/_standin/stats"
+CHUNK_SIZE = 16 * 1024
+
+
+class Dataset:
+    """Rows of one dataset plus the column list and a content digest."""
+
+    def __init__(self, path, drop=()):
+        with open(path, newline="") as f:
+            reader = csv.DictReader(f)
+            self.fields = [name for name in reader.fieldnames if name not in drop]
+            self.rows = [
+                {k: v for k, v in row.items() if v != "" and k not in drop} for row in reader
+            ]
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        self.digest = digest.hexdigest()
+
+
+def load_datasets(data_dir):
+    """{dataset id: Dataset} for every file present in data_dir."""
+    sources = {dataset_id: (HOUSING_FILES[year], ("school_year",)) for year, dataset_id in HOUSING_DATASETS.items()}
+    sources[ATTENDANCE_DATASET] = (ATTENDANCE_FILE, ())
+    datasets = {}
+    for dataset_id, (filename, drop) in sources.items():
+        path = os.path.join(data_dir, filename)
+        if os.path.exists(path):
+            datasets[dataset_id] = Dataset(path, drop)
+    return datasets
+
+
+# --- SoQL subset -------------------------------------------------------------
+
+TOKEN = re.compile(r"""
+    \s*(?:
+        (?P<string>'(?:[^']|'')*')
+      | (?P<number>-?\d+(?:\.\d+)?)
+      | (?P<op><>|!=|<=|>=|=|<|>|\(|\)|,)
+      | (?P<word>:?\w+)
+    )""", re.VERBOSE)
+
+
+def tokenize(text):
+    tokens, pos = [], 0
+    text = text.strip()
+    while pos < len(text):
+        match = TOKEN.match(text, pos)
+        if not match or match.end() == pos:
+            raise ValueError(f"unexpected input at {text[pos:]!r}")
+        pos = match.end()
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == "string":
+            value = value[1:-1].replace("''", "'")
+        elif kind == "number":
+            value = float(value)
+        elif kind == "word" and value.upper() in ("AND", "OR", "NOT", "IN", "IS", "NULL", "LIKE", "BETWEEN"):
+            kind, value = "keyword", value.upper()
+        tokens.append((kind, value))
+    return tokens
+
+
+def as_number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def compare(op, value, literal):
+    """SQL-style comparison of a row's string value with a literal; NULL never matches."""
+    if value is None:
+        return False
+    if isinstance(literal, float):
+        value = as_number(value)
+        if value is None:
+            return False
+    return {
+        "=": value == literal, "!=": value != literal, "<>": value != literal,
+        "<": value < literal, "<=": value <= literal, ">": value > literal, ">=": value >= literal,
+    }[op]
+
+
+def like_pattern(pattern):
+    return re.compile("".join(".*" if c == "%" else "." if c == "_" else re.escape(c) for c in pattern), re.DOTALL)
+
+
+class WhereParser:
+    """Recursive-descent parser turning a $where clause into a row predicate."""
+
+    def __init__(self, text, columns):
+        self.tokens = tokenize(text)
+        self.columns = set(columns)
+        self.pos = 0
+
+    def parse(self):
+        predicate = self.or_expr()
+        if self.pos != len(self.tokens):
+            raise ValueError(f"unexpected {self.tokens[self.pos][1]!r} in $where")
+        return predicate
+
+    def peek(self, kind=None, value=None):
+        if self.pos >= len(self.tokens):
+            return False
+        k, v = self.tokens[self.pos]
+        return (kind is None or k == kind) and (value is None or v == value)
+
+    def take(self, kind=None, value=None):
+        if not self.peek(kind, value):
+            found = self.tokens[self.pos][1] if self.pos < len(self.tokens) else "end of clause"
+            raise ValueError(f"expected {value or kind} in $where, found {found!r}")
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token[1]
+
+    def or_expr(self):
+        terms = [self.and_expr()]
+        while self.peek("keyword", "OR"):
+            self.take()
+            terms.append(self.and_expr())
+        return terms[0] if len(terms) == 1 else lambda row: any(term(row) for term in terms)
+
+    def and_expr(self):
+        terms = [self.not_expr()]
+        while self.peek("keyword", "AND"):
+            self.take()
+            terms.append(self.not_expr())
+        return terms[0] if len(terms) == 1 else lambda row: all(term(row) for term in terms)
+
+    def not_expr(self):
+        if self.peek("keyword", "NOT"):
+            self.take()
+            inner = self.not_expr()
+            return lambda row: not inner(row)
+        if self.peek("op", "("):
+            self.take()
+            inner = self.or_expr()
+            self.take("op", ")")
+            return inner
+        return self.condition()
+
+    def literal(self):
+        if self.peek("string") or self.peek("number"):
+            return self.take()
+        return self.take("string")
+
+    def condition(self):
+        column = self.take("word")
+        if column not in self.columns:
+            raise ValueError(f"no such column: {column}")
+
+        if self.peek("keyword", "IS"):
+            self.take()
+            negate = self.peek("keyword", "NOT") and self.take()
+            self.take("keyword", "NULL")
+            return lambda row: (row.get(column) is None) != bool(negate)
+
+        negate = bool(self.peek("keyword", "NOT") and self.take())
+        if self.peek("keyword", "IN"):
+            self.take()
+            self.take("op", "(")
+            values = [self.literal()]
+            while self.peek("op", ","):
+                self.take()
+                values.append(self.literal())
+            self.take("op", ")")
+            test = lambda row: any(compare("=", row.get(column), v) for v in values)
+        elif self.peek("keyword", "LIKE"):
+            self.take()
+            pattern = like_pattern(self.take("string"))
+            test = lambda row: row.get(column) is not None and bool(pattern.fullmatch(row[column]))
+        elif self.peek("keyword", "BETWEEN"):
+            self.take()
+            low = self.literal()
+            self.take("keyword", "AND")
+            high = self.literal()
+            test = lambda row: compare(">=", row.get(column), low) and compare("<=", row.get(column), high)
+        else:
+            if negate:
+                raise ValueError("NOT must be followed by IN, LIKE or BETWEEN here")
+            op = self.take("op")
+            if op not in ("=", "!=", "<>", "<", "<=", ">", ">="):
+                raise ValueError(f"unsupported operator {op!r}")
+            value = self.literal()
+            return lambda row: compare(op, row.get(column), value)
+        return (lambda row: not test(row)) if negate else test
+
+
+def parse_select(select, columns):
+    """[(source column, output name)] for a $select list."""
+    out = []
+    for item in select.split(","):
+        parts = item.split()
+        if parts == ["*"]:
+            out.extend((col, col) for col in columns)
+            continue
+        if len(parts) == 3 and parts[1].upper() == "AS":
+            source, name = parts[0], parts[2]
+        elif len(parts) == 1:
+            source = name = parts[0]
+        else:
+            raise ValueError(f"unsupported $select item: {item.strip()!r}")
+        if source not in columns:
+            raise ValueError(f"no such column: {source}")
+        out.append((source, name))
+    return out
+
+
+def sort_key(value):
+    """Missing values last, then numbers (numerically), then text."""
+    if value is None:
+        return (2, 0.0, "")
+    number = as_number(value)
+    return (0, number, "") if number is not None else (1, 0.0, value)
+
+
+def apply_order(rows, order, columns):
+    keys = []
+    for item in order.split(","):
+        parts = item.split()
+        if not parts or len(parts) > 2 or (len(parts) == 2 and parts[1].upper() not in ("ASC", "DESC")):
+            raise ValueError(f"unsupported $order item: {item.strip()!r}")
+        if parts[0] != ":id" and parts[0] not in columns:
+            raise ValueError(f"no such column: {parts[0]}")
+        keys.append((parts[0], len(parts) == 2 and parts[1].upper() == "DESC"))
+    # Stable sorts from the last key to the first give a multi-key order
+    for column, descending in reversed(keys):
+        if column == ":id":
+            if descending:
+                rows = rows[::-1]
+            continue
+        rows = sorted(rows, key=lambda row: sort_key(row.get(column)), reverse=descending)
+    return rows
+
+
+def query(dataset, params):
+    """(rows, fields) for one request's $-parameters; raises ValueError on bad queries."""
+    rows = dataset.rows
+    if params.get("$where"):
+        predicate = WhereParser(params["$where"], dataset.fields).parse()
+        rows = [row for row in rows if predicate(row)]
+    if params.get("$order"):
+        rows = apply_order(rows, params["$order"], dataset.fields)
+    offset = int(params.get("$offset", 0))
+    limit = int(params.get("$limit", DEFAULT_LIMIT))
+    if offset < 0 or limit < 0:
+        raise ValueError("$offset and $limit must be non-negative")
+    rows = rows[offset:offset + limit]
+    fields = dataset.fields
+    if params.get("$select"):
+        selected = parse_select(params["$select"], dataset.fields)
+        rows = [{name: row[source] for source, name in selected if source in row} for row in rows]
+        fields = [name for _, name in selected]
+    return rows, fields
+
+
+# --- HTTP --------------------------------------------------------------------
+
+class Faults:
+    """Seeded per-request fault decisions plus counters, shared by handler threads."""
+
+    def __init__(self, latency=0.0, jitter=0.0, bandwidth=None, error_rate=0.0,
+                 throttle_rate=0.0, truncate_rate=0.0, retry_after=1, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.bandwidth = bandwidth
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.truncate_rate = truncate_rate
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counts = Counter()
+
+    def draw(self):
+        """
+        (fault, delay, error status) for the next request; fault is "error",
+        "throttle", "truncate" or None.
+        """
+        with self.lock:
+            roll = self.random.random()
+            delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0.0)
+            status = self.random.choice([500, 502, 503])
+        for fault, rate in (("error", self.error_rate), ("throttle", self.throttle_rate),
+                            ("truncate", self.truncate_rate)):
+            if roll < rate:
+                return fault, delay, status
+            roll -= rate
+        return None, delay, status
+
+    def count(self, *keys, n=1):
+        with self.lock:
+            for key in keys:
+                self.counts[key] += n
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        faults = self.server.faults
+        url = urlsplit(self.path)
+        if url.path == STATS_PATH:
+            with faults.lock:
+                counts = dict(faults.counts)
+            return self.send_json(200, counts)
+
+        faults.count("requests")
+        fault, delay, error_status = faults.draw()
+        if delay:
+            time.sleep(delay)
+        if fault == "error":
+            faults.count("injected_error")
+            return self.send_json(error_status, {"error": True, "message": "injected failure"})
+        if fault == "throttle":
+            faults.count("injected_429")
+            return self.send_json(429, {"error": True, "message": "injected throttle"},
+                                  {"Retry-After": str(faults.retry_after)})
+
+        match = RESOURCE_PATH.fullmatch(url.path)
+        dataset = match and self.server.datasets.get(match.group(1))
+        if not dataset:
+            return self.send_json(404, {"error": True, "message": "dataset not found"})
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+        etag = '"' + hashlib.sha256((dataset.digest + url.query).encode()).hexdigest()[:32] + '"'
+        if self.headers.get("If-None-Match") == etag:
+            faults.count("not_modified")
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        try:
+            rows, fields = query(dataset, params)
+        except ValueError as e:
+            return self.send_json(400, {"error": True, "message": str(e)})
+        headers = {"ETag": etag, "X-SODA2-Fields": json.dumps(fields)}
+        if fault == "truncate":
+            faults.count("injected_truncation")
+        self.send_json(200, rows, headers, truncate=fault == "truncate")
+
+    def send_json(self, status, payload, headers=None, truncate=False):
+        body = json.dumps(payload).encode("utf-8")
+        self.server.faults.count(f"status_{status}")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if truncate:
+            # Promise the whole body, send half, hang up
+            body = body[:len(body) // 2]
+            self.close_connection = True
+        self.write_body(body)
+
+    def write_body(self, body):
+        bandwidth = self.server.faults.bandwidth
+        if not bandwidth:
+            self.wfile.write(body)
+        else:
+            for start in range(0, len(body), CHUNK_SIZE):
+                chunk = body[start:start + CHUNK_SIZE]
+                self.wfile.write(chunk)
+                time.sleep(len(chunk) / bandwidth)
+        self.server.faults.count("bytes_sent", n=len(body))
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(data_dir, host="127.0.0.1", port=0, faults=None):
+    """A ThreadingHTTPServer serving data_dir's datasets (port 0 picks a free port)."""
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    server.datasets = load_datasets(data_dir)
+    server.faults = faults or Faults()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--data-dir", default=os.path.join(repo_root, "data"))
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0, help="0 picks a free port")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds before each response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random latency, up to this many seconds")
+    parser.add_argument("--bandwidth", type=float, help="body bytes per second per response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered 500/502/503")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="share of requests answered 429")
+    parser.add_argument("--truncate-rate", type=float, default=0.0, help="share of responses cut off mid-body")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds on 429")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    faults = Faults(
+        latency=args.latency, jitter=args.jitter, bandwidth=args.bandwidth,
+        error_rate=args.error_rate, throttle_rate=args.throttle_rate,
+        truncate_rate=args.truncate_rate, retry_after=args.retry_after, seed=args.seed,
+    )
+    server = make_server(args.data_dir, args.host, args.port, faults)
+    # First line of output is machine-readable so callers can find the port
+    print(f"Serving {len(server.datasets)} datasets on http://{args.host}:{server.server_port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
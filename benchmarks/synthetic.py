@@ -0,0 +1,218 @@
+#!/usr/bin/env python
+"""
+Synthetic NYC-schools data at any scale, for benchmarks.
+
+Writes the raw files shipped in data/ (per-year housing CSVs,
+housing_all_years.csv, attendance.csv, attendance_all_years.csv) with
+their columns and value formats: every column of both raw datasets, as an
+--all-columns pull writes them, so the Socrata stand-in can serve them to
+a default refresh. DBNs carry a real district and borough letter (the
+school number grows past 3 digits beyond 999 schools per district),
+housing percentages are "12.3%" strings and any count of 5 or fewer is
+"s" (the whole breakdown when the temporary-housing count is that small).
+Each school keeps its enrollment, borough-dependent temporary-housing
+rate and absenteeism across years, with year-to-year noise, so joins,
+aggregates and trend fits behave like the real data. Scale 1 is about
+1,750 schools per year.
+
+Usage: python benchmarks/synthetic.py OUT_DIR [--scale 10] [--seed 0]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, repo_root)
+
+import numpy as np
+import pandas as pd
+
+from data import snapshot
+from data.compact import compact_frames
+from data.fetch_data import (
+    ATTENDANCE_FILE,
+    ATTENDANCE_YEARS,
+    HOUSING_COLUMNS,
+    HOUSING_FILES,
+)
+from data.gap import gap_join, year_frames
+
+SCHOOLS_PER_SCALE = 1750
+YEARS = ["2017-18", "2018-19", "2019-20", "2020-21"]
+SUPPRESS_AT_OR_BELOW = 5
+
+# Every column of the raw attendance dataset, in its order; a superset of
+# fetch_data's ATTENDANCE_COLUMNS projection and ATTENDANCE_FILTERS columns
+ATTENDANCE_RAW_COLUMNS = [
+    "dbn", "school_name", "grade", "category", "year", "total_days", "days_absent",
+    "days_present", "attendance", "contributing_10_total_days", "chronically_absent",
+    "chronically_absent_1",
+]
+
+# Community school districts per borough letter, with each borough's share of schools
+BOROUGH_DISTRICTS = {
+    "M": list(range(1, 7)),
+    "X": list(range(7, 13)),
+    "K": list(range(13, 24)) + [32],
+    "Q": list(range(24, 31)),
+    "R": [31],
+}
+BOROUGH_SHARE = {"M": 0.19, "X": 0.23, "K": 0.30, "Q": 0.23, "R": 0.05}
+# Mean share of students in temporary housing, by borough
+BOROUGH_TEMP_RATE = {"M": 0.11, "X": 0.16, "K": 0.12, "Q": 0.07, "R": 0.05}
+
+SCHOOL_TYPES = np.array(["P.S.", "I.S.", "M.S.", "J.H.S.", "High School for", "Academy of"])
+NAME_WORDS = np.array([
+    "Roberto Clemente", "Asher Levy", "Lillian Wald", "Urban Studies", "Science",
+    "the Arts", "Community Leadership", "Global Citizenship", "Technology", "Excellence",
+])
+PRESENT_EACH_YEAR = 0.97      # chance a school reports housing in a given year
+ATTENDANCE_COVERAGE = 0.90    # chance a reporting school also has attendance
+
+
+def make_schools(n, rng):
+    """One row per school: dbn, name, borough and persistent traits."""
+    boroughs = np.array(list(BOROUGH_SHARE))
+    borough = rng.choice(boroughs, n, p=list(BOROUGH_SHARE.values()))
+    district = np.empty(n, dtype="int64")
+    for letter, districts in BOROUGH_DISTRICTS.items():
+        mask = borough == letter
+        district[mask] = rng.choice(districts, mask.sum())
+    schools = pd.DataFrame({"borough": borough, "district": district})
+    number = schools.groupby(["district", "borough"]).cumcount().to_numpy() + 1
+    schools["dbn"] = (
+        pd.Series(district).map("{:02d}".format) + schools["borough"]
+        + pd.Series(number).map("{:03d}".format)
+    )
+    schools["school_name"] = (
+        pd.Series(SCHOOL_TYPES[rng.integers(0, len(SCHOOL_TYPES), n)]) + " "
+        + pd.Series(number).astype(str) + " "
+        + pd.Series(NAME_WORDS[rng.integers(0, len(NAME_WORDS), n)])
+    )
+    schools["enrollment"] = np.clip(rng.lognormal(6.2, 0.6, n), 10, 7000)
+    mean_rate = schools["borough"].map(BOROUGH_TEMP_RATE).to_numpy()
+    schools["temp_rate"] = rng.beta(2.0, 2.0 / mean_rate - 2.0)
+    schools["absent_pct"] = np.clip(15 + 70 * schools["temp_rate"] + rng.normal(0, 12, n), 0.5, 95)
+    return schools
+
+
+def suppressed(counts):
+    """Count strings with small cells replaced by "s"."""
+    counts = np.asarray(counts)
+    return np.where(counts <= SUPPRESS_AT_OR_BELOW, "s", counts.astype(str))
+
+
+def housing_year(schools, year, rng):
+    """Raw housing rows for one school year, in HOUSING_COLUMNS + school_year order."""
+    rows = schools[rng.random(len(schools)) < PRESENT_EACH_YEAR]
+    n = len(rows)
+    total = np.maximum(2, np.round(rows["enrollment"].to_numpy() * rng.lognormal(0, 0.05, n))).astype("int64")
+    rate = np.clip(rows["temp_rate"].to_numpy() * rng.lognormal(0, 0.1, n), 0, 1)
+    temp = rng.binomial(total, rate)
+    shelter = rng.binomial(temp, 0.3)
+    dhs = rng.binomial(shelter, 0.75)
+    pct = np.round(100 * temp / total, 1)
+
+    small = temp <= SUPPRESS_AT_OR_BELOW
+    out = pd.DataFrame({
+        "dbn": rows["dbn"].to_numpy(),
+        "school_name": rows["school_name"].to_numpy(),
+        "total_students": total.astype(str),
+        "students_in_temporary_housing": suppressed(temp),
+        "students_in_temporary_housing_1": np.where(small, "s", np.char.add(pct.astype(str), "%")),
+        "students_residing_in_shelter": suppressed(shelter),
+        "residing_in_dhs_shelter": suppressed(dhs),
+        "residing_in_non_dhs_shelter": suppressed(shelter - dhs),
+        "doubled_up": suppressed(temp - shelter),
+    })
+    out.loc[small, HOUSING_COLUMNS[3:]] = "s"
+    out["school_year"] = year
+    return out[HOUSING_COLUMNS + ["school_year"]], rows
+
+
+def attendance_year(reporting, year, rng):
+    """Whole-school attendance rows for the schools reporting housing in a year."""
+    rows = reporting[rng.random(len(reporting)) < ATTENDANCE_COVERAGE]
+    n = len(rows)
+    enrolled = np.maximum(11, np.round(rows["enrollment"].to_numpy() * rng.lognormal(0, 0.05, n))).astype("int64")
+    chronic_pct = np.clip(rows["absent_pct"].to_numpy() + rng.normal(0, 4, n), 0, 97)
+    chronic = np.round(enrolled * chronic_pct / 100).astype("int64")
+    attendance = np.clip(97.5 - 0.2 * chronic_pct + rng.normal(0, 1.0, n), 45, 99.8)
+    total_days = np.round(enrolled * rng.uniform(120, 180, n)).astype("int64")
+    days_present = np.round(total_days * attendance / 100).astype("int64")
+    out = pd.DataFrame({
+        "dbn": rows["dbn"].to_numpy(),
+        "school_name": rows["school_name"].to_numpy(),
+        "grade": "All Grades",
+        "category": "All Students",
+        "year": year,
+        "total_days": total_days,
+        "days_absent": total_days - days_present,
+        "days_present": days_present,
+        "attendance": np.round(attendance, 1),
+        "contributing_10_total_days": enrolled,
+        "chronically_absent": chronic,
+        "chronically_absent_1": np.round(100 * chronic / enrolled, 1),
+    })
+    return out[ATTENDANCE_RAW_COLUMNS]
+
+
+def generate(out_dir, scale=1, seed=0):
+    """Write every raw CSV for `scale` x the real school count into out_dir. Returns row counts."""
+    rng = np.random.default_rng(seed)
+    os.makedirs(out_dir, exist_ok=True)
+    schools = make_schools(int(SCHOOLS_PER_SCALE * scale), rng)
+
+    housing, attendance = {}, {}
+    for year in YEARS:
+        housing[year], reporting = housing_year(schools, year, rng)
+        attendance[year] = attendance_year(reporting, year, rng)
+
+    def write(frame, filename):
+        frame.to_csv(os.path.join(out_dir, filename), index=False)
+
+    for year, filename in HOUSING_FILES.items():
+        write(housing[year], filename)
+    all_housing = pd.concat([housing[year] for year in YEARS], ignore_index=True)
+    write(all_housing, "housing_all_years.csv")
+    all_attendance = pd.concat([attendance[year] for year in ATTENDANCE_YEARS], ignore_index=True)
+    write(attendance["2020-21"], "attendance.csv")
+    write(all_attendance, ATTENDANCE_FILE)
+    return {"schools": len(schools), "housing_rows": len(all_housing), "attendance_rows": len(all_attendance)}
+
+
+def frames(scale=1, seed=0):
+    """
+    Cleaned, compacted (attendance, housing) for data generated at `scale`,
+    loaded the way the dashboard loads the raw CSVs.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        generate(tmp, scale, seed)
+        paths = {
+            "housing": os.path.join(tmp, snapshot.HOUSING_SOURCE),
+            "attendance": os.path.join(tmp, snapshot.ATTENDANCE_SOURCES[0]),
+        }
+        return compact_frames(*snapshot.read_csv_frames(paths))
+
+
+def gap_years(housing, attendance):
+    """{year: (gap_df, scatter_df)} for every school year, through the dashboard's (dbn, year) join."""
+    joined, _ = gap_join().update(housing, attendance)
+    return {year: year_frames(frame) for year, frame in sorted(joined.items())}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("out_dir")
+    parser.add_argument("--scale", type=float, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    counts = generate(args.out_dir, args.scale, args.seed)
+    print(f"Wrote {counts['housing_rows']:,} housing and {counts['attendance_rows']:,} attendance rows"
+          f" ({counts['schools']:,} schools) to {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
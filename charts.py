@@ -0,0 +1,236 @@
+"""
+Plotly helpers shared by the dashboard and its benchmarks.
+
+Plotly is imported on first use (profiling.lazy_import), so a session that
+only opens one tab never pays for figure code it doesn't draw, and the
+import cost shows up in the cold-start profile.
+"""
+
+import numpy as np
+
+from data.regression import predict
+from profiling import lazy_import
+
+
+def borough_bar(borough_data, school_year):
+    """The Scale: students in temporary housing per borough."""
+    px = lazy_import("plotly.express")
+    return px.bar(
+        borough_data,
+        x='borough', y='total_temp_housing',
+        color='borough',
+        title=f'Students in Temporary Housing by Borough ({school_year})',
+        labels={'total_temp_housing': 'Total Students', 'borough': 'Borough'}
+    )
+
+
+def gap_scatter(scatter_df, fits, school_year):
+    """The Gap: % temporary housing vs % chronically absent, with trendlines."""
+    px = lazy_import("plotly.express")
+    fig = px.scatter(
+        scatter_df,
+        x='pct_students_temp_housing',
+        y='pct_chronically_absent',
+        color='borough',
+        size='total_enrollment',
+        hover_data=['school_name_housing', 'dbn'],
+        title=f'Housing Instability vs Chronic Absenteeism ({school_year})',
+        labels={
+            'pct_students_temp_housing': '% Students in Temporary Housing',
+            'pct_chronically_absent': '% Chronically Absent'
+        },
+        opacity=0.6
+    )
+    return add_trendlines(fig, fits)
+
+
+def gap_scatter_gl(points, fits, color, title, max_marker=18):
+    """
+    The Gap across several years as a WebGL scatter (one Scattergl trace per
+    `color` value), for point sets too large for SVG. `points` is usually a
+    data.sampling.density_sample(); when it is downsampled the hover also
+    shows roughly how many schools each point stands for. Hover is not
+    full-resolution: it only knows the sampled rows sent to the browser, so
+    it names the sampled school, not every school under the cursor (the
+    dashboard lists those for a click or box selection, through
+    data.sampling.rows_for_selection). Coordinates are sent as float32 to
+    keep the payload small.
+    """
+    go = lazy_import("plotly.graph_objects")
+    px = lazy_import("plotly.express")
+    palette = px.colors.qualitative.Plotly
+    sampled = bool(len(points)) and points["weight"].max() > 1
+    hover = (
+        "%{customdata[0]}<br>%{customdata[1]} · %{customdata[2]}"
+        "<br>% temp housing: %{x:.1f}<br>% chronically absent: %{y:.1f}"
+    )
+    if sampled:
+        hover += "<br>≈%{customdata[3]:.0f} schools in this area"
+    sizeref = 2.0 * float(points["total_enrollment"].max() or 1) / max_marker**2 if len(points) else 1
+
+    fig = go.Figure()
+    for i, (value, rows) in enumerate(points.groupby(color, sort=True)):
+        customdata = np.column_stack([
+            rows["school_name_housing"].astype(str).to_numpy(),
+            rows["dbn"].to_numpy(),
+            rows["school_year"].to_numpy(),
+            rows["weight"].round(1).to_numpy(),
+        ])
+        fig.add_trace(go.Scattergl(
+            x=rows["pct_students_temp_housing"].to_numpy(dtype="float32"),
+            y=rows["pct_chronically_absent"].to_numpy(dtype="float32"),
+            mode="markers", name=str(value),
+            marker=dict(
+                color=palette[i % len(palette)], opacity=0.6,
+                size=rows["total_enrollment"].to_numpy(dtype="float32"),
+                sizemode="area", sizeref=sizeref, sizemin=2,
+            ),
+            customdata=customdata,
+            hovertemplate=hover + "<extra>%{fullData.name}</extra>",
+        ))
+    fig.update_layout(
+        title=title, legend_title_text=color.replace("_", " ").title(),
+        xaxis_title="% Students in Temporary Housing", yaxis_title="% Chronically Absent",
+    )
+    return add_trendlines(fig, fits)
+
+
+def shelter_bar(shelter_melted, school_year):
+    """The Invisible Majority: housing type breakdown stacked per borough."""
+    px = lazy_import("plotly.express")
+    return px.bar(
+        shelter_melted, x='borough', y='Students',
+        color='Housing Type', barmode='stack',
+        title=f'Housing Type Breakdown by Borough ({school_year})'
+    )
+
+
+def district_bar(districts, borough, school_year):
+    """The Scale drill-down: enrollment-weighted % temporary housing per district of one borough."""
+    px = lazy_import("plotly.express")
+    return px.bar(
+        districts, x='name', y='housing_pct',
+        color='absent_pct', color_continuous_scale='OrRd',
+        hover_data={'key': True, 'schools': ':,.0f', 'temp_housing': ':,.0f', 'absent_pct': ':.1f'},
+        title=f'Students in Temporary Housing by District, {borough} ({school_year})',
+        labels={
+            'name': 'District', 'housing_pct': '% Temp Housing', 'absent_pct': '% Chronically Absent',
+            'key': 'DBN prefix', 'schools': 'Schools', 'temp_housing': 'Students in Temp Housing',
+        },
+    )
+
+
+def area_trends(years, trends, metric, label, highlight=None):
+    """Trends: one line per borough (plus Citywide) for one panel measure."""
+    go = lazy_import("plotly.graph_objects")
+    fig = go.Figure()
+    for area, values in trends.items():
+        fig.add_trace(go.Scatter(
+            x=years, y=values, mode="lines+markers", name=area,
+            line=dict(width=4 if area == highlight else 2, dash="dash" if area == "Citywide" else None),
+            hovertemplate=f"{area}<br>%{{x}}: %{{y:.1f}}<extra></extra>",
+        ))
+    fig.update_layout(title=f"{label} by Borough, {years[0]} to {years[-1]}", yaxis_title=label, xaxis_type="category")
+    return fig
+
+
+def school_trend(years, school, area, area_trend):
+    """Trends: one school's % temp housing and % chronically absent against its area's."""
+    go = lazy_import("plotly.graph_objects")
+    px = lazy_import("plotly.express")
+    palette = px.colors.qualitative.Plotly
+    fig = go.Figure()
+    for i, (name, label) in enumerate([("housing_pct", "% Temp Housing"), ("absent_pct", "% Chronically Absent")]):
+        fig.add_trace(go.Scatter(
+            x=years, y=school[name], mode="lines+markers", name=label,
+            line=dict(color=palette[i]), connectgaps=False,
+        ))
+        fig.add_trace(go.Scatter(
+            x=years, y=area_trend[name], mode="lines", name=f"{label} ({area})",
+            line=dict(color=palette[i], dash="dot"),
+        ))
+    fig.update_layout(
+        title=f"{school['school_name']} ({school['dbn']}) vs {area}",
+        yaxis_title="% of students", xaxis_type="category",
+    )
+    return fig
+
+
+def highlight_school(fig, rows, label):
+    """
+    A copy of a Gap scatter with one school's rows (one per year shown) drawn
+    on top as large outlined stars. Copies, so a cached figure stays as is.
+    """
+    go = lazy_import("plotly.graph_objects")
+    fig = go.Figure(fig)
+    fig.add_trace(go.Scatter(
+        x=rows["pct_students_temp_housing"], y=rows["pct_chronically_absent"], mode="markers+text",
+        text=rows["school_year"].astype(str) if len(rows) > 1 else None, textposition="top center",
+        marker=dict(symbol="star", size=20, color="gold", line=dict(color="black", width=2)),
+        name=label, hovertemplate=f"{label}<br>%{{x:.1f}}% temp housing, %{{y:.1f}}% chronically absent<extra></extra>",
+    ))
+    return fig
+
+
+def peer_scatter(peers, school, label):
+    """Peers: the peer schools' % temp housing vs % chronically absent, outliers marked, the school starred."""
+    px = lazy_import("plotly.express")
+    fig = px.scatter(
+        peers.assign(group=peers["outlier"].map({True: "Outlier", False: "Peer"})),
+        x='pct_students_temp_housing', y='pct_chronically_absent',
+        color='group', size='total_students',
+        color_discrete_map={"Peer": "#636EFA", "Outlier": "#EF553B"},
+        hover_data=['school_name_housing', 'dbn', 'school_year'],
+        title=f'Peers of {label}',
+        labels={
+            'pct_students_temp_housing': '% Students in Temporary Housing',
+            'pct_chronically_absent': '% Chronically Absent',
+            'group': '',
+        },
+        opacity=0.7
+    )
+    return highlight_school(fig, school, label)
+
+
+def figure_nbytes(fig):
+    """Size of a figure's JSON spec (what st.plotly_chart sends), for the figure cache's byte cap."""
+    pio = lazy_import("plotly.io")
+    return len(pio.to_json(fig, validate=False))
+
+
+def add_trendlines(fig, fits):
+    """
+    Overlay data.regression.fit_groups() results on a px.scatter coloured by
+    borough: one line per borough in its scatter colour, plus the overall
+    trend and its confidence band. Replaces px.scatter(trendline="ols").
+    """
+    go = lazy_import("plotly.graph_objects")
+    colors = {trace.name: trace.marker.color for trace in fig.data}
+    for borough, fit in fits["groups"].items():
+        xs = [fit["x_min"], fit["x_max"]]
+        fig.add_trace(go.Scatter(
+            x=xs, y=predict(fit, xs), mode="lines",
+            line=dict(color=colors.get(borough)),
+            name=f"{borough} trend", legendgroup=borough, showlegend=False,
+            hovertemplate=(
+                f"{borough} OLS trendline<br>y = {fit['slope']:.3f}x + {fit['intercept']:.3f}"
+                f"<br>R²={fit['r2']:.4f}<extra></extra>"
+            ),
+        ))
+    band, overall = fits["band"], fits["overall"]
+    if band is not None:
+        fig.add_trace(go.Scatter(
+            x=list(band["x"]) + list(band["x"][::-1]),
+            y=list(band["upper"]) + list(band["lower"][::-1]),
+            fill="toself", fillcolor="rgba(0,0,0,0.12)", line=dict(width=0),
+            name=f"{band['level']:.0%} CI", hoverinfo="skip",
+        ))
+        fig.add_trace(go.Scatter(
+            x=band["x"], y=band["y"], mode="lines",
+            line=dict(color="black", dash="dash"), name="Overall trend",
+            hovertemplate=(
+                f"Overall OLS trendline<br>y = {overall['slope']:.3f}x + {overall['intercept']:.3f}"
+                f"<br>R²={overall['r2']:.4f}<extra></extra>"
+            ),
+        ))
+    return fig
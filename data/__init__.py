@@ -0,0 +1 @@
+"""Data acquisition, cleaning and storage for The Absenteeism Gap dashboard."""
@@ -0,0 +1,109 @@
+"""
+Precomputed aggregate cube for the dashboard's per-year views.
+
+build_cube() runs one groupby over every (school_year, borough) of the
+cleaned housing frame and splits the result into the finished tables each
+tab shows: borough totals ("The Scale"), the melted shelter breakdown and
+top-20 table ("The Invisible Majority"), and the summary metrics. Switching
+years is then a dict lookup instead of a scan over school rows.
+"""
+
+import numpy as np
+
+from data.cleaning import HOUSING_SUPPRESSIBLE_COLS
+from data.numeric import is_suppressed
+
+PCT_COL = "students_in_temporary_housing_1"
+COUNT_COL = "students_in_temporary_housing"
+# Summed per cell as float64: the compact frames hold them as float32, whose
+# sums drift (percentage sums by 0.025 at 100x) and stop being exact past 2**24
+SUM_COLS = [COUNT_COL, PCT_COL, "doubled_up", "residing_in_dhs_shelter", "residing_in_non_dhs_shelter"]
+
+SHELTER_LABELS = {
+    "doubled_up": "Doubled Up",
+    "dhs_shelter": "DHS Shelter",
+    "non_dhs_shelter": "Non-DHS Shelter",
+}
+
+TOP20_COLUMNS = {
+    "school_name": "School",
+    "borough": "Borough",
+    PCT_COL: "% Temp Housing",
+    "students_in_temporary_housing": "Students in Temp Housing",
+    "total_students": "Enrollment",
+}
+
+
+def suppressed_counts(housing):
+    """
+    Rows whose temporary-housing count was suppressed ("s", 5 or fewer
+    students), from the snapshot's "suppressed" bit column (0 without it).
+    """
+    if "suppressed" not in housing.columns:
+        return np.zeros(len(housing), dtype="int64")
+    return is_suppressed(housing["suppressed"], HOUSING_SUPPRESSIBLE_COLS.index(COUNT_COL)).astype("int64")
+
+
+def borough_cube(housing):
+    """Additive measures per (school_year, borough), one groupby over all years."""
+    housing = housing.assign(
+        suppressed_count=suppressed_counts(housing),
+        **{col: housing[col].astype("float64") for col in SUM_COLS},
+    )
+    return housing.groupby(["school_year", "borough"]).agg(
+        n_rows=("dbn", "size"),
+        total_schools=("dbn", "count"),
+        total_temp_housing=(COUNT_COL, "sum"),
+        suppressed_schools=("suppressed_count", "sum"),
+        pct_sum=(PCT_COL, "sum"),
+        pct_count=(PCT_COL, "count"),
+        doubled_up=("doubled_up", "sum"),
+        dhs_shelter=("residing_in_dhs_shelter", "sum"),
+        non_dhs_shelter=("residing_in_non_dhs_shelter", "sum"),
+    )
+
+
+def year_views(cells, year_rows):
+    """Finished tables for one school year from its cube cells and school rows."""
+    cells = cells.reset_index()
+
+    borough = cells[["borough", "total_temp_housing", "total_schools"]].copy()
+    borough["avg_pct"] = cells["pct_sum"] / cells["pct_count"].where(cells["pct_count"] > 0)
+    borough = borough.sort_values("total_temp_housing", ascending=False)
+
+    shelter = cells[["borough", *SHELTER_LABELS]].melt(
+        id_vars="borough",
+        value_vars=list(SHELTER_LABELS),
+        var_name="Housing Type", value_name="Students",
+    )
+    shelter["Housing Type"] = shelter["Housing Type"].map(SHELTER_LABELS)
+
+    top20 = year_rows.nlargest(20, PCT_COL)[list(TOP20_COLUMNS)].reset_index(drop=True)
+    top20.index = top20.index + 1  # 1-indexed
+    top20.columns = list(TOP20_COLUMNS.values())
+
+    pct_count = cells["pct_count"].sum()
+    summary = {
+        "total_schools": int(cells["n_rows"].sum()),
+        "total_temp_housing": float(cells["total_temp_housing"].sum()),
+        "suppressed_schools": int(cells["suppressed_schools"].sum()),
+        "avg_pct": float(cells["pct_sum"].sum() / pct_count) if pct_count else float("nan"),
+    }
+    return {"borough": borough, "shelter": shelter, "top20": top20, "summary": summary}
+
+
+def build_cube(housing):
+    """
+    Build {"cells": borough cube, "years": {school_year: views}} from cleaned housing.
+
+    Each year's views hold the borough table, melted shelter table, top-20
+    table and summary metrics, ready to hand to Plotly/Streamlit.
+    """
+    cells = borough_cube(housing)
+    rows_by_year = dict(tuple(housing.groupby("school_year")))
+    years = {
+        year: year_views(cells.xs(year, level="school_year"), rows_by_year[year])
+        for year in cells.index.get_level_values("school_year").unique()
+    }
+    return {"cells": cells, "years": years}
+
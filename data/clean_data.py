@@ -1,224 +1,173 @@
 #!/usr/bin/env python3
 """
-Data Cleaning and Merge Pipeline (Pure Python - no pandas)
-Task 3: Clean housing and attendance data, derive borough, merge on dbn
+Data Cleaning and Merge Pipeline
+Clean housing and attendance data for every school year, derive borough,
+and inner-join on (dbn, school_year) into merged.csv.
+
+Cleaning is done in vectorized column passes with the rules snapshot.py
+also uses (data/cleaning.py), and the join is a single
+(dbn, year) hash join over all years on normalized DBNs (data/join.py),
+so the cost grows linearly with row count instead of paying per-cell
+Python calls. The join reports unmatched and duplicate keys per year, and
+merged.csv is checked by data/validate.py before the script exits.
 """
 
-import csv
-import json
+import os
+import sys
+import time
+
+data_dir = os.path.dirname(os.path.abspath(__file__))
+
+# Allow `python data/clean_data.py` to import the data package
+if __package__ in (None, ""):
+    sys.path.insert(0, os.path.dirname(data_dir))
+
+from data import cleaning
+from data.cleaning import read_csv
+from data.join import join_years
+from data.validate import print_report, validate_outputs
+
+# Multi-year inputs, with the 2020-21 files as a fallback
+HOUSING_SOURCES = ['housing_all_years.csv', 'housing.csv']
+ATTENDANCE_SOURCES = ['attendance_all_years.csv', 'attendance.csv']
 
-# Borough mapping based on dbn[2]
-BOROUGH_MAP = {
-    'M': 'Manhattan',
-    'X': 'Bronx', 
-    'K': 'Brooklyn',
-    'Q': 'Queens',
-    'R': 'Staten Island'
+HOUSING_COL_MAP = {
+    'total_students': 'total_enrollment',
+    'students_in_temporary_housing': 'n_students_temp_housing',
+    'students_in_temporary_housing_1': 'pct_students_temp_housing',
+    'students_residing_in_shelter': 'n_students_in_shelter',
+    'residing_in_dhs_shelter': 'n_dhs_shelter',
+    'residing_in_non_dhs_shelter': 'n_non_dhs_shelter',
+    'doubled_up': 'n_doubled_up'
 }
 
+ATTENDANCE_COL_MAP = {
+    'chronically_absent_1': 'pct_chronically_absent',
+    'chronically_absent': 'n_chronically_absent',
+    'contributing_10_total_days': 'n_contributing_students'
+}
+
+# Rows missing any of these are dropped after the merge
+KEY_COLS = ['pct_students_temp_housing', 'pct_chronically_absent',
+            'n_students_temp_housing', 'total_enrollment']
+
+
+def load_csv(filename):
+    """Load a raw CSV from data_dir."""
+    return read_csv(os.path.join(data_dir, filename))
+
+
+def first_existing(filenames):
+    """First filename in data_dir that exists."""
+    for filename in filenames:
+        if os.path.exists(os.path.join(data_dir, filename)):
+            return filename
+    raise FileNotFoundError(f"None of {filenames} found in {data_dir}")
+
+
+def merged_names(frame, col_map):
+    """Apply merged.csv's column names; renamed columns go last, matching the original row-by-row pipeline's order."""
+    renamed = [col for col in col_map if col in frame.columns]
+    frame = frame[[c for c in frame.columns if c not in renamed] + renamed]
+    return frame.rename(columns=col_map)
+
+
+def clean_housing(housing):
+    """data.cleaning.clean_housing() on a copy, with merged.csv's column names."""
+    housing = cleaning.clean_housing(housing.copy()).drop(columns='suppressed')
+    return merged_names(housing, HOUSING_COL_MAP)
+
+
+def clean_attendance(attendance):
+    """
+    data.cleaning.clean_attendance() on a copy, with merged.csv's column
+    names (total_enrollment is already there as n_contributing_students).
+    """
+    attendance = cleaning.clean_attendance(attendance.copy()).drop(columns='total_enrollment')
+    return merged_names(attendance, ATTENDANCE_COL_MAP)
+
 
-def clean_pct(value):
+def merge_years(housing, attendance):
     """
-    Universal percentage cleaner that handles:
-    - "30.7%" format (with percent sign)
-    - "42.2" format (without percent sign)
-    - "s" (suppressed values) → empty string (will be filtered later)
-    - Already numeric values
-    
-    Returns string representation of float or empty string for invalid
+    Inner-join cleaned housing and attendance on (dbn, school_year) for all years.
+
+    Attendance rows are de-duplicated per (dbn, year) keeping the last one,
+    the same rule the old per-dbn lookup dict applied within a single year.
+    Returns (merged, diagnostics); see data.join.join_years.
     """
-    if not value or str(value).strip() == '':
-        return ''
-    
-    # Convert to string for processing
-    s = str(value).strip()
-    
-    # Handle suppressed values
-    if s.lower() == 's':
-        return ''
-    
-    # Remove % sign if present
-    s = s.replace('%', '')
-    
-    # Convert to float and back to string
-    try:
-        return str(float(s))
-    except (ValueError, TypeError):
-        return ''
-
-
-def derive_borough(dbn):
-    """Extract borough from dbn[2] character"""
-    if not dbn or len(str(dbn)) < 3:
-        return 'Citywide'
-    
-    borough_code = str(dbn)[2]
-    return BOROUGH_MAP.get(borough_code, 'Citywide')
-
-
-def load_csv(filepath):
-    """Load CSV file as list of dicts"""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        return list(reader)
+    attendance = attendance.rename(columns={
+        'school_name': 'school_name_attendance',
+        'borough': 'borough_attendance',
+    })
+    housing = housing.rename(columns={
+        'school_name': 'school_name_housing',
+        'borough': 'borough_housing',
+    })
+    merged, diagnostics = join_years(
+        housing, attendance, left_on=('dbn', 'school_year'), right_on=('dbn', 'year'),
+    )
+    merged = merged.dropna(subset=[col for col in KEY_COLS if col in merged.columns])
+    return merged, diagnostics
+
+
+def print_diagnostics(diagnostics):
+    """Per-year join report: rows per side, unmatched/duplicate keys, rewritten DBNs."""
+    print(f"Join: {diagnostics['joined_rows']} rows ({diagnostics['cardinality']}) "
+          f"in {diagnostics['seconds'] * 1000:.1f} ms")
+    for year, d in diagnostics['years'].items():
+        print(f"  {year}: housing {d['left_rows']}, attendance {d['right_rows']}, joined {d['joined_rows']}; "
+              f"unmatched {d['unmatched_left']}/{d['unmatched_right']}, "
+              f"duplicate {d['duplicate_left']}/{d['duplicate_right']}, "
+              f"DBNs normalized {d['normalized_left']}/{d['normalized_right']}")
 
 
 def main():
+    start = time.perf_counter()
     print("Loading data files...")
-    
-    # Load raw CSVs
-    housing = load_csv('data/housing.csv')
-    attendance = load_csv('data/attendance.csv')
-    
-    print(f"Housing: {len(housing)} rows")
-    print(f"Attendance: {len(attendance)} rows")
-    
-    # Clean housing numeric columns
-    print("\nCleaning housing data...")
-    housing_numeric_cols = [
-        'total_students',
-        'students_in_temporary_housing', 
-        'students_in_temporary_housing_1',  # This has %
-        'students_residing_in_shelter',
-        'residing_in_dhs_shelter',
-        'residing_in_non_dhs_shelter',
-        'doubled_up'
-    ]
-    
-    for row in housing:
-        for col in housing_numeric_cols:
-            if col in row:
-                row[col] = clean_pct(row[col])
-        row['borough'] = derive_borough(row.get('dbn', ''))
-    
-    # Rename housing columns
-    housing_col_map = {
-        'total_students': 'total_enrollment',
-        'students_in_temporary_housing': 'n_students_temp_housing',
-        'students_in_temporary_housing_1': 'pct_students_temp_housing',
-        'students_residing_in_shelter': 'n_students_in_shelter',
-        'residing_in_dhs_shelter': 'n_dhs_shelter',
-        'residing_in_non_dhs_shelter': 'n_non_dhs_shelter',
-        'doubled_up': 'n_doubled_up'
-    }
-    
-    for row in housing:
-        for old_col, new_col in housing_col_map.items():
-            if old_col in row:
-                row[new_col] = row.pop(old_col)
-    
-    # Clean attendance numeric columns
-    print("Cleaning attendance data...")
-    attendance_numeric_cols = [
-        'chronically_absent_1',  # No % sign
-        'attendance',
-        'total_days',
-        'days_absent',
-        'days_present',
-        'chronically_absent',
-        'contributing_10_total_days'
-    ]
-    
-    for row in attendance:
-        for col in attendance_numeric_cols:
-            if col in row:
-                row[col] = clean_pct(row[col])
-        row['borough'] = derive_borough(row.get('dbn', ''))
-    
-    # Rename attendance columns
-    attendance_col_map = {
-        'chronically_absent_1': 'pct_chronically_absent',
-        'chronically_absent': 'n_chronically_absent',
-        'contributing_10_total_days': 'n_contributing_students'
-    }
-    
-    for row in attendance:
-        for old_col, new_col in attendance_col_map.items():
-            if old_col in row:
-                row[new_col] = row.pop(old_col)
-    
-    # Create index for attendance by dbn for faster lookup
-    print("\nMerging datasets on dbn (inner join)...")
-    attendance_by_dbn = {}
-    for row in attendance:
-        dbn = row.get('dbn', '')
-        if dbn:
-            attendance_by_dbn[dbn] = row
-    
-    # Inner join: iterate housing, lookup attendance
-    merged = []
-    for h_row in housing:
-        dbn = h_row.get('dbn', '')
-        if dbn in attendance_by_dbn:
-            a_row = attendance_by_dbn[dbn]
-            
-            # Merge rows with suffixes
-            merged_row = {}
-            
-            # Add housing columns with _housing suffix (except dbn)
-            for key, value in h_row.items():
-                if key == 'dbn':
-                    merged_row['dbn'] = value
-                elif key in ['school_name', 'borough']:
-                    merged_row[f'{key}_housing'] = value
-                else:
-                    merged_row[key] = value
-            
-            # Add attendance columns with _attendance suffix (except dbn)
-            for key, value in a_row.items():
-                if key == 'dbn':
-                    continue  # Already added
-                elif key in ['school_name', 'borough']:
-                    merged_row[f'{key}_attendance'] = value
-                else:
-                    merged_row[key] = value
-            
-            merged.append(merged_row)
-    
-    print(f"Merged: {len(merged)} rows")
-    
-    # Drop rows with missing key columns
-    key_cols = ['pct_students_temp_housing', 'pct_chronically_absent', 
-                'n_students_temp_housing', 'total_enrollment']
-    
-    print(f"\nFiltering rows with complete key columns: {key_cols}")
-    before = len(merged)
-    filtered_merged = []
-    for row in merged:
-        # Check if all key columns have non-empty values
-        if all(row.get(col, '') != '' for col in key_cols):
-            filtered_merged.append(row)
-    
-    after = len(filtered_merged)
-    print(f"Dropped {before - after} rows with missing key columns")
-    print(f"Final: {after} rows")
-    
-    # Save merged dataset
-    output_path = 'data/merged.csv'
-    if filtered_merged:
-        fieldnames = list(filtered_merged[0].keys())
-        with open(output_path, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(filtered_merged)
-        
-        print(f"\n✓ Saved merged dataset to {output_path}")
-        print(f"\n=== Summary ===")
-        print(f"Rows: {len(filtered_merged)}")
-        print(f"Columns: {len(fieldnames)}")
-        
-        # Count boroughs
-        borough_counts = {}
-        for row in filtered_merged:
-            borough = row.get('borough_housing', 'Unknown')
-            borough_counts[borough] = borough_counts.get(borough, 0) + 1
-        
-        print(f"\nBorough distribution:")
-        for borough in sorted(borough_counts.keys()):
-            print(f"  {borough}: {borough_counts[borough]}")
-    else:
+
+    housing_file = first_existing(HOUSING_SOURCES)
+    attendance_file = first_existing(ATTENDANCE_SOURCES)
+    housing = load_csv(housing_file)
+    attendance = load_csv(attendance_file)
+
+    print(f"Housing ({housing_file}): {len(housing)} rows")
+    print(f"Attendance ({attendance_file}): {len(attendance)} rows")
+
+    print("\nCleaning housing and attendance data...")
+    housing = clean_housing(housing)
+    attendance = clean_attendance(attendance)
+
+    print("Merging datasets on (dbn, school_year) (inner join)...")
+    merged, diagnostics = merge_years(housing, attendance)
+    print_diagnostics(diagnostics)
+
+    if merged.empty:
         print("ERROR: No rows to save after filtering!")
+        return False
+
+    output_path = os.path.join(data_dir, 'merged.csv')
+    merged.to_csv(output_path, index=False)
+
+    print(f"\n✓ Saved merged dataset to {output_path}")
+    print(f"\n=== Summary ===")
+    print(f"Rows: {len(merged)}")
+    print(f"Columns: {len(merged.columns)}")
+
+    print(f"\nRows per school year:")
+    for school_year, count in merged['school_year'].value_counts().sort_index().items():
+        print(f"  {school_year}: {count}")
+
+    print(f"\nBorough distribution:")
+    for borough, count in merged['borough_housing'].value_counts().sort_index().items():
+        print(f"  {borough}: {count}")
+
+    print()
+    report = validate_outputs({'merged': merged})
+    print_report(report)
+
+    print(f"\nDone in {time.perf_counter() - start:.2f}s")
+    return report['ok']
 
 
 if __name__ == '__main__':
-    main()
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,103 @@
+"""
+Cleaning rules shared by clean_data.py (merged.csv) and snapshot.py.
+
+read_csv() reads a raw CSV; clean_housing() and clean_attendance() take
+the frame it returns and clean it in place: DBNs normalized, numeric columns
+parsed with data.numeric.parse_numeric (percent strings, "s"
+suppressions, thousands separators) and borough derived from dbn[2].
+Housing keeps which cells were suppressed in a "suppressed" bit column,
+and attendance gets a total_enrollment column for the Gap tab. The
+column lists and BOROUGH_MAP live here so both outputs and the modules
+built on them agree on one definition.
+"""
+
+import pandas as pd
+
+from data.join import normalize_dbn
+from data.numeric import parse_numeric, suppression_bits
+
+# Borough mapping based on dbn[2]
+BOROUGH_MAP = {
+    "M": "Manhattan",
+    "X": "Bronx",
+    "K": "Brooklyn",
+    "Q": "Queens",
+    "R": "Staten Island",
+}
+CITYWIDE = "Citywide"
+
+# Housing counts/percentages that may be suppressed ("s"); bit i of the
+# "suppressed" column is HOUSING_SUPPRESSIBLE_COLS[i] (data.numeric.is_suppressed)
+HOUSING_SUPPRESSIBLE_COLS = [
+    "students_in_temporary_housing",
+    "students_in_temporary_housing_1",  # "30.7%"-style percent
+    "students_residing_in_shelter",
+    "residing_in_dhs_shelter",
+    "residing_in_non_dhs_shelter",
+    "doubled_up",
+]
+HOUSING_NUMERIC_COLS = ["total_students"] + HOUSING_SUPPRESSIBLE_COLS
+
+ATTENDANCE_NUMERIC_COLS = [
+    "chronically_absent_1",  # No % sign
+    "attendance",
+    "total_days",
+    "days_absent",
+    "days_present",
+    "chronically_absent",
+    "contributing_10_total_days",
+]
+
+# Housing files written before school_year was added hold 2020-21 only
+DEFAULT_SCHOOL_YEAR = "2020-21"
+
+
+def read_csv(path):
+    """
+    Read a raw CSV. Clean numeric columns are typed by the parser; columns
+    with "s"/"%" stay strings for parse_numeric(). Only blank cells are NaN,
+    so names like "NA" survive.
+    """
+    return pd.read_csv(path, engine="pyarrow", keep_default_na=False, na_values=[""])
+
+
+def derive_borough(dbn):
+    """Map a dbn column to borough names via dbn[2]; short/unknown codes are Citywide."""
+    return dbn.astype(str).str[2].map(BOROUGH_MAP).fillna(CITYWIDE)
+
+
+def clean_housing(housing):
+    """
+    Normalize DBNs, parse the numeric columns, record suppressed cells in
+    a "suppressed" bit column and derive borough. Returns the frame.
+    """
+    housing["dbn"] = normalize_dbn(housing["dbn"])
+    if "total_students" in housing.columns:
+        housing["total_students"] = parse_numeric(housing["total_students"])[0]
+    masks = []
+    for col in HOUSING_SUPPRESSIBLE_COLS:
+        if col in housing.columns:
+            housing[col], suppressed = parse_numeric(housing[col])
+        else:
+            suppressed = pd.Series(False, index=housing.index)
+        masks.append(suppressed)
+    housing["suppressed"] = suppression_bits(masks)
+    if "school_year" not in housing.columns:
+        housing["school_year"] = DEFAULT_SCHOOL_YEAR
+    housing["borough"] = derive_borough(housing["dbn"])
+    return housing
+
+
+def clean_attendance(attendance):
+    """
+    Normalize DBNs, parse the numeric columns present, copy enrollment
+    (students enrolled 10+ days) to total_enrollment and derive borough.
+    Returns the frame.
+    """
+    attendance["dbn"] = normalize_dbn(attendance["dbn"])
+    for col in ATTENDANCE_NUMERIC_COLS:
+        if col in attendance.columns:
+            attendance[col] = parse_numeric(attendance[col])[0]
+    attendance["total_enrollment"] = attendance["contributing_10_total_days"]
+    attendance["borough"] = derive_borough(attendance["dbn"])
+    return attendance
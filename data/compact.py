@@ -0,0 +1,97 @@
+"""
+Compact in-memory dtypes for the cleaned dashboard frames.
+
+The cleaned frames repeat the same few thousand DBNs and school names and
+a handful of years and boroughs on every row, and keep every number as
+float64/int64. compact_frames() dictionary-encodes those strings as
+pandas categoricals (the categories are the lookup table, each row keeps
+a small integer code) and downcasts numbers to float32 and the smallest
+integer type their range fits. float32 is for storage only: aggregates,
+panel and rollup upcast to float64 before they sum. Both frames share one
+DBN dictionary, so joins on dbn compare codes. The snapshot stores these dtypes as Arrow
+dictionary/narrow columns, and app.py holds the result once per process.
+"""
+
+import numpy as np
+import pandas as pd
+
+from data.partitions import frame_nbytes
+
+# Columns stored as categoricals; year columns are ordered so sorting keeps school-year order
+CATEGORY_COLUMNS = ["dbn", "school_name", "borough", "grade", "category"]
+YEAR_COLUMNS = ["school_year", "year"]
+
+# float32 holds every integer up to 2**24 exactly (and percentages to ~7 digits)
+FLOAT32_MAX = 2**24
+
+
+def downcast(series):
+    """Narrowest numeric dtype that holds a column's values exactly enough."""
+    values = series.to_numpy()
+    if pd.api.types.is_unsigned_integer_dtype(series.dtype):
+        # Bit masks (data.numeric.suppression_bits) are already narrow
+        return series
+    if pd.api.types.is_integer_dtype(series.dtype):
+        if not len(values):
+            return series.astype("int16")
+        low, high = values.min(), values.max()
+        for dtype in ("int16", "int32"):
+            info = np.iinfo(dtype)
+            if info.min <= low and high <= info.max:
+                return series.astype(dtype)
+        return series
+    if pd.api.types.is_float_dtype(series.dtype):
+        finite = values[np.isfinite(values)]
+        if not len(finite) or np.abs(finite).max() < FLOAT32_MAX:
+            return series.astype("float32")
+    return series
+
+
+def compact_frame(frame, dbn_categories):
+    """One frame with categorical strings and downcast numbers (a new frame)."""
+    columns = {}
+    for name, column in frame.items():
+        if name == "dbn":
+            column = pd.Categorical(column, categories=dbn_categories)
+        elif name in YEAR_COLUMNS:
+            column = pd.Categorical(column, categories=sorted(column.dropna().unique()), ordered=True)
+        elif name in CATEGORY_COLUMNS:
+            column = column.astype("category")
+        else:
+            column = downcast(column)
+        columns[name] = column
+    return pd.DataFrame(columns, index=frame.index)
+
+
+def compact_frames(attendance, housing):
+    """Compact (attendance, housing) with one shared, sorted DBN dictionary."""
+    dbns = pd.Index(np.union1d(
+        attendance["dbn"].dropna().astype(str).unique(), housing["dbn"].dropna().astype(str).unique(),
+    ))
+    return compact_frame(attendance, dbns), compact_frame(housing, dbns)
+
+
+def memory_report(before, after):
+    """
+    Deep bytes per frame and column before/after compaction, from two
+    {name: frame} dicts with the same keys.
+    """
+    report = {}
+    for name, old in before.items():
+        new = after[name]
+        columns = {
+            column: {
+                "dtype_before": str(old[column].dtype),
+                "dtype_after": str(new[column].dtype),
+                "bytes_before": int(old[column].memory_usage(index=False, deep=True)),
+                "bytes_after": int(new[column].memory_usage(index=False, deep=True)),
+            }
+            for column in old.columns
+        }
+        report[name] = {
+            "rows": len(old),
+            "bytes_before": frame_nbytes(old),
+            "bytes_after": frame_nbytes(new),
+            "columns": columns,
+        }
+    return report
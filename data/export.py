@@ -0,0 +1,225 @@
+"""
+Streaming CSV / Parquet exports of the dashboard's tables, with a disk cache.
+
+An export is a run of per-year frames (the gap join, the borough aggregates,
+the top-20 table, ...) written out CHUNK_ROWS rows at a time through
+Arrow's CSV writer or a ParquetWriter (one row group per slice), and the
+bytes are handed on as soon as each slice is written. Nothing builds an
+all-years copy of the data or a whole-file string, so the working memory
+of an export is one chunk no matter how many rows there are.
+
+ExportCache keeps finished files on disk, keyed by (dataset, scope, format,
+data version), bounded by total bytes with least-recently-used eviction.
+A repeat download of the same selection is a file read; a new data version
+misses and the stale files age out.
+"""
+
+import hashlib
+import io
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+CHUNK_ROWS = 50_000
+
+FORMATS = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# Export name -> (label, file name stem)
+DATASETS = {
+    "gap": ("Gap join (all matched schools)", "absenteeism-gap"),
+    "scatter": ("Scatter rows (schools in the fit)", "absenteeism-gap-scatter"),
+    "borough": ("Borough totals", "borough-totals"),
+    "shelter": ("Housing type by borough", "housing-type-by-borough"),
+    "top20": ("Top 20 schools", "top-20-schools"),
+}
+
+# Tables whose index carries data: written out as a leading column
+INDEX_COLUMNS = {"top20": "Rank"}
+
+
+def year_tables(dataset, years, lookup):
+    """
+    Yield lookup(year), the dataset's table for that year, one year at a
+    time, with a school_year column added where the table lacks one.
+    """
+    for year in years:
+        frame = lookup(year)
+        if dataset in INDEX_COLUMNS:
+            frame = frame.rename_axis(INDEX_COLUMNS[dataset]).reset_index()
+        if "school_year" not in frame.columns:
+            frame = frame.assign(school_year=year)
+        yield frame
+
+
+def chunks(frames, chunk_rows=CHUNK_ROWS):
+    """Row slices of at most chunk_rows from each frame in turn (views, not copies)."""
+    for frame in frames:
+        for start in range(0, len(frame), chunk_rows):
+            yield frame.iloc[start:start + chunk_rows]
+
+
+class _Drain(io.RawIOBase):
+    """Write-only sink whose buffered bytes are handed out and dropped by take()."""
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def take(self):
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+def plain_schema(schema):
+    """schema with dictionary (categorical) columns decoded to their value type."""
+    return pa.schema([
+        field.with_type(field.type.value_type) if pa.types.is_dictionary(field.type) else field
+        for field in schema
+    ])
+
+
+def arrow_chunks(frames, open_writer, chunk_rows=CHUNK_ROWS):
+    """
+    Yield the bytes open_writer(sink, schema) produces for frames, flushed
+    after every chunk. Categorical columns are written as plain values.
+    """
+    sink, writer, schema = _Drain(), None, None
+    for chunk in chunks(frames, chunk_rows):
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        if writer is None:
+            schema = plain_schema(table.schema)
+            writer = open_writer(sink, schema)
+        writer.write_table(table.cast(schema))
+        yield sink.take()
+    if writer is None:
+        return
+    writer.close()
+    yield sink.take()
+
+
+def csv_chunks(frames, chunk_rows=CHUNK_ROWS):
+    """Yield a CSV file as bytes, one chunk of rows at a time (header once)."""
+    return arrow_chunks(frames, pacsv.CSVWriter, chunk_rows)
+
+
+def parquet_chunks(frames, chunk_rows=CHUNK_ROWS):
+    """Yield a Parquet file as bytes, one row group per chunk."""
+    return arrow_chunks(frames, pq.ParquetWriter, chunk_rows)
+
+
+def stream(frames, fmt, chunk_rows=CHUNK_ROWS):
+    """Byte chunks of frames exported as fmt ("csv" or "parquet")."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}; expected one of {sorted(FORMATS)}")
+    writer = csv_chunks if fmt == "csv" else parquet_chunks
+    return writer(frames, chunk_rows)
+
+
+def file_name(dataset, scope, fmt):
+    """Download file name, e.g. absenteeism-gap-2020-21.csv or borough-totals-all-years.parquet."""
+    return f"{DATASETS[dataset][1]}-{scope}.{fmt}"
+
+
+class ExportCache:
+    """
+    Finished export files on disk, keyed by (dataset, scope, format, data
+    version) and bounded by total bytes (least recently used evicted).
+
+    Meant to be created once per process (st.cache_resource) and shared by
+    every session. The default directory is a fresh temporary one, or
+    $ABSGAP_EXPORT_DIR when that is set.
+    """
+
+    def __init__(self, directory=None, max_bytes=256 * 1024 * 1024, chunk_rows=CHUNK_ROWS):
+        self.directory = directory or os.environ.get("ABSGAP_EXPORT_DIR") or tempfile.mkdtemp(prefix="absgap-exports-")
+        os.makedirs(self.directory, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.chunk_rows = chunk_rows
+        self._files = OrderedDict()
+        self._lock = threading.Lock()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def path(self, key):
+        digest = hashlib.blake2b(repr(key).encode(), digest_size=12).hexdigest()
+        return os.path.join(self.directory, f"{digest}.{key[2]}")
+
+    def get_or_write(self, key, frames):
+        """
+        Path of the export for key = (dataset, scope, fmt, data_version),
+        streaming frames() (an iterable of frames) to disk on a miss.
+        """
+        path = self.path(key)
+        with self._lock:
+            if key in self._files and os.path.exists(path):
+                self._files.move_to_end(key)
+                self.hits += 1
+                return path
+            self.misses += 1
+
+        # Write outside the lock; a concurrent writer of the same key just replaces the file
+        fd, partial = tempfile.mkstemp(dir=self.directory, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                for data in stream(frames(), key[2], self.chunk_rows):
+                    out.write(data)
+            os.replace(partial, path)
+        except BaseException:
+            os.unlink(partial)
+            raise
+        self._add(key, os.path.getsize(path))
+        return path
+
+    def open(self, key, frames):
+        """The export for key as an open binary file (see get_or_write)."""
+        return open(self.get_or_write(key, frames), "rb")
+
+    def _add(self, key, size):
+        with self._lock:
+            if key in self._files:
+                self.nbytes -= self._files.pop(key)
+            self._files[key] = size
+            self.nbytes += size
+            while len(self._files) > 1 and self.nbytes > self.max_bytes:
+                evicted, evicted_size = self._files.popitem(last=False)
+                self.nbytes -= evicted_size
+                self.evictions += 1
+                try:
+                    os.unlink(self.path(evicted))
+                except FileNotFoundError:
+                    pass
+
+    def stats(self):
+        """Hit/miss/eviction counters and current disk occupancy."""
+        with self._lock:
+            return {
+                "files": len(self._files),
+                "bytes": self.nbytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
@@ -2,135 +2,555 @@
 """
 Fetch data from NYC Open Data Socrata API.
 Saves data to CSV files locally.
+
+All dataset/year requests share one pooled requests.Session and run
+concurrently on a bounded thread pool, so a refresh takes about as long as
+the slowest single dataset. Each dataset is paged with $offset/$order until
+exhausted, and 429/5xx responses are retried with exponential backoff.
+
+Refreshes are incremental: fetch_manifest.json records each dataset/year's
+row count, content hash and HTTP validators (ETag/Last-Modified). The first
+page is requested conditionally, unchanged datasets are skipped, and only
+the CSVs (and the downstream merged.csv/snapshot) that depend on a changed
+dataset are rewritten. Pass --full to ignore the manifest. The downstream
+steps validate their outputs (data/validate.py), and the script exits
+non-zero if either fails.
+
+Rows are streamed to disk page by page: each dataset is written to a part
+file as its pages arrive, and the per-year and combined CSVs are assembled
+by streaming those parts, so memory is bounded by the page size rather than
+the dataset size. CSV headers come from the declared column lists plus the
+X-SODA2-Fields response header, not from whichever keys the first row has.
+
+Requests are projected and filtered server-side: HOUSING_SPEC and
+ATTENDANCE_SPEC declare the columns the dashboard and clean_data.py use
+(with the format of their raw values), $select is generated from them and
+$where from ATTENDANCE_FILTERS, so the raw CSVs hold only those columns.
+Pass --all-columns to pull every column (archival) instead.
 """
 
-import requests
-import json
+import argparse
 import csv
+import hashlib
+import itertools
+import json
 import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Ensure data directory exists
 data_dir = os.path.dirname(os.path.abspath(__file__))
 os.makedirs(data_dir, exist_ok=True)
 
-# API endpoints
+# Allow `python data/fetch_data.py` to import the data package
+if __package__ in (None, ""):
+    sys.path.insert(0, os.path.dirname(data_dir))
+
+# API endpoints (override the host to point at a local stand-in)
+BASE_URL = os.environ.get("SOCRATA_BASE_URL", "https://data.cityofnewyork.us")
 HOUSING_DATASETS = {
     "2020-21": "3wtp-43m9",
     "2019-20": "ec4f-sy8r",
     "2018-19": "4e3j-75af",
     "2017-18": "b22r-9izv",
 }
-ATTENDANCE_URL = "https://data.cityofnewyork.us/resource/gqq2-hgxd.json"
+ATTENDANCE_DATASET = "gqq2-hgxd"
 ATTENDANCE_YEARS = ["2017-18", "2018-19", "2019-20", "2020-21"]
 
-# Parameters with $limit=5000 to fetch all data (Socrata default is 1000)
-housing_params = {
-    "$limit": 5000
+# Socrata defaults to 1000 rows; page explicitly instead of relying on one big $limit
+PAGE_SIZE = 5000
+# Stable row order so $offset pages never overlap or skip rows
+PAGE_ORDER = ":id"
+MAX_WORKERS = 8
+MAX_RETRIES = 5
+BACKOFF_FACTOR = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+REQUEST_TIMEOUT = (10, 60)  # (connect, read) seconds
+
+MANIFEST_PATH = os.path.join(data_dir, "fetch_manifest.json")
+
+# Column spec per dataset: raw column -> format of its values in the raw CSV.
+# $select is generated from these and they are the raw files' column order.
+# Socrata omits null fields from individual JSON rows, so the first row's
+# keys are not a reliable schema either way. Formats:
+#   text     free text
+#   integer  whole number
+#   count    whole number, or "s" when suppressed (5 or fewer students)
+#   percent  "30.7%"-style string, or "s" when suppressed
+#   number   decimal without a % sign
+HOUSING_SPEC = {
+    "dbn": "text",                              # district-borough-number, e.g. 01M015
+    "school_name": "text",
+    "total_students": "integer",                # enrollment
+    "students_in_temporary_housing": "count",
+    "students_in_temporary_housing_1": "percent",  # share of enrollment in temporary housing
+    "students_residing_in_shelter": "count",
+    "residing_in_dhs_shelter": "count",
+    "residing_in_non_dhs_shelter": "count",
+    "doubled_up": "count",
+}
+# school_year is not a dataset column; it is added per request from the dataset's year
+HOUSING_EXTRA = {"school_year": "text"}
+ATTENDANCE_SPEC = {
+    "dbn": "text",
+    "school_name": "text",
+    "year": "text",                             # school year, e.g. 2020-21
+    "contributing_10_total_days": "integer",    # students enrolled 10+ days (enrollment)
+    "chronically_absent_1": "number",           # % chronically absent
 }
+# Equality filters pushed down as $where (the school year is added per request)
+ATTENDANCE_FILTERS = {"grade": "All Grades", "category": "All Students"}
 
-attendance_params = {
-    "$limit": 5000,
-    "$where": "year='2020-21' AND grade='All Grades' AND category='All Students'"
+HOUSING_COLUMNS = list(HOUSING_SPEC)
+ATTENDANCE_COLUMNS = list(ATTENDANCE_SPEC)
+
+# Per-year file each dataset is written to (and re-read from when unchanged)
+HOUSING_FILES = {
+    "2020-21": "housing.csv",
+    "2019-20": "housing_2019_20.csv",
+    "2018-19": "housing_2018_19.csv",
+    "2017-18": "housing_2017_18.csv",
+}
+ATTENDANCE_FILE = "attendance_all_years.csv"
+
+# Output file -> manifest keys it is built from, in row order
+OUTPUTS = {
+    "housing.csv": ["housing/2020-21"],
+    "housing_2019_20.csv": ["housing/2019-20"],
+    "housing_2018_19.csv": ["housing/2018-19"],
+    "housing_2017_18.csv": ["housing/2017-18"],
+    "housing_all_years.csv": [f"housing/{year}" for year in ["2017-18", "2018-19", "2019-20", "2020-21"]],
+    "attendance.csv": ["attendance/2020-21"],
+    "attendance_all_years.csv": [f"attendance/{year}" for year in ATTENDANCE_YEARS],
 }
 
-def fetch_housing_data(dataset_id, school_year):
-    """Fetch one school-year housing dataset from Socrata API."""
-    url = f"https://data.cityofnewyork.us/resource/{dataset_id}.json"
-    print(f"Fetching housing data for {school_year} ({dataset_id})...")
+
+def soql_literal(value):
+    """A SoQL string literal (single quotes doubled)."""
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def soql_where(filters):
+    """$where clause ANDing column = value equality filters, or None if there are none."""
+    if not filters:
+        return None
+    return " AND ".join(f"{column}={soql_literal(value)}" for column, value in filters.items())
+
+
+def soql_select(spec):
+    """$select clause for a column spec."""
+    return ",".join(spec)
+
+
+def attendance_where(year):
+    """Server-side filter for one school year of whole-school attendance."""
+    return soql_where({"year": year, **ATTENDANCE_FILTERS})
+
+
+def dataset_jobs(all_columns=False):
+    """
+    Every dataset/year request a refresh makes, keyed like the manifest.
+
+    Each job's "select" is generated from its column spec, or None with
+    all_columns (then every column the server reports is kept).
+    """
+    jobs = {}
+    for school_year, dataset_id in HOUSING_DATASETS.items():
+        jobs[f"housing/{school_year}"] = {
+            "kind": "housing", "year": school_year, "dataset_id": dataset_id, "where": None,
+            "select": None if all_columns else soql_select(HOUSING_SPEC),
+            "columns": HOUSING_COLUMNS + list(HOUSING_EXTRA),
+            "types": {**HOUSING_SPEC, **HOUSING_EXTRA},
+        }
+    for year in ATTENDANCE_YEARS:
+        jobs[f"attendance/{year}"] = {
+            "kind": "attendance", "year": year, "dataset_id": ATTENDANCE_DATASET,
+            "where": attendance_where(year),
+            "select": None if all_columns else soql_select(ATTENDANCE_SPEC),
+            "columns": list(ATTENDANCE_COLUMNS),
+            "types": dict(ATTENDANCE_SPEC),
+        }
+    return jobs
+
+
+def make_session(max_workers=MAX_WORKERS):
+    """Session with a connection pool sized to the worker count and retry/backoff on 429/5xx."""
+    retry = Retry(
+        total=MAX_RETRIES,
+        backoff_factor=BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=["GET"],
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=max_workers, pool_maxsize=max_workers, max_retries=retry
+    )
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def dataset_url(dataset_id, base_url=None):
+    """Resource URL for a Socrata dataset id."""
+    return f"{(base_url or BASE_URL).rstrip('/')}/resource/{dataset_id}.json"
+
+
+def response_fields(response):
+    """Column names Socrata reports for a query (X-SODA2-Fields), or []."""
     try:
-        response = requests.get(url, params=housing_params)
-        response.raise_for_status()
-        data = response.json()
-        for row in data:
-            row['school_year'] = school_year
-        print(f"Housing {school_year}: {len(data)} rows")
-        return data
-    except Exception as e:
-        print(f"Error fetching housing data for {school_year}: {e}")
-        raise
+        return json.loads(response.headers.get("X-SODA2-Fields", "[]"))
+    except ValueError:
+        return []
+
+
+def fetch_pages(session, dataset_id, where=None, base_url=None, page_size=PAGE_SIZE,
+                validators=None, select=None):
+    """
+    Page through a dataset with $offset/$order. Each request asks for one
+    row past the page, so the last page is known without an extra request
+    that comes back empty (the extra row is fetched again as the next
+    page's first row).
+
+    select and where are passed through as $select/$where. validators ({"etag", "last_modified"}) make the first page conditional.
+    Returns (pages, validators, fields): pages is a generator of row lists
+    that requests each following page lazily, or None if the server answered
+    304; fields is the server-reported column list.
+    """
+    url = dataset_url(dataset_id, base_url)
+
+    def get(offset, headers=None):
+        params = {"$limit": page_size + 1, "$offset": offset, "$order": PAGE_ORDER}
+        if select:
+            params["$select"] = select
+        if where:
+            params["$where"] = where
+        # The adapter's Retry covers connect errors and 429/5xx status lines; a
+        # body cut off mid-transfer or that isn't JSON is retried here.
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                response = session.get(url, params=params, headers=headers or {}, timeout=REQUEST_TIMEOUT)
+                return response, response.json() if response.status_code == 200 else None
+            except (requests.exceptions.ChunkedEncodingError, ValueError) as e:
+                if attempt == MAX_RETRIES:
+                    raise
+                print(f"{dataset_id} offset {offset}: bad response body ({e}), retrying")
+                time.sleep(BACKOFF_FACTOR * 2 ** attempt)
+
+    headers = {}
+    if validators:
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+    first, first_page = get(0, headers)
+    if first.status_code == 304:
+        return None, validators, None
+    first.raise_for_status()
+    response_validators = {
+        "etag": first.headers.get("ETag"),
+        "last_modified": first.headers.get("Last-Modified"),
+    }
+
+    def pages():
+        page = first_page
+        offset = 0
+        while True:
+            yield page[:page_size]
+            if len(page) <= page_size:
+                return
+            offset += page_size
+            response, page = get(offset)
+            response.raise_for_status()
+
+    return pages(), response_validators, response_fields(first)
+
+
+def part_path(key):
+    """Scratch file a dataset job streams its rows into."""
+    return os.path.join(data_dir, "." + key.replace("/", "_") + ".part.csv")
+
+
+def merge_columns(*column_lists):
+    """Ordered union of column lists."""
+    merged = []
+    for columns in column_lists:
+        for col in columns:
+            if col not in merged:
+                merged.append(col)
+    return merged
 
-def fetch_attendance_data():
-    """Fetch attendance data from Socrata API with server-side filters."""
-    print("Fetching attendance data...")
+
+def write_csv(rows, filepath, fieldnames):
+    """Stream an iterable of row dicts to a CSV file. Returns the row count."""
+    count = 0
+    with open(filepath, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames, restval='', extrasaction='ignore')
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def fetch_job(session, key, job, base_url=None, validators=None, page_size=PAGE_SIZE):
+    """
+    Run one dataset job, streaming its rows into part_path(key).
+
+    Returns a result dict: {"modified": False, "validators"} on 304, else
+    {"modified": True, "part", "rows", "sha256", "validators"}.
+    """
     try:
-        response = requests.get(ATTENDANCE_URL, params=attendance_params)
-        response.raise_for_status()
-        data = response.json()
-        print(f"Attendance: {len(data)} rows")
-        return data
+        pages, validators, fields = fetch_pages(
+            session, job["dataset_id"], job["where"], base_url, page_size, validators, job["select"]
+        )
+        if pages is None:
+            print(f"{key}: not modified")
+            return {"modified": False, "validators": validators}
+
+        columns = merge_columns(job["columns"], fields)
+        digest = hashlib.sha256()
+        extra = set()
+
+        def rows():
+            for page in pages:
+                for row in page:
+                    if job["kind"] == "housing":
+                        row['school_year'] = job["year"]
+                    extra.update(k for k in row if k not in columns)
+                    digest.update(json.dumps(row, sort_keys=True).encode("utf-8"))
+                    digest.update(b"\n")
+                    yield row
+
+        path = part_path(key)
+        count = write_csv(rows(), path, columns)
     except Exception as e:
-        print(f"Error fetching attendance data: {e}")
+        print(f"Error fetching {key} ({job['dataset_id']}): {e}")
         raise
+    if extra:
+        print(f"{key}: ignored undeclared columns {sorted(extra)}")
+    print(f"{key}: {count} rows")
+    return {
+        "modified": True, "part": path, "rows": count,
+        "sha256": digest.hexdigest(), "validators": validators,
+    }
 
-def fetch_attendance_all_years():
-    """Fetch attendance data for all configured school years."""
-    print("Fetching attendance data for all years...")
-    all_rows = []
-    for year in ATTENDANCE_YEARS:
-        params = {
-            "$limit": 5000,
-            "$where": f"year='{year}' AND grade='All Grades' AND category='All Students'"
+
+def fetch_all(base_url=None, max_workers=MAX_WORKERS, validators_by_key=None, page_size=PAGE_SIZE,
+              all_columns=False):
+    """
+    Fetch every housing dataset and attendance year concurrently.
+
+    validators_by_key maps manifest keys to stored validators for conditional
+    requests. Returns {key: fetch_job result}. Wall-clock is bounded by the
+    slowest single dataset rather than the sum of all of them.
+    """
+    validators_by_key = validators_by_key or {}
+    session = make_session(max_workers)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            key: pool.submit(fetch_job, session, key, job, base_url, validators_by_key.get(key), page_size)
+            for key, job in dataset_jobs(all_columns).items()
         }
-        try:
-            response = requests.get(ATTENDANCE_URL, params=params)
-            response.raise_for_status()
-            data = response.json()
-            print(f"Attendance {year}: {len(data)} rows")
-            all_rows.extend(data)
-        except Exception as e:
-            print(f"Error fetching attendance data for {year}: {e}")
-            raise
-    print(f"Attendance all years total: {len(all_rows)} rows")
-    return all_rows
-
-def save_to_csv(data, filename):
-    """Save list of dicts to CSV file."""
-    if not data:
-        print(f"No data to save to {filename}")
-        return
-    
-    # Get fieldnames from first record
-    fieldnames = list(data[0].keys())
-    
+        results = {key: future.result() for key, future in futures.items()}
+    session.close()
+    return results
+
+
+def rows_sha256(rows):
+    """Order-sensitive content hash of row dicts (matches fetch_job's streaming hash)."""
+    digest = hashlib.sha256()
+    for row in rows:
+        digest.update(json.dumps(row, sort_keys=True).encode("utf-8"))
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+def load_manifest():
+    """Return the fetch manifest ({key: entry}), or {} if there is none yet."""
+    try:
+        with open(MANIFEST_PATH) as f:
+            return json.load(f).get("datasets", {})
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(entries):
+    """Write the fetch manifest atomically."""
+    tmp_path = MANIFEST_PATH + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"datasets": entries}, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, MANIFEST_PATH)
+
+
+def source_file(job):
+    """Local CSV an unchanged dataset's rows are re-read from."""
+    if job["kind"] == "housing":
+        return HOUSING_FILES[job["year"]]
+    return ATTENDANCE_FILE
+
+
+def csv_header(filepath):
+    """Column names of a CSV file."""
+    with open(filepath, newline='') as f:
+        return next(csv.reader(f), [])
+
+
+def iter_csv(filepath, year=None):
+    """Stream rows from a CSV file, optionally keeping one attendance year."""
+    with open(filepath, newline='') as f:
+        for row in csv.DictReader(f):
+            if year is None or row.get("year") == year:
+                yield row
+
+
+def input_source(key, job, changed):
+    """(path, year filter) to stream a dataset's rows from: its new part or the old output."""
+    if key in changed:
+        return changed[key]["part"], None
+    year = job["year"] if job["kind"] == "attendance" else None
+    return os.path.join(data_dir, source_file(job)), year
+
+
+def save_to_csv(data, filename, fieldnames=None):
+    """Save an iterable of dicts to a CSV file in data_dir."""
+    data = iter(data)
+    if fieldnames is None:
+        first = next(data, None)
+        if first is None:
+            print(f"No data to save to {filename}")
+            return
+        fieldnames = list(first.keys())
+        data = itertools.chain([first], data)
+
     filepath = os.path.join(data_dir, filename)
-    with open(filepath, 'w', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(data)
-    
-    print(f"Saved {len(data)} rows to {filepath}")
-
-def main():
-    """Fetch all data and save to CSV files."""
-    # Fetch housing data by year
-    housing_by_year = {}
-    for school_year, dataset_id in HOUSING_DATASETS.items():
-        housing_by_year[school_year] = fetch_housing_data(dataset_id, school_year)
-
-    # Combine all housing rows for archival/extended analysis
-    combined_housing = []
-    for school_year in ["2017-18", "2018-19", "2019-20", "2020-21"]:
-        combined_housing.extend(housing_by_year.get(school_year, []))
-
-    # Keep existing pipeline compatibility: housing.csv remains 2020-21
-    housing_data = housing_by_year["2020-21"]
-
-    # Fetch attendance data
-    attendance_data = fetch_attendance_data()
-    attendance_all_years = fetch_attendance_all_years()
-    
-    # Save compatibility files
-    save_to_csv(housing_data, "housing.csv")
-    save_to_csv(attendance_data, "attendance.csv")
-    save_to_csv(attendance_all_years, "attendance_all_years.csv")
-
-    # Save additional housing datasets
-    save_to_csv(housing_by_year["2019-20"], "housing_2019_20.csv")
-    save_to_csv(housing_by_year["2018-19"], "housing_2018_19.csv")
-    save_to_csv(housing_by_year["2017-18"], "housing_2017_18.csv")
-    save_to_csv(combined_housing, "housing_all_years.csv")
-    
+    count = write_csv(data, filepath, fieldnames)
+    print(f"Saved {count} rows to {filepath}")
+
+
+def refresh(base_url=None, max_workers=MAX_WORKERS, full=False, page_size=PAGE_SIZE, all_columns=False):
+    """
+    Fetch changed datasets and rewrite only the outputs that depend on them.
+
+    all_columns skips the $select projection and keeps every column.
+    Returns the list of output CSVs that were rewritten.
+    """
+    jobs = dataset_jobs(all_columns)
+    manifest = {} if full else load_manifest()
+
+    # Only send validators when the rows can be recovered locally on a 304,
+    # i.e. the local file was fetched with the same projection
+    validators_by_key = {}
+    for key, job in jobs.items():
+        entry = manifest.get(key)
+        if (entry and entry.get("select") == job["select"]
+                and os.path.exists(os.path.join(data_dir, source_file(job)))):
+            validators_by_key[key] = entry.get("validators")
+
+    start = time.perf_counter()
+    try:
+        results = fetch_all(base_url, max_workers, validators_by_key, page_size, all_columns)
+        print(f"Checked {len(results)} datasets in {time.perf_counter() - start:.2f}s")
+
+        changed = {}
+        new_manifest = dict(manifest)
+        for key, result in results.items():
+            entry = manifest.get(key)
+            if not result["modified"]:
+                continue
+            digest = result["sha256"]
+            if key not in validators_by_key or not entry or entry["sha256"] != digest:
+                changed[key] = result
+            job = jobs[key]
+            if (not entry or entry["sha256"] != digest or entry.get("validators") != result["validators"]
+                    or entry.get("select") != job["select"]):
+                new_manifest[key] = {
+                    "dataset_id": job["dataset_id"],
+                    "year": job["year"],
+                    "where": job["where"],
+                    "select": job["select"],
+                    "columns": job["types"],
+                    "rows": result["rows"],
+                    "sha256": digest,
+                    "validators": result["validators"],
+                    "fetched_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                }
+
+        # Assemble every affected output into a temp file first: unchanged years
+        # are streamed back out of the current outputs, which must stay intact
+        # until all of them are built.
+        pending = {}
+        for filename, keys in OUTPUTS.items():
+            if not any(key in changed for key in keys):
+                continue
+            sources = [input_source(key, jobs[key], changed) for key in keys]
+            columns = merge_columns(*(csv_header(path) for path, _ in sources))
+            rows = itertools.chain.from_iterable(iter_csv(path, year) for path, year in sources)
+            tmp_path = os.path.join(data_dir, filename + ".tmp")
+            pending[filename] = (tmp_path, write_csv(rows, tmp_path, columns))
+
+        for filename, (tmp_path, count) in pending.items():
+            filepath = os.path.join(data_dir, filename)
+            os.replace(tmp_path, filepath)
+            print(f"Saved {count} rows to {filepath}")
+    finally:
+        scratch = [part_path(key) for key in jobs]
+        scratch += [os.path.join(data_dir, filename + ".tmp") for filename in OUTPUTS]
+        for path in scratch:
+            if os.path.exists(path):
+                os.remove(path)
+
+    if new_manifest != manifest:
+        save_manifest(new_manifest)
+    return list(pending)
+
+
+def rebuild_downstream(written):
+    """
+    Re-run the cleaning/snapshot steps whose inputs were rewritten. Both
+    validate what they write; returns False if either output failed.
+    """
+    from data import clean_data, snapshot
+
+    ok = True
+    if {"housing_all_years.csv", "attendance_all_years.csv"} & set(written):
+        ok = clean_data.main() and ok
+    if {"housing_all_years.csv", "attendance_all_years.csv", "attendance.csv"} & set(written):
+        print()
+        ok = snapshot.main() and ok
+    return ok
+
+
+def main(argv=None):
+    """Fetch changed data and save it to CSV files. Returns False if validation failed."""
+    parser = argparse.ArgumentParser(description="Fetch NYC Open Data housing and attendance CSVs.")
+    parser.add_argument("--base-url", default=BASE_URL,
+                        help="Socrata host (default: %(default)s, or $SOCRATA_BASE_URL)")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS,
+                        help="Maximum concurrent requests (default: %(default)s)")
+    parser.add_argument("--full", action="store_true",
+                        help="Ignore the fetch manifest and re-download everything")
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE,
+                        help="Rows per request (default: %(default)s)")
+    parser.add_argument("--all-columns", action="store_true",
+                        help="Pull every column instead of the declared column specs (archival)")
+    args = parser.parse_args(argv)
+
+    written = refresh(args.base_url, args.workers, args.full, args.page_size, args.all_columns)
+    if not written:
+        print("\nNo datasets changed; nothing written.")
+        return True
+    if not rebuild_downstream(written):
+        print("\nData acquisition finished, but validation failed (see above)")
+        return False
     print("\nData acquisition complete!")
+    return True
 
 if __name__ == "__main__":
-    main()
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,63 @@
+"""
+Same-year housing x attendance join behind "The Gap" tab.
+
+The join itself is data/join.py's (dbn, year) hash join with normalized
+DBNs; gap_join() sets it up with this tab's columns, and year_frames()
+turns one year of its output into the scatter frames.
+"""
+
+import pandas as pd
+
+from data.join import YearJoin, join_years
+
+# Scatter axes once the join has renamed the source columns
+HOUSING_PCT = "pct_students_temp_housing"
+ABSENT_PCT = "pct_chronically_absent"
+
+ATTENDANCE_COLUMNS = ["dbn", "school_name", "chronically_absent_1", "total_enrollment"]
+
+# Schools below this enrollment are left out of the scatter as outliers
+MIN_ENROLLMENT = 20
+
+# Join keys (housing side, attendance side) and suffixes for the shared school_name
+GAP_KEYS = {"left_on": ("dbn", "school_year"), "right_on": ("dbn", "year")}
+GAP_SUFFIXES = ("_housing", "_attendance")
+
+
+def gap_join():
+    """
+    A YearJoin of housing x attendance on (dbn, year) with the Gap tab's
+    columns; update(housing, attendance) re-joins only changed years.
+    """
+    return YearJoin(right_columns=ATTENDANCE_COLUMNS, suffixes=GAP_SUFFIXES, **GAP_KEYS)
+
+
+def year_frames(joined):
+    """
+    (gap_df, scatter_df) from housing x attendance join rows; scatter_df
+    keeps schools with at least MIN_ENROLLMENT students.
+    """
+    gap_df = joined.rename(
+        columns={
+            "students_in_temporary_housing_1": HOUSING_PCT,
+            "chronically_absent_1": ABSENT_PCT,
+        }
+    )
+    scatter_df = gap_df[gap_df["total_enrollment"] >= MIN_ENROLLMENT]
+    return gap_df, scatter_df
+
+
+def build_gap_frames(housing_year, attendance_year):
+    """Join one year of housing and attendance and return (gap_df, scatter_df)."""
+    joined, _ = join_years(
+        housing_year, attendance_year, right_columns=ATTENDANCE_COLUMNS, suffixes=GAP_SUFFIXES, **GAP_KEYS,
+    )
+    return year_frames(joined)
+
+
+def stack_years(scatter_frames):
+    """Concatenate per-year scatter frames (each keeps its school_year column)."""
+    frames = list(scatter_frames)
+    # Empty years are skipped (pandas warns on them) unless every year is empty
+    non_empty = [frame for frame in frames if len(frame)] or frames[:1]
+    return pd.concat(non_empty, ignore_index=True)
@@ -0,0 +1,332 @@
+"""
+Year-aware (dbn, year) join with DBN normalization and join diagnostics.
+
+join_years() joins two frames on (dbn, year) for every year in one pass.
+Keys are normalized first (trimmed, upper-case, zero-padded: " 1m15" ->
+"01M015"), then both sides' (dbn, year) pairs are factorized into one
+dense integer key space, so the join itself is a few bincounts and array
+lookups: linear in the row count, with no per-year merge and no sort.
+Like the old per-dbn lookup dict, a right-side key that appears more than
+once keeps its last row. Alongside the joined rows it reports, per year,
+how many keys on each side found no partner, duplicated keys, how many
+keys normalization rewrote, and the join cardinality.
+
+YearJoin keeps the result per year together with a content digest of
+each year's input rows, so updating it with new frames re-joins only the
+years whose rows changed.
+"""
+
+import hashlib
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# District, borough letter, school number; leading zeros are dropped and re-padded
+DBN_PARTS = r"^0*(?P<district>\d{1,2})(?P<borough>[A-Z])0*(?P<number>\d+)$"
+# Already canonical; matching is much cheaper than extracting, so only the rest is rewritten
+DBN_CANONICAL = r"^\d{2}[A-Z](\d{3}|[1-9]\d{3,})$"
+
+# Unmatched DBNs listed per side and year in the diagnostics
+SAMPLE_KEYS = 5
+
+
+def normalize_dbn(values):
+    """
+    Canonical DBNs for a column: trimmed, upper-case, district padded to 2
+    digits and school number to 3 ("1m15 " -> "01M015"). Values that do
+    not look like a DBN are only trimmed and upper-cased; blanks become NaN.
+    A categorical column is normalized through its categories only.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        categories = normalize_dbn(pd.Series(values.cat.categories.astype("str")))
+        codes = values.cat.codes.to_numpy()
+        out = categories.to_numpy(dtype=object)[codes]
+        out[codes < 0] = np.nan
+        return pd.Series(out, index=values.index, dtype="str")
+    text = pa.array(values.astype("str"))
+    if isinstance(text, pa.ChunkedArray):
+        text = text.combine_chunks()
+    text = pc.utf8_upper(pc.utf8_trim_whitespace(text))
+    odd = pc.invert(pc.match_substring_regex(text, DBN_CANONICAL))
+    if pc.any(odd).as_py():
+        parts = pc.extract_regex(pc.if_else(odd, text, pa.scalar(None, text.type)), DBN_PARTS)
+        canonical = pc.binary_join_element_wise(
+            pc.utf8_lpad(pc.struct_field(parts, "district"), 2, "0"),
+            pc.struct_field(parts, "borough"),
+            pc.utf8_lpad(pc.struct_field(parts, "number"), 3, "0"),
+            pa.scalar("", text.type),
+        )
+        text = pc.coalesce(canonical, text)
+    text = pc.if_else(pc.equal(text, ""), pa.scalar(None, text.type), text)
+    return pd.Series(text.to_pandas(), index=values.index, dtype="str")
+
+
+def _labels(values, normalize=None):
+    """
+    (distinct raw values, the same normalized, per-row codes into them)
+    for a column; code -1 marks a missing value.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # Only the categories these rows use (a year's slice of a shared dictionary)
+        codes = values.cat.codes.to_numpy()
+        used = np.flatnonzero(np.bincount(codes[codes >= 0], minlength=len(values.cat.categories)))
+        lookup = np.full(len(values.cat.categories) + 1, -1, dtype="int64")
+        lookup[used] = np.arange(len(used))
+        raw = pd.Series(values.cat.categories[used]).astype("str")
+        codes = lookup[codes]
+    else:
+        codes, uniques = pd.factorize(values)
+        raw = pd.Series(uniques).astype("str")
+    if normalize:
+        labels = normalize(raw)
+    else:
+        labels = raw.str.strip()
+        labels = labels.mask(labels == "")
+    return raw, labels, codes
+
+
+def shared_codes(left, right, normalize=None):
+    """
+    Integer codes for two columns in one shared space, after `normalize`
+    (default: strip). Returns (left_codes, right_codes, labels, rewritten):
+    codes index `labels`, -1 marks missing values, and `rewritten` holds a
+    bool array per side marking rows whose value normalization changed.
+    """
+    sides = [_labels(left, normalize), _labels(right, normalize)]
+    codes, labels = pd.factorize(pd.concat([side[1] for side in sides], ignore_index=True))
+    out, rewritten, offset = [], [], 0
+    for raw, side_labels, row_codes in sides:
+        # Index -1 (missing) lands on the appended sentinel
+        lookup = np.r_[codes[offset:offset + len(side_labels)], -1]
+        changed = np.r_[
+            (raw.to_numpy(dtype=object) != side_labels.to_numpy(dtype=object)) & side_labels.notna().to_numpy(),
+            False,
+        ]
+        out.append(lookup[row_codes])
+        rewritten.append(changed[row_codes])
+        offset += len(side_labels)
+    return out[0], out[1], np.asarray(labels, dtype=object), rewritten
+
+
+def cardinality(left_dupes, right_dupes):
+    """"one-to-one" / "many-to-one" / ... from whether matched keys repeat on each side."""
+    return f"{'many' if left_dupes else 'one'}-to-{'many' if right_dupes else 'one'}"
+
+
+def hash_join(left_keys, right_keys, n_keys, n_years, year_labels, dbn_labels):
+    """
+    Inner join of two integer key arrays (dbn_code * n_years + year_code,
+    -1 for missing). Returns (left_positions, right_positions, per-year
+    diagnostics). Every left row with a partner is kept, in order; a
+    duplicated right key contributes its last row.
+    """
+    left_ok, right_ok = left_keys >= 0, right_keys >= 0
+    left_count = np.bincount(left_keys[left_ok], minlength=n_keys)
+    right_count = np.bincount(right_keys[right_ok], minlength=n_keys)
+    last_right = np.full(n_keys, -1, dtype="int64")
+    np.maximum.at(last_right, right_keys[right_ok], np.flatnonzero(right_ok))
+
+    partner = np.full(len(left_keys), -1, dtype="int64")
+    partner[left_ok] = last_right[left_keys[left_ok]]
+    left_positions = np.flatnonzero(partner >= 0)
+    right_positions = partner[left_positions]
+
+    # Per-year tallies: one bincount over the key space, folded by year
+    year_of_key = np.arange(n_keys) % n_years
+    on_left, on_right = left_count > 0, right_count > 0
+
+    def per_year(mask):
+        return np.bincount(year_of_key[mask], minlength=n_years)
+
+    tallies = {
+        "unmatched_left": per_year(on_left & ~on_right),
+        "unmatched_right": per_year(on_right & ~on_left),
+        "duplicate_left": per_year(left_count > 1),
+        "duplicate_right": per_year(right_count > 1),
+        "matched_keys": per_year(on_left & on_right),
+        "matched_duplicate_left": per_year(on_right & (left_count > 1)),
+        "matched_duplicate_right": per_year(on_left & (right_count > 1)),
+    }
+    joined = np.bincount(left_keys[left_positions] % n_years, minlength=n_years)
+
+    years = {}
+    for y, label in enumerate(year_labels):
+        def sample(mask):
+            keys = np.flatnonzero(mask & (year_of_key == y))[:SAMPLE_KEYS]
+            return [dbn_labels[k // n_years] for k in keys]
+
+        years[label] = {
+            "joined_rows": int(joined[y]),
+            "matched_keys": int(tallies["matched_keys"][y]),
+            "unmatched_left": int(tallies["unmatched_left"][y]),
+            "unmatched_right": int(tallies["unmatched_right"][y]),
+            "duplicate_left": int(tallies["duplicate_left"][y]),
+            "duplicate_right": int(tallies["duplicate_right"][y]),
+            "cardinality": cardinality(tallies["matched_duplicate_left"][y], tallies["matched_duplicate_right"][y]),
+            "unmatched_left_sample": sample(on_left & ~on_right),
+            "unmatched_right_sample": sample(on_right & ~on_left),
+        }
+    return left_positions, right_positions, years
+
+
+def join_years(left, right, left_on=("dbn", "school_year"), right_on=("dbn", "year"),
+               right_columns=None, suffixes=("_x", "_y")):
+    """
+    Inner-join `left` and `right` on normalized (dbn, year) over all years at once.
+
+    Output columns follow DataFrame.merge: left's columns, then right's
+    (`right_columns`, default all) minus key columns named the same as
+    left's, with `suffixes` on any other shared name. Output rows keep
+    left's order and values. Returns (joined, diagnostics).
+    """
+    start = time.perf_counter()
+    left_dbn, right_dbn = left_on[0], right_on[0]
+    left_year, right_year = left_on[1], right_on[1]
+    left_dbns, right_dbns, dbn_labels, rewritten = shared_codes(left[left_dbn], right[right_dbn], normalize_dbn)
+    left_years, right_years, year_labels, _ = shared_codes(left[left_year], right[right_year])
+    n_years = max(len(year_labels), 1)
+    n_keys = len(dbn_labels) * n_years
+
+    def keys(dbns, years):
+        return np.where((dbns >= 0) & (years >= 0), dbns.astype("int64") * n_years + years, -1)
+
+    left_keys, right_keys = keys(left_dbns, left_years), keys(right_dbns, right_years)
+    left_positions, right_positions, years = hash_join(
+        left_keys, right_keys, n_keys, n_years, list(year_labels), dbn_labels,
+    )
+    def per_year(years_, mask=None):
+        ok = years_ >= 0 if mask is None else (years_ >= 0) & mask
+        return np.bincount(years_[ok], minlength=n_years)
+
+    counts = {
+        "left_rows": per_year(left_years),
+        "right_rows": per_year(right_years),
+        "missing_key_left": per_year(left_years, left_dbns < 0),
+        "missing_key_right": per_year(right_years, right_dbns < 0),
+        "normalized_left": per_year(left_years, rewritten[0]),
+        "normalized_right": per_year(right_years, rewritten[1]),
+    }
+    for y, label in enumerate(year_labels):
+        years[label] = {**{name: int(count[y]) for name, count in counts.items()}, **years[label]}
+
+    right_columns = list(right.columns if right_columns is None else right_columns)
+    same_name = {r for l, r in zip(left_on, right_on) if l == r}
+    right_columns = [c for c in right_columns if c not in same_name]
+    overlap = set(left.columns) & set(right_columns)
+    joined = pd.concat([
+        left.iloc[left_positions].reset_index(drop=True)
+            .rename(columns={c: c + suffixes[0] for c in overlap}),
+        right[right_columns].iloc[right_positions].reset_index(drop=True)
+            .rename(columns={c: c + suffixes[1] for c in overlap}),
+    ], axis=1)
+
+    diagnostics = {
+        "left_rows": len(left),
+        "right_rows": len(right),
+        "joined_rows": len(joined),
+        "cardinality": cardinality(
+            any(y["cardinality"].startswith("many") for y in years.values()),
+            any(y["cardinality"].endswith("many") for y in years.values()),
+        ),
+        "seconds": time.perf_counter() - start,
+        "years": years,
+    }
+    return joined, diagnostics
+
+
+def year_codes(values):
+    """(year labels, per-row codes into them) for a year column; -1 for missing."""
+    _, labels, codes = _labels(values)
+    # Labels that only differed by whitespace share one code
+    label_codes, years = pd.factorize(labels)
+    return list(years), np.r_[label_codes, -1][codes]
+
+
+def year_digests(frame, column, columns=None):
+    """
+    {year: hex digest} of each year's rows (values of `columns`, default
+    all, in row order), from one vectorized hash pass over the frame.
+    """
+    years, codes = year_codes(frame[column])
+    if not years:
+        return {}
+    hashes = pd.util.hash_pandas_object(frame[list(columns or frame.columns)], index=False).to_numpy()
+    # Stable sort on the small year codes groups each year's rows, keeping row order
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(len(years) + 1))
+    return {
+        year: hashlib.blake2b(hashes[order[bounds[i]:bounds[i + 1]]].tobytes(), digest_size=16).hexdigest()
+        for i, year in enumerate(years)
+    }
+
+
+def year_rows(values, years):
+    """Bool mask of the rows of a year column whose (stripped) label is in `years`."""
+    labels, codes = year_codes(values)
+    wanted = [code for code, label in enumerate(labels) if label in set(years)]
+    return np.isin(codes, wanted)
+
+
+class YearJoin:
+    """
+    A join_years() result kept per year. update() re-joins only the years
+    whose left or right rows changed since the last update, in one pass.
+
+    Meant to be created once per process (st.cache_resource) and shared by
+    every session; frames it returns must be treated as read-only.
+    """
+
+    def __init__(self, left_on=("dbn", "school_year"), right_on=("dbn", "year"),
+                 right_columns=None, suffixes=("_x", "_y")):
+        self.left_on = left_on
+        self.right_on = right_on
+        self.right_columns = right_columns
+        self.suffixes = suffixes
+        self._years = {}  # year -> (left digest, right digest, joined rows, diagnostics)
+        self._lock = threading.Lock()
+        self.last_update = {}
+
+    def update(self, left, right):
+        """Join `left` and `right`, reusing unchanged years. Returns ({year: joined}, diagnostics)."""
+        start = time.perf_counter()
+        right_columns = list(right.columns if self.right_columns is None else self.right_columns)
+        left_digests = year_digests(left, self.left_on[1])
+        right_digests = year_digests(
+            right, self.right_on[1], list(dict.fromkeys(list(self.right_on) + right_columns)),
+        )
+        years = sorted(set(left_digests) | set(right_digests))
+
+        with self._lock:
+            stale = [
+                year for year in years
+                if self._years.get(year, (None, None))[:2] != (left_digests.get(year), right_digests.get(year))
+            ]
+            if stale:
+                joined, diagnostics = join_years(
+                    left[year_rows(left[self.left_on[1]], stale)],
+                    right[year_rows(right[self.right_on[1]], stale)],
+                    self.left_on, self.right_on, self.right_columns, self.suffixes,
+                )
+                labels, codes = year_codes(joined[self.left_on[1]])
+                for year in stale:
+                    rows = codes == (labels.index(year) if year in labels else -2)
+                    self._years[year] = (
+                        left_digests.get(year),
+                        right_digests.get(year),
+                        joined[rows].reset_index(drop=True),
+                        diagnostics["years"].get(year, {}),
+                    )
+            for year in set(self._years) - set(years):
+                del self._years[year]
+            frames = {year: self._years[year][2] for year in years}
+            self.last_update = {
+                "recomputed": stale,
+                "reused": [year for year in years if year not in stale],
+                "seconds": time.perf_counter() - start,
+                "years": {year: self._years[year][3] for year in years},
+            }
+            return frames, self.last_update
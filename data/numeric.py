@@ -0,0 +1,68 @@
+"""
+Suppression-aware numeric parsing shared by clean_data.py and snapshot.py.
+
+The raw NYC files mix plain numbers, "30.7%" percent strings, "1,234"
+thousands separators, blanks and the privacy marker "s" (5 or fewer
+students) in the same columns. parse_numeric() turns one column into
+float64 with Arrow compute kernels over the whole column (trim, drop "%"
+and "," only when present, one cast); already-numeric columns pass
+straight through. Suppressed cells come back NaN like blanks, but are also
+reported in a separate mask, because "5 or fewer" is not the same as "not
+reported". suppression_bits() packs the masks of several columns into one
+small integer column so a frame can carry them cheaply.
+"""
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+SUPPRESSED = ["s", "S"]
+BLANKS = ["", "nan", "NaN"]
+# Characters dropped before the cast: percent signs and thousands separators
+NOISE = ["%", ","]
+
+
+def parse_numeric(values):
+    """
+    Parse one column to float64. Returns (numbers, suppressed): numbers is
+    NaN for blank, suppressed and unparseable cells; suppressed is a bool
+    Series marking the "s" cells.
+    """
+    if pd.api.types.is_numeric_dtype(values.dtype):
+        return values.astype("float64"), pd.Series(False, index=values.index)
+
+    text = pa.array(values.astype("str"))
+    if isinstance(text, pa.ChunkedArray):
+        text = text.combine_chunks()
+    text = pc.utf8_trim_whitespace(text)
+    for char in NOISE:
+        if pc.any(pc.match_substring(text, char)).as_py():
+            text = pc.replace_substring(text, char, "")
+    suppressed = pc.fill_null(pc.is_in(text, value_set=pa.array(SUPPRESSED)), False)
+    missing = pc.or_(suppressed, pc.is_in(text, value_set=pa.array(BLANKS)))
+    text = pc.if_else(missing, pa.scalar(None, pa.string()), text)
+    try:
+        numbers = pc.cast(text, pa.float64()).to_numpy(zero_copy_only=False)
+    except pa.ArrowInvalid:
+        # Junk somewhere in the column: let pandas coerce it cell by cell
+        numbers = pd.to_numeric(pd.Series(text, dtype="str"), errors="coerce").to_numpy(dtype="float64")
+    return (
+        pd.Series(numbers, index=values.index),
+        pd.Series(suppressed.to_numpy(zero_copy_only=False), index=values.index),
+    )
+
+
+def suppression_bits(masks):
+    """Pack a list of bool masks into one integer Series: bit i is set where masks[i] is."""
+    dtype = "uint8" if len(masks) <= 8 else "uint16" if len(masks) <= 16 else "uint32"
+    bits = np.zeros(len(masks[0]) if masks else 0, dtype=dtype)
+    for i, mask in enumerate(masks):
+        bits |= np.asarray(mask, dtype=bool).astype(dtype) << i
+    index = masks[0].index if masks and hasattr(masks[0], "index") else None
+    return pd.Series(bits, index=index)
+
+
+def is_suppressed(bits, position):
+    """Bool mask of the column at `position` in a suppression_bits() Series."""
+    return (np.asarray(bits) >> position) & 1 == 1
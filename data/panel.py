@@ -0,0 +1,183 @@
+"""
+Dense school x year panel behind the "Trends" tab.
+
+build_panel() lays every school's yearly values out once as
+(n_schools, n_years) float32 arrays: % students in temporary housing,
+% chronically absent and enrollment, with NaN where a school did not
+report. DBNs are integer-coded by their row in the sorted `dbns` array.
+Year-over-year deltas, enrollment-weighted borough and citywide trend
+lines and the per-borough sparkline tables are all computed from those
+arrays in a few vectorized passes, so switching school or borough in the
+dashboard is a dict lookup plus a row slice, not a filter or merge.
+"""
+
+import numpy as np
+import pandas as pd
+
+from data.cleaning import BOROUGH_MAP, CITYWIDE
+
+# Panel measure -> display label
+METRICS = {
+    "housing_pct": "% Temp Housing",
+    "absent_pct": "% Chronically Absent",
+    "enrollment": "Enrollment",
+}
+# Measures averaged (enrollment-weighted) rather than summed in the trend lines
+RATES = ("housing_pct", "absent_pct")
+
+
+def scatter_cells(frame, year_column, value_column, dbn_index, year_index):
+    """One frame column laid out as a (school, year) float32 array, NaN where absent."""
+    out = np.full((len(dbn_index), len(year_index)), np.nan, dtype="float32")
+    rows = dbn_index.get_indexer(frame["dbn"])
+    cols = year_index.get_indexer(frame[year_column])
+    ok = (rows >= 0) & (cols >= 0)
+    out[rows[ok], cols[ok]] = frame[value_column].to_numpy(dtype="float32", na_value=np.nan)[ok]
+    return out
+
+
+def group_sums(values, groups, n_groups, valid):
+    """
+    Per-(group, year) sums of a (school, year) array over the `valid` cells,
+    via one bincount on group * n_years + year. Schools in group -1 are skipped.
+    """
+    n_years = values.shape[1]
+    valid = valid & (groups >= 0)[:, None]
+    keys = (groups[:, None] * n_years + np.arange(n_years))[valid]
+    sums = np.bincount(keys, weights=values[valid].astype("float64"), minlength=n_groups * n_years)
+    return sums.reshape(n_groups, n_years)
+
+
+def group_trends(values, weights, groups, n_groups):
+    """Per-(group, year) weighted means of a (school, year) array; cells missing value or weight are left out."""
+    valid = np.isfinite(values) & np.isfinite(weights)
+    num = group_sums(values * weights, groups, n_groups, valid)
+    den = group_sums(weights, groups, n_groups, valid)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(den > 0, num / den, np.nan)
+
+
+class SchoolPanel:
+    """Every school's yearly measures as dense arrays, with precomputed trends."""
+
+    def __init__(self, housing, attendance):
+        dbn_index = pd.Index(np.union1d(housing["dbn"].dropna().unique(), attendance["dbn"].dropna().unique()))
+        year_index = pd.Index(sorted(
+            set(housing["school_year"].dropna()) | set(attendance["year"].dropna())
+        ))
+        self.dbns = dbn_index.to_numpy()
+        self.years = list(year_index)
+        self.codes = {dbn: code for code, dbn in enumerate(self.dbns)}
+
+        housing_enrollment = scatter_cells(housing, "school_year", "total_students", dbn_index, year_index)
+        attendance_enrollment = scatter_cells(attendance, "year", "total_enrollment", dbn_index, year_index)
+        self.values = {
+            "housing_pct": scatter_cells(
+                housing, "school_year", "students_in_temporary_housing_1", dbn_index, year_index,
+            ),
+            "absent_pct": scatter_cells(attendance, "year", "chronically_absent_1", dbn_index, year_index),
+            # Housing enrollment where reported, otherwise the attendance file's
+            "enrollment": np.where(
+                np.isfinite(housing_enrollment), housing_enrollment, attendance_enrollment,
+            ),
+        }
+        self.deltas = {name: np.diff(values, axis=1) for name, values in self.values.items()}
+
+        # Latest reported name per school (housing names win over attendance names)
+        names = pd.concat([
+            attendance[["dbn", "year", "school_name"]].rename(columns={"year": "school_year"}),
+            housing[["dbn", "school_year", "school_name"]],
+        ], ignore_index=True).dropna()
+        names = names.sort_values("school_year", kind="stable")
+        names = names.drop_duplicates("dbn", keep="last").set_index("dbn")["school_name"]
+        self.names = names.reindex(self.dbns).fillna("").to_numpy()
+
+        borough = pd.Series(self.dbns).str[2].map(BOROUGH_MAP)
+        self.boroughs = sorted(borough.dropna().unique())
+        self.areas = self.boroughs + [CITYWIDE]
+        # Schools whose DBN has no borough letter (code -1) only count towards Citywide
+        groups = pd.Categorical(borough, categories=self.boroughs).codes.astype("int64")
+        self.borough_codes = groups
+        self.area_rows = {name: np.flatnonzero(groups == code) for code, name in enumerate(self.boroughs)}
+        self.area_rows[CITYWIDE] = np.arange(len(self.dbns))
+
+        # Trend rows follow self.areas: one per borough, then Citywide
+        citywide = np.zeros(len(self.dbns), dtype="int64")
+        weights = self.values["enrollment"]
+        reported = np.isfinite(weights)
+        self.trends = {
+            name: np.vstack([
+                group_trends(self.values[name], weights, groups, len(self.boroughs)),
+                group_trends(self.values[name], weights, citywide, 1),
+            ])
+            for name in RATES
+        }
+        self.trends["enrollment"] = np.vstack([
+            group_sums(weights, groups, len(self.boroughs), reported),
+            group_sums(weights, citywide, 1, reported),
+        ])
+        ones = np.ones_like(weights)
+        self.reporting = np.vstack([
+            group_sums(ones, groups, len(self.boroughs), reported),
+            group_sums(ones, citywide, 1, reported),
+        ]).astype("int64")
+
+        self.tables = {area: self.school_table(rows) for area, rows in self.area_rows.items()}
+
+    def school_table(self, rows):
+        """One row per school in `rows`: sparklines over all years plus latest values and YoY change."""
+        latest = len(self.years) - 1
+        table = pd.DataFrame({
+            "dbn": self.dbns[rows],
+            "school_name": self.names[rows],
+            "borough": np.array(self.boroughs + [""], dtype=object)[self.borough_codes[rows]],
+        })
+        for name in RATES:
+            values = self.values[name][rows]
+            # Sparkline cells hold one list per school; NaN years are gaps
+            table[f"{name}_trend"] = values.astype("float64").round(1).tolist()
+            table[name] = values[:, latest]
+            table[f"{name}_delta"] = self.deltas[name][rows, latest - 1] if latest else np.nan
+        table["enrollment"] = self.values["enrollment"][rows, latest]
+        return table
+
+    def area_dbns(self, area):
+        """DBNs of one borough (or CITYWIDE) in sorted order."""
+        return self.dbns[self.area_rows[area]]
+
+    def school(self, dbn):
+        """A school's name, borough and per-year arrays (views into the panel)."""
+        code = self.codes[dbn]
+        group = self.borough_codes[code]
+        school = {
+            "dbn": dbn,
+            "school_name": self.names[code],
+            "borough": self.boroughs[group] if group >= 0 else None,
+        }
+        for name, values in self.values.items():
+            school[name] = values[code]
+            school[f"{name}_delta"] = self.deltas[name][code]
+        return school
+
+    def area_trend(self, area):
+        """Enrollment-weighted rates, total enrollment and reporting schools per year for an area."""
+        row = self.areas.index(area)
+        trend = {name: values[row] for name, values in self.trends.items()}
+        trend["schools"] = self.reporting[row]
+        return trend
+
+    def nbytes(self):
+        """Bytes held by the panel's arrays."""
+        return int(
+            sum(values.nbytes for values in self.values.values())
+            + sum(values.nbytes for values in self.deltas.values())
+            + sum(values.nbytes for values in self.trends.values())
+        )
+
+    def __len__(self):
+        return len(self.dbns)
+
+
+def build_panel(housing, attendance):
+    """Build the school x year panel from the cleaned housing and attendance frames."""
+    return SchoolPanel(housing, attendance)
@@ -0,0 +1,118 @@
+"""
+Per-year partition index and a bounded LRU cache for derived frames.
+
+YearPartitions sorts a frame by its year column once and records where each
+year starts and stops, so selecting a year is a positional slice of that
+partition (no boolean mask over every row, no copy). LRUCache holds derived
+per-year frames such as the gap join, bounded by entry count and bytes, and
+counts hits, misses and evictions.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+class YearPartitions:
+    """Row ranges of a frame grouped by the values of one column."""
+
+    def __init__(self, frame, column):
+        self.column = column
+        self.frame = frame.sort_values(column, kind="stable").reset_index(drop=True)
+        values = self.frame[column].to_numpy()
+        # Partition boundaries are wherever the sorted key changes
+        starts = np.flatnonzero(np.r_[True, values[1:] != values[:-1]]) if len(values) else []
+        stops = list(starts[1:]) + [len(values)]
+        self.bounds = {values[start]: (start, stop) for start, stop in zip(starts, stops)}
+
+    def years(self):
+        """Sorted partition keys (missing years excluded)."""
+        return sorted(key for key in self.bounds if key == key)
+
+    def get(self, year):
+        """Rows for one year as a positional slice; empty frame if the year is absent."""
+        start, stop = self.bounds.get(year, (0, 0))
+        return self.frame.iloc[start:stop]
+
+    def __contains__(self, year):
+        return year in self.bounds
+
+    def __len__(self):
+        return len(self.frame)
+
+
+def frame_nbytes(value):
+    """Approximate in-memory size of a frame, or a tuple of frames."""
+    if isinstance(value, (tuple, list)):
+        return sum(frame_nbytes(item) for item in value)
+    if hasattr(value, "memory_usage"):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    return 0
+
+
+class LRUCache:
+    """
+    Thread-safe LRU cache bounded by entry count and total bytes.
+
+    Meant to be created once per process (st.cache_resource) and shared by
+    every session; values must be treated as read-only by callers.
+    """
+
+    def __init__(self, max_entries=8, max_bytes=64 * 1024 * 1024, sizeof=frame_nbytes):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for key, computing and storing it on a miss."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            self.misses += 1
+        # Compute outside the lock so slow builds don't block other keys
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def put(self, key, value):
+        """Insert or replace an entry, evicting least-recently-used ones to fit."""
+        size = self.sizeof(value)
+        with self._lock:
+            if key in self._entries:
+                self.nbytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self.nbytes += size
+            while len(self._entries) > 1 and (
+                len(self._entries) > self.max_entries or self.nbytes > self.max_bytes
+            ):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.nbytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def stats(self):
+        """Hit/miss/eviction counters and current occupancy."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.nbytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
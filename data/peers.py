@@ -0,0 +1,244 @@
+"""
+Peer-school finder behind the "Peers" tab: schools like this one.
+
+Two schools are peers when their housing profiles are close: % students in
+temporary housing, % doubled up and enrollment (log10, so 200 vs 400
+students is as far apart as 1,000 vs 2,000). Each feature is standardized
+(mean 0, sd 1) over the rows indexed, so distances are in standard
+deviations and no one feature dominates. Chronic absenteeism is not a
+feature: it is what peers are compared on.
+
+build_peer_index() puts one or more years of Gap scatter rows into a
+k-d tree written in NumPy. The build splits each node at the median of its
+widest dimension (argpartition, O(n log n) overall) until nodes hold at
+most LEAF_SIZE rows, and stores the rows in leaf order with each node's
+bounding box. Queries walk it best-first:
+
+  nearest(point, k)      k nearest rows, nodes visited in order of their
+                         box distance and pruned once that exceeds the
+                         current k-th distance
+  within(point, radius)  every row within `radius`, pruning boxes farther
+
+each leaf's rows compared in one vectorized pass, so a query touches a few
+leaves rather than every school. peer_table() adds how each peer's
+absenteeism compares with the school's and with the peer group.
+"""
+
+import heapq
+
+import numpy as np
+
+from data.gap import ABSENT_PCT, HOUSING_PCT
+
+# Rows per leaf, compared in one vectorized pass; big leaves mean fewer
+# Python-level node visits, which cost more than the extra arithmetic
+LEAF_SIZE = 256
+# A peer this many standard deviations from the peer group's absenteeism is flagged
+OUTLIER_Z = 2.0
+
+
+def peer_features(frame):
+    """The (n, 3) unstandardized feature matrix of Gap scatter rows (NaN where a count is suppressed)."""
+    students = frame["total_students"].to_numpy(dtype="float64")
+    with np.errstate(invalid="ignore", divide="ignore"):
+        doubled = np.where(students > 0, 100.0 * frame["doubled_up"].to_numpy(dtype="float64") / students, np.nan)
+        enrollment = np.where(students > 0, np.log10(students), np.nan)
+    return np.column_stack([frame[HOUSING_PCT].to_numpy(dtype="float64"), doubled, enrollment])
+
+
+class KDTree:
+    """
+    A k-d tree over the rows of `points` (n, d). Node arrays are indexed by
+    node id (0 is the root); a leaf's rows are order[start:stop].
+    """
+
+    def __init__(self, points, leaf_size=LEAF_SIZE):
+        points = np.asarray(points, dtype="float64")
+        n, dims = points.shape
+        order = np.arange(n)
+        starts, stops, lows, highs, children = [], [], [], [], []
+
+        stack = [(0, n, -1, 0)] if n else []
+        while stack:
+            start, stop, parent, side = stack.pop()
+            node = len(starts)
+            if parent >= 0:
+                children[parent][side] = node
+            block = points[order[start:stop]]
+            low, high = block.min(axis=0), block.max(axis=0)
+            starts.append(start)
+            stops.append(stop)
+            lows.append(low)
+            highs.append(high)
+            children.append([-1, -1])
+            if stop - start <= leaf_size:
+                continue
+            # Median split on the widest dimension
+            dim = int(np.argmax(high - low))
+            middle = (stop - start) // 2
+            split = np.argpartition(block[:, dim], middle)
+            order[start:stop] = order[start:stop][split]
+            stack.append((start + middle, stop, node, 1))
+            stack.append((start, start + middle, node, 0))
+
+        self.order = order
+        self.points = points[order]
+        self.starts, self.stops = np.array(starts), np.array(stops)
+        self.lows, self.highs = np.array(lows).reshape(-1, dims), np.array(highs).reshape(-1, dims)
+        self.children = np.array(children, dtype="int64").reshape(-1, 2)
+
+    def box_distance(self, node, point):
+        """Squared distance from `point` to node's bounding box (0 inside it)."""
+        gap = np.maximum(self.lows[node] - point, 0.0) + np.maximum(point - self.highs[node], 0.0)
+        return float(gap @ gap)
+
+    def leaves(self, point, bound):
+        """
+        Generator of leaf ids in order of box distance from `point`; send() it
+        the current squared search bound and it stops once every remaining
+        box is farther.
+        """
+        heap = [(self.box_distance(0, point), 0)] if len(self.starts) else []
+        while heap:
+            distance, node = heapq.heappop(heap)
+            if distance > bound:
+                return
+            left, right = self.children[node]
+            if left < 0:
+                sent = yield node
+                bound = bound if sent is None else sent
+                continue
+            for child in (left, right):
+                child_distance = self.box_distance(child, point)
+                if child_distance <= bound:
+                    heapq.heappush(heap, (child_distance, child))
+
+    def nearest(self, point, k):
+        """(rows, distances) of the k rows nearest to `point`, nearest first."""
+        k = min(k, len(self.order))
+        if k <= 0:
+            return np.empty(0, dtype="int64"), np.empty(0)
+        found = np.empty(0, dtype="int64")
+        distances = np.empty(0)
+        bound = np.inf
+        walk = self.leaves(point, bound)
+        node = next(walk, None)
+        while node is not None:
+            start, stop = self.starts[node], self.stops[node]
+            diff = self.points[start:stop] - point
+            found = np.concatenate([found, np.arange(start, stop)])
+            distances = np.concatenate([distances, np.einsum("ij,ij->i", diff, diff)])
+            if len(found) > k:
+                keep = np.argpartition(distances, k - 1)[:k]
+                found, distances = found[keep], distances[keep]
+            if len(found) == k:
+                bound = float(distances.max())
+            try:
+                node = walk.send(bound)
+            except StopIteration:
+                node = None
+        order = np.argsort(distances, kind="stable")
+        return self.order[found[order]], np.sqrt(distances[order])
+
+    def within(self, point, radius):
+        """(rows, distances) of every row within `radius` of `point`, nearest first."""
+        bound = radius * radius
+        found, distances = [], []
+        for node in self.leaves(point, bound):
+            start, stop = self.starts[node], self.stops[node]
+            diff = self.points[start:stop] - point
+            squared = np.einsum("ij,ij->i", diff, diff)
+            inside = squared <= bound
+            found.append(np.arange(start, stop)[inside])
+            distances.append(squared[inside])
+        if not found:
+            return np.empty(0, dtype="int64"), np.empty(0)
+        found, distances = np.concatenate(found), np.concatenate(distances)
+        order = np.argsort(distances, kind="stable")
+        return self.order[found[order]], np.sqrt(distances[order])
+
+    def __len__(self):
+        return len(self.order)
+
+
+class PeerIndex:
+    """
+    Gap scatter rows (one or more years) with complete features, their
+    standardized feature matrix and a KDTree over it.
+    """
+
+    def __init__(self, frame):
+        features = peer_features(frame)
+        complete = np.isfinite(features).all(axis=1) & np.isfinite(frame[ABSENT_PCT].to_numpy(dtype="float64"))
+        self.frame = frame[complete].reset_index(drop=True)
+        self.skipped = int((~complete).sum())
+        features = features[complete]
+        self.mean = features.mean(axis=0) if len(features) else np.zeros(features.shape[1])
+        scale = features.std(axis=0) if len(features) else np.ones(features.shape[1])
+        self.scale = np.where(scale > 0, scale, 1.0)
+        self.features = (features - self.mean) / self.scale
+        self.tree = KDTree(self.features)
+        self.rows_of = self.frame.groupby("dbn", observed=True).indices
+        # Indexed schools in DBN order, each with its latest name
+        self.dbns = np.array(sorted(self.rows_of), dtype=object)
+        self.codes = {dbn: code for code, dbn in enumerate(self.dbns)}
+        latest = np.array([self.rows_of[dbn][-1] for dbn in self.dbns], dtype="int64")
+        self.names = self.frame["school_name_housing"].to_numpy()[latest]
+
+    def rows(self, dbn):
+        """Row numbers of a school (one per indexed year), or an empty array."""
+        return self.rows_of.get(dbn, np.empty(0, dtype="int64"))
+
+    def school_row(self, dbn, year):
+        """A school's row for `year` when indexed, otherwise its latest row."""
+        rows = self.rows(dbn)
+        years = self.frame["school_year"].to_numpy()[rows]
+        return int(rows[years == year][0]) if (years == year).any() else int(rows[-1])
+
+    def peers(self, row, k=None, radius=None):
+        """
+        (rows, distances) of a row's peers, nearest first: its k nearest rows,
+        or every row within `radius` standard deviations. Rows of the same
+        school (other years) are left out.
+        """
+        own = set(self.rows(self.frame["dbn"].iat[row]).tolist())
+        point = self.features[row]
+        if radius is not None:
+            rows, distances = self.tree.within(point, radius)
+        else:
+            rows, distances = self.tree.nearest(point, k + len(own))
+        keep = np.array([found not in own for found in rows.tolist()], dtype=bool)
+        rows, distances = rows[keep], distances[keep]
+        return (rows, distances) if radius is not None else (rows[:k], distances[:k])
+
+    def nbytes(self):
+        """Bytes held by the feature matrix and tree arrays (not the frame)."""
+        tree = self.tree
+        return int(self.features.nbytes + tree.points.nbytes + tree.order.nbytes
+                   + tree.lows.nbytes + tree.highs.nbytes + tree.children.nbytes)
+
+    def __len__(self):
+        return len(self.frame)
+
+
+def peer_table(index, row, rows, distances):
+    """
+    The peers of `row` as a table: identity, features, absenteeism, its gap
+    to the school's (percentage points) and its z-score within the peer
+    group, flagged as an outlier at |z| >= OUTLIER_Z.
+    """
+    columns = ["dbn", "school_name_housing", "borough", "school_year", HOUSING_PCT, "total_students", ABSENT_PCT]
+    table = index.frame.iloc[rows][columns].reset_index(drop=True)
+    table.insert(5, "pct_doubled_up", peer_features(index.frame.iloc[rows])[:, 1])
+    table["distance"] = distances
+    absent = table[ABSENT_PCT].to_numpy(dtype="float64")
+    table["absent_gap"] = absent - float(index.frame[ABSENT_PCT].iat[row])
+    spread = absent.std() if len(absent) > 1 else 0.0
+    table["absent_z"] = (absent - absent.mean()) / spread if spread > 0 else 0.0
+    table["outlier"] = table["absent_z"].abs() >= OUTLIER_Z
+    return table
+
+
+def build_peer_index(frame):
+    """Index Gap scatter rows (one or more years) for peer queries."""
+    return PeerIndex(frame)
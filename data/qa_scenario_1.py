@@ -1,32 +1,24 @@
 #!/usr/bin/env python3
-"""QA Scenario 1: Verify merged dataset shape and dtypes"""
+"""QA Scenario 1: Verify merged dataset shape and dtypes (via data/validate.py)"""
 
-import csv
+import os
+import sys
 
-# Load merged CSV
-with open('data/merged.csv', 'r') as f:
-    reader = csv.DictReader(f)
-    data = list(reader)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-print(f'ROWS:{len(data)}')
+from data.clean_data import read_csv
+from data.validate import MERGED_SPEC, validate_frame
+
+merged = read_csv('data/merged.csv')
+print(f'ROWS:{len(merged)}')
 
 # Check row count
-assert len(data) > 1300, f"Expected >1300 rows, got {len(data)}"
+assert len(merged) > 1300, f"Expected >1300 rows, got {len(merged)}"
 
-# Check that key columns exist and have numeric values
-for row in data:
-    # Test pct_students_temp_housing is numeric
-    val1 = row['pct_students_temp_housing']
-    try:
-        float(val1)
-    except ValueError:
-        raise AssertionError(f"pct_students_temp_housing not numeric: {val1}")
-    
-    # Test pct_chronically_absent is numeric
-    val2 = row['pct_chronically_absent']
-    try:
-        float(val2)
-    except ValueError:
-        raise AssertionError(f"pct_chronically_absent not numeric: {val2}")
+# Key columns present, numeric and filled on every row
+report, _ = validate_frame('merged', merged, MERGED_SPEC)
+key_cols = ['pct_students_temp_housing', 'pct_chronically_absent']
+failed = [r for r in report['checks'] if r.get('column') in key_cols and not r['ok']]
+assert not failed, f"Key columns failed validation: {failed}"
 
 print('SHAPE_OK')
@@ -1,27 +1,22 @@
 #!/usr/bin/env python3
-"""QA Scenario 2: Verify no suppressed values leaked"""
+"""QA Scenario 2: Verify no suppressed values leaked (via data/validate.py)"""
 
-import csv
+import os
+import sys
 
-# Load merged CSV
-with open('data/merged.csv', 'r') as f:
-    reader = csv.DictReader(f)
-    data = list(reader)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-# Check key columns for 's' or '%' characters
-key_cols = ['pct_students_temp_housing', 'pct_chronically_absent', 
-            'n_students_temp_housing', 'total_enrollment']
+from data.clean_data import read_csv
+from data.validate import MERGED_SPEC, validate_frame
+
+merged = read_csv('data/merged.csv')
 
-for row in data:
-    for col in key_cols:
-        value = str(row[col])
-        
-        # Check for 's' (suppressed value marker)
-        if 's' in value.lower():
-            raise AssertionError(f"Found 's' in {col}: {value}")
-        
-        # Check for '%' (should be stripped)
-        if '%' in value:
-            raise AssertionError(f"Found '%' in {col}: {value}")
+# An 's' or '%' left in a key column keeps it a string column, which fails
+# its type check; NaN where it was suppressed fails the required check
+key_cols = ['pct_students_temp_housing', 'pct_chronically_absent',
+            'n_students_temp_housing', 'total_enrollment']
+report, _ = validate_frame('merged', merged, MERGED_SPEC)
+failed = [r for r in report['checks'] if r.get('column') in key_cols and not r['ok']]
+assert not failed, f"Key columns failed validation: {failed}"
 
 print('CLEAN_OK')
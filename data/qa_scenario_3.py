@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""QA Scenario 3: Verify a default refresh (fetch_data -> clean_data -> snapshot) validates end to end"""
+
+import os
+import subprocess
+import sys
+import tempfile
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, repo_root)
+sys.path.insert(0, os.path.join(repo_root, 'benchmarks'))
+
+import synthetic
+from run_suite import make_tree, standin
+
+from data.fetch_data import ATTENDANCE_COLUMNS, ATTENDANCE_FILE, csv_header
+
+with tempfile.TemporaryDirectory() as tmp:
+    # The stand-in serves every raw column; the copied tree fetches with the default projection
+    source_dir = os.path.join(tmp, 'source')
+    synthetic.generate(source_dir, scale=1, seed=0)
+    tree = os.path.join(tmp, 'tree')
+    os.makedirs(tree)
+    make_tree(tree)
+
+    def run(*args):
+        result = subprocess.run([sys.executable, *args], cwd=tree, capture_output=True, text=True)
+        assert result.returncode == 0, f"{' '.join(args)} exited {result.returncode}:\n{result.stdout[-2000:]}{result.stderr[-2000:]}"
+        return result.stdout
+
+    # The refresh rebuilds and validates merged.csv and the snapshot itself
+    with standin(source_dir) as base_url:
+        output = run(os.path.join('data', 'fetch_data.py'), '--full', '--base-url', base_url)
+    assert 'Validated merged' in output and 'Validated attendance' in output, output[-2000:]
+
+    header = csv_header(os.path.join(tree, 'data', ATTENDANCE_FILE))
+    assert header == ATTENDANCE_COLUMNS, f"Expected the default projection {ATTENDANCE_COLUMNS}, got {header}"
+
+    # Run on their own, both steps validate again and exit non-zero on any failure
+    run(os.path.join('data', 'clean_data.py'))
+    run(os.path.join('data', 'snapshot.py'))
+
+print('REFRESH_OK')
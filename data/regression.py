@@ -0,0 +1,175 @@
+"""
+Closed-form simple linear regression for "The Gap" scatter.
+
+Replaces Plotly's trendline="ols", which imports statsmodels and fits a
+full model on every render. fit_line() computes slope, intercept, r² and
+the pieces needed for confidence bands from a handful of NumPy sums;
+fit_groups() fits the overall trend plus one line per borough.
+"""
+
+import math
+from statistics import NormalDist
+
+import numpy as np
+
+# Points along x used to draw the curved confidence band
+BAND_POINTS = 50
+
+# From this many degrees of freedom on, the Cornish-Fisher expansion alone is
+# within 1e-13 (relative) of the exact quantile; below it, it is refined on the exact CDF
+EXACT_T_BELOW = 1000
+
+
+def t_upper_tail(t, dof):
+    """
+    P(T > t) for t >= 0 and an integer dof, from the exact finite series
+    in theta = atan(t / sqrt(dof)) (Abramowitz & Stegun 26.7.3-4).
+    """
+    theta = math.atan(t / math.sqrt(dof))
+    cos2 = math.cos(theta) ** 2
+    term = total = 1.0
+    if dof % 2:
+        for k in range(3, dof - 1, 2):
+            term *= cos2 * (k - 1) / k
+            total += term
+        inside = 2 / math.pi * (theta + (math.sin(theta) * math.cos(theta) * total if dof > 1 else 0.0))
+    else:
+        for k in range(2, dof - 1, 2):
+            term *= cos2 * (k - 1) / k
+            total += term
+        inside = math.sin(theta) * total
+    return (1 - inside) / 2
+
+
+def t_density(t, dof):
+    """Student-t density at t."""
+    log_norm = math.lgamma((dof + 1) / 2) - math.lgamma(dof / 2) - 0.5 * math.log(dof * math.pi)
+    return math.exp(log_norm - (dof + 1) / 2 * math.log1p(t * t / dof))
+
+
+def cornish_fisher(p, dof):
+    """Student-t quantile from the Cornish-Fisher expansion around the normal quantile."""
+    z = NormalDist().inv_cdf(p)
+    v = float(dof)
+    return (
+        z
+        + (z**3 + z) / (4 * v)
+        + (5 * z**5 + 16 * z**3 + 3 * z) / (96 * v**2)
+        + (3 * z**7 + 19 * z**5 + 17 * z**3 - 15 * z) / (384 * v**3)
+        + (79 * z**9 + 776 * z**7 + 1482 * z**5 - 1920 * z**3 - 945 * z) / (92160 * v**4)
+    )
+
+
+def t_quantile(p, dof):
+    """
+    Student-t quantile for an integer dof >= 1, without SciPy. Below
+    EXACT_T_BELOW degrees of freedom the Cornish-Fisher estimate is refined
+    by Newton steps on the exact CDF (t_upper_tail), falling back to
+    bisection whenever a step would leave the bracket; above it the
+    expansion is used as is. Measured against scipy.stats.t.ppf for dof
+    1..5000 and 1e-4 <= p <= 0.9999 with |p - 0.5| >= 0.1, the relative
+    error stays below 2e-12.
+    """
+    if dof >= EXACT_T_BELOW:
+        return cornish_fisher(p, dof)
+    tail = min(p, 1 - p)
+    if tail == 0.5:
+        return 0.0
+    low, high = 0.0, math.inf
+    t = max(cornish_fisher(1 - tail, dof), 1e-3)
+    for _ in range(100):
+        excess = t_upper_tail(t, dof) - tail
+        if excess > 0:
+            low = t
+        else:
+            high = t
+        step = t + excess / t_density(t, dof)
+        if not low < step < high:
+            step = (low + high) / 2 if high < math.inf else 2 * t
+        if abs(step - t) <= 1e-15 * step:
+            t = step
+            break
+        t = step
+    return t if p > 0.5 else -t
+
+
+def fit_line(x, y):
+    """
+    Ordinary least squares y = intercept + slope * x over the finite pairs.
+
+    Returns a dict with n, slope, intercept, r2, slope_se and the sums that
+    confidence_band() needs, or None when fewer than 3 points (or no spread
+    in x) leave the fit undefined.
+    """
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    mask = np.isfinite(x) & np.isfinite(y)
+    x, y = x[mask], y[mask]
+    n = len(x)
+    if n < 3:
+        return None
+    x_mean, y_mean = x.mean(), y.mean()
+    dx, dy = x - x_mean, y - y_mean
+    sxx = float(dx @ dx)
+    if sxx == 0:
+        return None
+    slope = float(dx @ dy) / sxx
+    intercept = float(y_mean - slope * x_mean)
+    resid = dy - slope * dx
+    ss_res = float(resid @ resid)
+    ss_tot = float(dy @ dy)
+    dof = n - 2
+    s2 = ss_res / dof
+    return {
+        "n": n,
+        "slope": slope,
+        "intercept": intercept,
+        "r2": 1 - ss_res / ss_tot if ss_tot else float("nan"),
+        "slope_se": float(np.sqrt(s2 / sxx)),
+        "x_mean": float(x_mean),
+        "sxx": sxx,
+        "s2": s2,
+        "dof": dof,
+        "x_min": float(x.min()),
+        "x_max": float(x.max()),
+    }
+
+
+def predict(fit, xs):
+    """Fitted values at xs."""
+    return fit["intercept"] + fit["slope"] * np.asarray(xs, dtype="float64")
+
+
+def confidence_band(fit, xs, level=0.95):
+    """
+    Confidence interval for the mean response at xs.
+
+    Returns (yhat, lower, upper), the same as statsmodels'
+    get_prediction(...).summary_frame() mean / mean_ci_lower / mean_ci_upper.
+    """
+    xs = np.asarray(xs, dtype="float64")
+    yhat = predict(fit, xs)
+    se = np.sqrt(fit["s2"] * (1 / fit["n"] + (xs - fit["x_mean"]) ** 2 / fit["sxx"]))
+    half = t_quantile(1 - (1 - level) / 2, fit["dof"]) * se
+    return yhat, yhat - half, yhat + half
+
+
+def fit_groups(frame, x, y, group, level=0.95):
+    """
+    Overall fit (with a confidence band) plus one fit per group value.
+
+    Returns {"overall": fit or None, "band": {"x", "y", "lower", "upper"} or
+    None, "groups": {value: fit}}; groups with too few points are left out.
+    """
+    overall = fit_line(frame[x], frame[y])
+    band = None
+    if overall is not None:
+        xs = np.linspace(overall["x_min"], overall["x_max"], BAND_POINTS)
+        yhat, lower, upper = confidence_band(overall, xs, level)
+        band = {"x": xs, "y": yhat, "lower": lower, "upper": upper, "level": level}
+    groups = {}
+    for value, rows in frame.groupby(group, sort=True):
+        fit = fit_line(rows[x], rows[y])
+        if fit is not None:
+            groups[value] = fit
+    return {"overall": overall, "band": band, "groups": groups}
@@ -0,0 +1,236 @@
+"""
+Borough -> district -> school rollup behind the Scale tab's drill-down.
+
+A DBN's first two digits are the community school district and its third
+character the borough, so "07X" (district 7, Bronx) is a district node.
+Citywide districts such as 75 (special education) and 79 (alternative
+schools) run schools in every borough, so they appear once per borough:
+75K, 75M, ...
+
+build_rollup() starts from the school x year panel (data/panel.py) plus a
+few additive housing counts laid out the same way, sums the schools into
+districts with one bincount per measure, then the districts into boroughs
+and Citywide the same way. Each level keeps, per node and year:
+
+  counts   schools reporting, enrollment, students in temporary housing,
+           doubled up, DHS and non-DHS shelter (sums)
+  rates    % temporary housing and % chronically absent, weighted by
+           enrollment (sum of pct x enrollment over sum of enrollment, kept
+           as numerator/denominator so the level above is another sum)
+
+and integer parent codes plus each parent's range of children, so moving
+up or down a level is an index lookup and a slice, not a groupby over
+school rows.
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+from data.panel import CITYWIDE, RATES, group_sums, scatter_cells
+from data.cleaning import BOROUGH_MAP
+
+LEVELS = ("city", "borough", "district", "school")
+
+# Rollup count -> cleaned housing column (summed over schools)
+COUNTS = {
+    "enrollment": "total_students",
+    "temp_housing": "students_in_temporary_housing",
+    "doubled_up": "doubled_up",
+    "dhs_shelter": "residing_in_dhs_shelter",
+    "non_dhs_shelter": "residing_in_non_dhs_shelter",
+}
+
+# Table column -> display label for the dashboard
+LABELS = {
+    "name": "Name",
+    "schools": "Schools",
+    "enrollment": "Enrollment",
+    "temp_housing": "Students in Temp Housing",
+    "housing_pct": "% Temp Housing",
+    "absent_pct": "% Chronically Absent",
+    "doubled_up": "Doubled Up",
+    "dhs_shelter": "DHS Shelter",
+    "non_dhs_shelter": "Non-DHS Shelter",
+}
+
+
+def district_label(key):
+    """'07X' -> 'District 7'."""
+    return f"District {int(key[:2])}" if key[:2].isdigit() else key
+
+
+class Level:
+    """
+    One level of the rollup: node keys and names, each node's parent code
+    in the level above, and (n_nodes, n_years) arrays of summed counts and
+    rate numerators / denominators. Node codes index every array.
+    """
+
+    def __init__(self, name, keys, names, parents, sums):
+        self.name = name
+        self.keys = np.asarray(keys, dtype=object)
+        self.names = np.asarray(names, dtype=object)
+        self.parents = np.asarray(parents, dtype="int64")
+        self.sums = sums
+        self.codes = {key: code for code, key in enumerate(self.keys)}
+        # Node codes grouped by parent (sorted by key within a parent), and each parent's range
+        self.by_parent = np.lexsort((self.keys.astype(str), self.parents))
+
+    def child_ranges(self, n_parents):
+        """(start, stop) into by_parent for each parent code."""
+        parents = self.parents[self.by_parent]
+        return np.stack([
+            np.searchsorted(parents, np.arange(n_parents), side="left"),
+            np.searchsorted(parents, np.arange(n_parents), side="right"),
+        ], axis=1)
+
+    def rolled_up(self, name, keys, names, parents):
+        """The level above: this level's sums added up per parent code (nodes without one skipped)."""
+        sums = {
+            measure: group_sums(values, self.parents, len(keys), np.ones(values.shape, dtype=bool))
+            for measure, values in self.sums.items()
+        }
+        return Level(name, keys, names, parents, sums)
+
+    def __len__(self):
+        return len(self.keys)
+
+
+class Rollup:
+    """Citywide -> borough -> district -> school aggregates for every year."""
+
+    def __init__(self, panel, housing):
+        self.years = list(panel.years)
+        year_index = pd.Index(self.years)
+        dbn_index = pd.Index(panel.dbns)
+
+        # School level: panel rates (and their enrollment weights) plus housing counts
+        weights = panel.values["enrollment"].astype("float64")
+        sums = {}
+        for rate in RATES:
+            values = panel.values[rate].astype("float64")
+            valid = np.isfinite(values) & np.isfinite(weights)
+            sums[f"{rate}_num"] = np.where(valid, values * weights, 0.0)
+            sums[f"{rate}_den"] = np.where(valid, weights, 0.0)
+        for count, column in COUNTS.items():
+            values = scatter_cells(housing, "school_year", column, dbn_index, year_index).astype("float64")
+            sums[count] = np.nan_to_num(values)
+            if count == "enrollment":
+                sums["schools"] = np.isfinite(values).astype("float64")
+
+        # A school's district is its DBN prefix ("07X"), a district's borough its letter
+        prefixes = pd.Series(panel.dbns, dtype="object").str[:3].to_numpy(dtype=str)
+        districts, school_district = np.unique(prefixes, return_inverse=True)
+        boroughs = list(panel.boroughs)
+        district_borough = pd.Categorical(
+            pd.Series(districts).str[2].map(BOROUGH_MAP), categories=boroughs,
+        ).codes.astype("int64")
+
+        school = Level("school", panel.dbns, panel.names, school_district, sums)
+        district = school.rolled_up(
+            "district", districts, [district_label(key) for key in districts], district_borough,
+        )
+        borough = district.rolled_up("borough", boroughs, boroughs, np.zeros(len(boroughs), dtype="int64"))
+        # Citywide sums districts directly, so districts without a known borough still count
+        city = Level("city", [CITYWIDE], [CITYWIDE], [-1], {
+            measure: group_sums(values, np.zeros(len(district), dtype="int64"), 1, np.ones(values.shape, dtype=bool))
+            for measure, values in district.sums.items()
+        })
+        self.levels = {"city": city, "borough": borough, "district": district, "school": school}
+
+        # Child ranges per parent, by parent level name
+        self.children_of = {
+            parent: self.levels[child].child_ranges(len(self.levels[parent]))
+            for parent, child in zip(LEVELS, LEVELS[1:])
+        }
+        self.measures = {level: self.finish(self.levels[level]) for level in LEVELS}
+        # (child level, year) -> (frame of that level's reported nodes grouped by parent,
+        # each parent's row range), built on first use
+        self._tables = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def finish(level):
+        """Counts and enrollment-weighted rates, (n_nodes, n_years) float64 per measure."""
+        measures = {name: level.sums[name] for name in ("schools", *COUNTS)}
+        with np.errstate(invalid="ignore", divide="ignore"):
+            for rate in RATES:
+                den = level.sums[f"{rate}_den"]
+                measures[rate] = np.where(den > 0, level.sums[f"{rate}_num"] / den, np.nan)
+        return measures
+
+    def child_level(self, level):
+        """Name of the level below `level`, or None for schools."""
+        position = LEVELS.index(level)
+        return LEVELS[position + 1] if position + 1 < len(LEVELS) else None
+
+    def parent(self, level, key):
+        """(parent level, parent key) of a node, or None for Citywide / nodes without a parent."""
+        position = LEVELS.index(level)
+        code = self.levels[level].parents[self.levels[level].codes[key]]
+        if position == 0 or code < 0:
+            return None
+        above = self.levels[LEVELS[position - 1]]
+        return above.name, above.keys[code]
+
+    def child_codes(self, level, key):
+        """Codes of a node's children in the level below, sorted by key."""
+        start, stop = self.children_of[level][self.levels[level].codes[key]]
+        return self.levels[self.child_level(level)].by_parent[start:stop]
+
+    def children(self, level, key):
+        """Keys of a node's children, sorted."""
+        return self.levels[self.child_level(level)].keys[self.child_codes(level, key)]
+
+    def level_table(self, level, year):
+        """
+        Every node of `level` with something reported in `year`, grouped by
+        parent (sorted by key within a parent), and each parent's row range.
+        """
+        with self._lock:
+            if (level, year) in self._tables:
+                return self._tables[level, year]
+        nodes, column = self.levels[level], self.years.index(year)
+        order = nodes.by_parent
+        frame = pd.DataFrame({"key": nodes.keys[order], "name": nodes.names[order]})
+        for name, values in self.measures[level].items():
+            frame[name] = values[order, column]
+        reported = ((frame["schools"] > 0) | frame["absent_pct"].notna()).to_numpy()
+        parents = nodes.parents[order][reported]
+        n_parents = len(self.levels[LEVELS[LEVELS.index(level) - 1]])
+        ranges = np.stack([
+            np.searchsorted(parents, np.arange(n_parents), side="left"),
+            np.searchsorted(parents, np.arange(n_parents), side="right"),
+        ], axis=1)
+        built = (frame[reported].reset_index(drop=True), ranges)
+        with self._lock:
+            return self._tables.setdefault((level, year), built)
+
+    def table(self, level, key, year):
+        """
+        One row per child of (level, key) for school year `year`: key, name,
+        counts and rates; children with nothing reported that year are left
+        out. A row slice of a shared frame, so treat it as read-only.
+        """
+        frame, ranges = self.level_table(self.child_level(level), year)
+        start, stop = ranges[self.levels[level].codes[key]]
+        return frame.iloc[start:stop]
+
+    def node(self, level, key):
+        """A node's name and per-year measures (arrays over self.years)."""
+        code = self.levels[level].codes[key]
+        node = {"level": level, "key": key, "name": self.levels[level].names[code]}
+        node.update({name: values[code] for name, values in self.measures[level].items()})
+        return node
+
+    def nbytes(self):
+        """Bytes held by the per-level arrays."""
+        return int(sum(values.nbytes for measures in self.measures.values() for values in measures.values())
+                   + sum(values.nbytes for level in self.levels.values() for values in level.sums.values()))
+
+
+def build_rollup(panel, housing):
+    """Build the borough -> district -> school rollup from the panel and cleaned housing."""
+    return Rollup(panel, housing)
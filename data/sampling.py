@@ -0,0 +1,124 @@
+"""
+Density-preserving downsampling for large scatter plots.
+
+The all-years Gap scatter can hold far more points than a browser needs to
+draw. density_sample() bins points into a hexagonal grid and keeps a random
+sample from every occupied cell in proportion to how full it is, so dense
+regions stay dense, sparse outliers are never dropped, and the number of
+points sent to the browser is capped whatever the input size. rows_near()
+and rows_in_box() go back to the full-resolution rows around a selection.
+
+Hover cannot do the same: Streamlit reports clicks and box selections to
+the server but not hover, and the browser only holds the sample. Hovering
+a sampled point shows that one row and its weight, and the full-resolution
+rows near it are only available once the point is selected.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Above this many points the scatter is downsampled before it is drawn
+MAX_POINTS = 10_000
+
+# Hexagons across the x range; about 0.6x as many rows of them along y
+GRIDSIZE = 80
+
+
+def extent(x, y):
+    """(xmin, xmax, ymin, ymax) of the finite points, padded when flat."""
+    xmin, xmax, ymin, ymax = float(x.min()), float(x.max()), float(y.min()), float(y.max())
+    if xmax == xmin:
+        xmax = xmin + 1.0
+    if ymax == ymin:
+        ymax = ymin + 1.0
+    return xmin, xmax, ymin, ymax
+
+
+def hex_cells(x, y, gridsize=GRIDSIZE, bounds=None):
+    """
+    Hexagonal cell id of every (x, y) point.
+
+    Same lattice as matplotlib's hexbin: two offset rectangular grids, each
+    point assigned to the nearer centre. Fully vectorized.
+    """
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    xmin, xmax, ymin, ymax = bounds or extent(x, y)
+    nx = gridsize
+    ny = max(1, int(gridsize / np.sqrt(3)))
+    xs = (x - xmin) / ((xmax - xmin) / nx)
+    ys = (y - ymin) / ((ymax - ymin) / ny)
+    ix1, iy1 = np.round(xs).astype("int64"), np.round(ys).astype("int64")
+    ix2, iy2 = np.floor(xs).astype("int64"), np.floor(ys).astype("int64")
+    d1 = (xs - ix1) ** 2 + 3.0 * (ys - iy1) ** 2
+    d2 = (xs - ix2 - 0.5) ** 2 + 3.0 * (ys - iy2 - 0.5) ** 2
+    first_lattice = (nx + 1) * (ny + 1)
+    return np.where(d1 < d2, ix1 * (ny + 1) + iy1, first_lattice + ix2 * ny + iy2)
+
+
+def density_sample(frame, x, y, max_points=MAX_POINTS, gridsize=GRIDSIZE, seed=0):
+    """
+    At most about max_points rows of frame, sampled per hexagonal cell.
+
+    Every occupied cell keeps at least one row; the remaining budget is
+    shared in proportion to cell counts. The result has a "weight" column:
+    how many full-resolution rows each kept row stands for (1.0 when no
+    sampling was needed). Rows with a missing x or y are dropped. The
+    sample is deterministic for a given seed.
+    """
+    finite = np.isfinite(frame[x].to_numpy(dtype="float64")) & np.isfinite(frame[y].to_numpy(dtype="float64"))
+    frame = frame[finite]
+    n = len(frame)
+    if n <= max_points:
+        return frame.assign(weight=1.0)
+
+    cells = hex_cells(frame[x].to_numpy(), frame[y].to_numpy(), gridsize)
+    _, inverse, counts = np.unique(cells, return_inverse=True, return_counts=True)
+    n_cells = len(counts)
+    spare = max(max_points - n_cells, 0)
+    quota = 1 + np.floor((counts - 1) * (spare / max(n - n_cells, 1))).astype("int64")
+
+    # Shuffle within cells, then keep the first `quota` rows of each
+    rng = np.random.default_rng(seed)
+    order = np.argsort(inverse + rng.random(n))
+    starts = np.r_[0, np.cumsum(counts)[:-1]]
+    rank = np.arange(n) - starts[inverse[order]]
+    keep = np.sort(order[rank < quota[inverse[order]]])
+    weight = (counts / quota)[inverse[keep]]
+    return frame.iloc[keep].assign(weight=weight)
+
+
+def rows_near(frame, x, y, cx, cy, k=10):
+    """The k full-resolution rows closest to (cx, cy), axes scaled to their ranges."""
+    xv = frame[x].to_numpy(dtype="float64")
+    yv = frame[y].to_numpy(dtype="float64")
+    xmin, xmax, ymin, ymax = extent(xv[np.isfinite(xv)], yv[np.isfinite(yv)])
+    dist = ((xv - cx) / (xmax - xmin)) ** 2 + ((yv - cy) / (ymax - ymin)) ** 2
+    dist = np.where(np.isfinite(dist), dist, np.inf)
+    k = min(k, len(frame))
+    if k == 0:
+        return frame.iloc[:0]
+    nearest = np.argpartition(dist, k - 1)[:k]
+    return frame.iloc[nearest[np.argsort(dist[nearest], kind="stable")]]
+
+
+def rows_in_box(frame, x, y, x_range, y_range):
+    """Full-resolution rows inside an x/y rectangle (bounds in either order)."""
+    x0, x1 = sorted(x_range)
+    y0, y1 = sorted(y_range)
+    xv, yv = frame[x], frame[y]
+    return frame[xv.between(x0, x1) & yv.between(y0, y1)]
+
+
+def rows_for_selection(frame, x, y, selection, k=10):
+    """
+    Full-resolution rows behind a Streamlit plotly_chart selection: every row
+    inside each selected box, plus the k nearest rows to each selected point.
+    Selections are the only way back to them; hover sees just the sample.
+    """
+    parts = [rows_in_box(frame, x, y, box["x"], box["y"]) for box in selection.get("box", [])]
+    parts += [rows_near(frame, x, y, point["x"], point["y"], k) for point in selection.get("points", [])]
+    if not parts:
+        return frame.iloc[:0]
+    rows = pd.concat(parts)
+    return rows[~rows.index.duplicated()]
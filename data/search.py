@@ -0,0 +1,228 @@
+"""
+School search index behind the dashboard's "Find a school" box.
+
+build_search_index() indexes every school in the panel (data/panel.py) once
+per data version:
+
+  DBNs    the panel's sorted DBN array, so a DBN prefix ("07X", "07x1")
+          is two binary searches for the start and end of its range
+  names   trigram postings: each name is folded to lower-case ASCII
+          ("P.S. 015" -> "ps 15"), padded with a space at each end and cut
+          into overlapping 3-character windows, each encoded as one int32.
+          The (trigram, school) pairs are sorted once into CSR-style arrays:
+          distinct trigrams, their offsets, and the schools containing each.
+          Each school's own trigrams are kept too (the forward index)
+
+A name query looks up its trigrams' postings. Schools sharing at least
+half of them (so one typo still matches) are scored by the share of the
+query's trigrams they contain. Names holding the whole query as words
+rank first, then as a substring, then by score, then shorter names. Very common trigrams (" ps",
+"sch") are left out of candidate generation when the query has rarer
+ones: schools are counted on the rare trigrams' short postings, and only
+the SHORTLIST best covered get an exact score, from their own trigrams in
+the forward index. A query never walks a list holding most schools, at the
+cost of ranking ties among thousands of equally good names arbitrarily.
+"""
+
+import math
+import re
+import unicodedata
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+# A query that could be the start of a DBN: district digits, borough letter, school number
+DBN_PREFIX = re.compile(r"^\d{1,2}(?:[A-Z]\d{0,4})?$")
+# Share of a name query's trigrams a school must contain to match
+MIN_SHARE = 0.5
+# Trigrams in more than this share of names don't generate candidates (unless all are)
+COMMON_SHARE = 0.05
+# Candidates (most rare trigrams first) given an exact score and ranked
+SHORTLIST = 256
+
+# Folding: punctuation runs become one space, and numbers lose leading zeros ("015" -> "15")
+SEPARATORS = r"[^a-z0-9]+"
+LEADING_ZEROS = r"\b0+(\d)"
+
+Match = namedtuple("Match", "dbn name score kind")
+
+
+def fold(names):
+    """Names as searched: lower-case ASCII, dots dropped, other punctuation as single spaces, no leading zeros."""
+    return (
+        pd.Series(names, dtype="object").fillna("").astype(str)
+        .str.normalize("NFKD").str.encode("ascii", "ignore").str.decode("ascii")
+        .str.lower().str.replace(".", "", regex=False)
+        .str.replace(SEPARATORS, " ", regex=True).str.replace(LEADING_ZEROS, r"\1", regex=True).str.strip()
+        .to_numpy(dtype=object)
+    )
+
+
+def fold_query(text):
+    """fold() for one string, without the pandas overhead."""
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    text = re.sub(SEPARATORS, " ", text.lower().replace(".", ""))
+    return re.sub(LEADING_ZEROS, r"\1", text).strip()
+
+
+def trigram_rows(folded):
+    """
+    (trigram codes, row numbers) of every window of " name " across `folded`,
+    from one fixed-width byte matrix: code = b0 << 16 | b1 << 8 | b2.
+    """
+    padded = np.char.add(np.char.add(" ", folded.astype(str)), " ").astype("S")
+    if not len(padded) or padded.dtype.itemsize < 3:
+        return np.empty(0, dtype="int32"), np.empty(0, dtype="int64")
+    chars = padded.view("uint8").reshape(len(padded), padded.dtype.itemsize).astype("int32")
+    codes = chars[:, :-2] << 16 | chars[:, 1:-1] << 8 | chars[:, 2:]
+    # Bytes past a name's end are 0, so a window is real when its last byte is
+    inside = chars[:, 2:] != 0
+    return codes[inside], np.nonzero(inside)[0]
+
+
+def run_starts(values):
+    """Positions where a sorted array's value changes (np.unique without the hashing)."""
+    return np.flatnonzero(np.diff(values, prepend=values[:1] - 1))
+
+
+def query_trigrams(text):
+    """Distinct trigram codes of one folded query, as trigram_rows() encodes them."""
+    chars = f" {text} ".encode("ascii")
+    return np.unique(np.array(
+        [chars[i] << 16 | chars[i + 1] << 8 | chars[i + 2] for i in range(len(chars) - 2)], dtype="int64",
+    ))
+
+
+class SchoolIndex:
+    """Prefix search over DBNs and trigram search over names, for one data version."""
+
+    def __init__(self, dbns, names):
+        self.dbns = np.asarray(dbns).astype(str)
+        order = np.argsort(self.dbns, kind="stable")
+        if not (order == np.arange(len(order))).all():
+            raise ValueError("SchoolIndex expects DBNs in sorted order")
+        self.names = np.asarray(names, dtype=object)
+        self.folded = fold(self.names)
+
+        codes, rows = trigram_rows(self.folded)
+        # One sort of (trigram, school) pairs; duplicates within a name collapse
+        width = max(len(self.dbns), 1)
+        pairs = np.sort(codes.astype("int64") * width + rows)
+        pairs = pairs[run_starts(pairs)]
+        pair_codes = pairs // width
+        starts = run_starts(pair_codes)
+        self.trigrams = pair_codes[starts]
+        self.offsets = np.append(starts, len(pairs))
+        self.postings = (pairs % width).astype("int32")
+        self.name_trigrams = np.bincount(self.postings, minlength=len(self.dbns))
+        # Forward index: each school's trigrams in name order (repeats kept), for scoring
+        self.school_trigrams = codes
+        self.school_offsets = np.searchsorted(rows, np.arange(len(self.dbns) + 1))
+
+    def postings_for(self, codes):
+        """Sorted school rows containing each trigram in `codes` (empty where unseen)."""
+        slots = np.searchsorted(self.trigrams, codes)
+        found = (slots < len(self.trigrams)) & (self.trigrams[np.minimum(slots, len(self.trigrams) - 1)] == codes)
+        return [
+            self.postings[self.offsets[slot]:self.offsets[slot + 1]] if hit else self.postings[:0]
+            for slot, hit in zip(slots, found)
+        ]
+
+    def dbn_range(self, prefix):
+        """Rows whose DBN starts with `prefix` (upper-case), as a range."""
+        start = np.searchsorted(self.dbns, prefix, side="left")
+        stop = np.searchsorted(self.dbns, prefix[:-1] + chr(ord(prefix[-1]) + 1), side="left")
+        return range(start, stop)
+
+    def match_dbns(self, query, limit):
+        """DBN prefix matches for a query like "07x1" or "7X" (district zero-padded), in DBN order."""
+        prefix = query.strip().upper().replace(" ", "")
+        if not DBN_PREFIX.match(prefix):
+            return []
+        if prefix[1:2].isalpha() or len(prefix) == 1:
+            prefix = "0" + prefix
+        return list(self.dbn_range(prefix)[:limit])
+
+    def hit_counts(self, rows, codes):
+        """Distinct query trigrams (sorted `codes`) in each school of `rows`, from the forward index."""
+        starts = self.school_offsets[rows]
+        lengths = self.school_offsets[rows + 1] - starts
+        owner = np.repeat(np.arange(len(rows)), lengths)
+        positions = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths - starts, lengths)
+        found = self.school_trigrams[positions]
+        slots = np.minimum(np.searchsorted(codes, found), len(codes) - 1)
+        hit = codes[slots] == found
+        pairs = np.sort(owner[hit] * len(codes) + slots[hit])
+        pairs = pairs[run_starts(pairs)]
+        return np.bincount(pairs // len(codes), minlength=len(rows))
+
+    def match_names(self, query, limit):
+        """(rows, scores) of the best name matches for a query, best first."""
+        folded = fold_query(query)
+        codes = query_trigrams(folded) if folded else []
+        if not len(codes):
+            return np.empty(0, dtype="int64"), np.empty(0)
+        need = max(1, math.ceil(MIN_SHARE * len(codes)))
+        lists = [rows for rows in self.postings_for(codes) if len(rows)]
+        if not lists:
+            return np.empty(0, dtype="int64"), np.empty(0)
+
+        # Candidates: schools holding the rarer trigrams (or, when every trigram is
+        # common, the rarest one), counted on those short lists only
+        rare = [rows for rows in lists if len(rows) <= COMMON_SHARE * len(self.dbns)]
+        rare = rare or [min(lists, key=len)]
+        if len(rare) == 1:
+            candidates, hits = rare[0], np.ones(len(rare[0]), dtype="int64")
+        else:
+            candidates, hits = np.unique(np.concatenate(rare), return_counts=True)
+        keep = hits >= need - (len(lists) - len(rare))
+        candidates, hits = candidates[keep], hits[keep]
+        if len(candidates) > SHORTLIST:
+            candidates = candidates[np.argpartition(-hits, SHORTLIST - 1)[:SHORTLIST]]
+
+        # Exact scores for the shortlist, from its schools' own trigrams
+        hits = self.hit_counts(candidates, codes)
+        keep = hits >= need
+        candidates, scores = candidates[keep], hits[keep] / len(codes)
+
+        # Names holding the query as whole words first, then as a substring, then by
+        # score, then shorter names
+        words = f" {folded} "
+        contains = np.array([
+            2 if words in f" {self.folded[row]} " else int(folded in self.folded[row]) for row in candidates
+        ], dtype="int64")
+        order = np.lexsort((candidates, self.name_trigrams[candidates], -scores, -contains))[:limit]
+        return candidates[order], scores[order]
+
+    def search(self, query, limit=10):
+        """
+        Up to `limit` Match(dbn, name, score, kind) for a DBN prefix or name
+        query: DBN prefix matches first (kind "dbn", score 1.0), then names.
+        """
+        if not query or not query.strip():
+            return []
+        rows = self.match_dbns(query, limit)
+        matches = [Match(str(self.dbns[row]), self.names[row], 1.0, "dbn") for row in rows]
+        if len(matches) < limit:
+            seen = set(rows)
+            name_rows, scores = self.match_names(query, limit)
+            matches += [
+                Match(str(self.dbns[row]), self.names[row], float(score), "name")
+                for row, score in zip(name_rows, scores) if row not in seen
+            ][:limit - len(matches)]
+        return matches
+
+    def nbytes(self):
+        """Bytes held by the index arrays (DBNs, postings and the forward index)."""
+        return int(self.dbns.nbytes + self.trigrams.nbytes + self.offsets.nbytes
+                   + self.postings.nbytes + self.name_trigrams.nbytes
+                   + self.school_trigrams.nbytes + self.school_offsets.nbytes)
+
+    def __len__(self):
+        return len(self.dbns)
+
+
+def build_search_index(panel):
+    """Index the panel's schools (sorted DBNs, latest names) for search."""
+    return SchoolIndex(panel.dbns, panel.names)
@@ -0,0 +1,230 @@
+#!/usr/bin/env python
+"""
+Typed columnar snapshot of the cleaned dashboard frames.
+
+Running this script parses the raw CSVs once, applies the cleaning in
+data/cleaning.py (percent strings, "s" suppressions, borough from dbn[2]) and
+writes uncompressed Arrow IPC files plus a manifest to data/snapshot/.
+The stored frames use the compact dtypes from data/compact.py (dictionary
+strings, float32/narrow ints). load_frames() memory-maps those files
+instead of re-parsing the CSVs, and only falls back to the CSVs when the
+snapshot is missing or stale.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import time
+
+import pyarrow as pa
+
+data_dir = os.path.dirname(os.path.abspath(__file__))
+
+# Allow `python data/snapshot.py` to import the data package
+if __package__ in (None, ""):
+    sys.path.insert(0, os.path.dirname(data_dir))
+
+from data.cleaning import clean_attendance, clean_housing, read_csv
+from data.compact import compact_frames
+
+# Bump whenever the cleaning rules or the stored columns change
+SCHEMA_VERSION = 5
+
+SNAPSHOT_DIR = os.path.join(data_dir, "snapshot")
+MANIFEST_PATH = os.path.join(SNAPSHOT_DIR, "manifest.json")
+
+HOUSING_SOURCE = "housing_all_years.csv"
+# attendance.csv (2020-21 only) is the legacy fallback
+ATTENDANCE_SOURCES = ["attendance_all_years.csv", "attendance.csv"]
+
+
+def source_paths():
+    """Return {"housing": path, "attendance": path} for the raw CSVs."""
+    attendance_path = None
+    for filename in ATTENDANCE_SOURCES:
+        path = os.path.join(data_dir, filename)
+        if os.path.exists(path):
+            attendance_path = path
+            break
+    if attendance_path is None:
+        raise FileNotFoundError(f"No attendance CSV found in {data_dir}")
+    return {
+        "housing": os.path.join(data_dir, HOUSING_SOURCE),
+        "attendance": attendance_path,
+    }
+
+
+def file_sha256(path):
+    """Hex sha256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def fingerprint(path):
+    """Size, mtime and content hash used to decide whether a source changed."""
+    stat = os.stat(path)
+    return {
+        "file": os.path.basename(path),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": file_sha256(path),
+    }
+
+
+def source_version(paths=None):
+    """
+    Cheap version string for the raw sources (name, size, mtime).
+
+    Used as a cache key so in-process caches are rebuilt when the CSVs change,
+    without hashing file contents on every rerun.
+    """
+    paths = paths or source_paths()
+    parts = []
+    for name, path in sorted(paths.items()):
+        stat = os.stat(path)
+        parts.append(f"{name}:{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns}")
+    return hashlib.sha256(";".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def read_csv_frames(paths=None):
+    """Slow path: parse and clean the raw CSVs. Returns (attendance, housing)."""
+    paths = paths or source_paths()
+    attendance = clean_attendance(read_csv(paths["attendance"]))
+    housing = clean_housing(read_csv(paths["housing"]))
+    return attendance, housing
+
+
+def _write_table(df, path):
+    """Write a frame as an uncompressed Arrow IPC file so it can be memory-mapped."""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    tmp_path = path + ".tmp"
+    with pa.OSFile(tmp_path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+    return table.schema
+
+
+def _read_table(path):
+    """Memory-map an Arrow IPC file and convert it to pandas."""
+    source = pa.memory_map(path, "r")
+    return pa.ipc.open_file(source).read_all().to_pandas()
+
+
+def build_snapshot(frames=None, paths=None):
+    """Write the cleaned frames (compacted) and manifest to SNAPSHOT_DIR. Returns the manifest."""
+    paths = paths or source_paths()
+    attendance, housing = compact_frames(*(frames if frames is not None else read_csv_frames(paths)))
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+
+    tables = {}
+    for name, df in [("attendance", attendance), ("housing", housing)]:
+        filename = f"{name}.arrow"
+        schema = _write_table(df, os.path.join(SNAPSHOT_DIR, filename))
+        tables[name] = {
+            "file": filename,
+            "rows": len(df),
+            "columns": {field.name: str(field.type) for field in schema},
+        }
+
+    manifest = {
+        "schema_version": SCHEMA_VERSION,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "sources": {name: fingerprint(path) for name, path in paths.items()},
+        "tables": tables,
+    }
+    tmp_path = MANIFEST_PATH + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, MANIFEST_PATH)
+    return manifest
+
+
+def read_manifest():
+    """Return the snapshot manifest, or None if there is no readable one."""
+    try:
+        with open(MANIFEST_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def snapshot_is_fresh(manifest, paths=None):
+    """True if the manifest matches the schema version and current source files."""
+    if not manifest or manifest.get("schema_version") != SCHEMA_VERSION:
+        return False
+    paths = paths or source_paths()
+    sources = manifest.get("sources", {})
+    for name, path in paths.items():
+        recorded = sources.get(name)
+        if not recorded or recorded.get("file") != os.path.basename(path):
+            return False
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        if stat.st_size != recorded["size"]:
+            return False
+        # mtime changes on checkout/copy, so only hash when it differs
+        if stat.st_mtime_ns != recorded["mtime_ns"] and file_sha256(path) != recorded["sha256"]:
+            return False
+    for table in manifest.get("tables", {}).values():
+        if not os.path.exists(os.path.join(SNAPSHOT_DIR, table["file"])):
+            return False
+    return True
+
+
+def read_snapshot():
+    """Fast path: return (attendance, housing) from the snapshot, or None if stale."""
+    manifest = read_manifest()
+    try:
+        if not snapshot_is_fresh(manifest):
+            return None
+    except FileNotFoundError:
+        return None
+    tables = manifest["tables"]
+    attendance = _read_table(os.path.join(SNAPSHOT_DIR, tables["attendance"]["file"]))
+    housing = _read_table(os.path.join(SNAPSHOT_DIR, tables["housing"]["file"]))
+    return attendance, housing
+
+
+def load_frames():
+    """Return cleaned, compacted (attendance, housing), preferring the snapshot over the CSVs."""
+    frames = read_snapshot()
+    if frames is not None:
+        return frames
+
+    paths = source_paths()
+    frames = compact_frames(*read_csv_frames(paths))
+    # Refresh the snapshot for the next cold start; a read-only deploy just keeps parsing
+    try:
+        build_snapshot(frames, paths)
+    except OSError:
+        pass
+    return frames
+
+
+def main():
+    """Rebuild the snapshot from the raw CSVs and validate the stored frames."""
+    # Imported here so app.py's import of this module doesn't load the validator
+    from data.validate import print_report, validate_outputs
+
+    start = time.perf_counter()
+    paths = source_paths()
+    attendance, housing = compact_frames(*read_csv_frames(paths))
+    manifest = build_snapshot((attendance, housing), paths)
+    elapsed = time.perf_counter() - start
+    for name, table in manifest["tables"].items():
+        print(f"{name}: {table['rows']} rows, {len(table['columns'])} columns -> {table['file']}")
+    print(f"Snapshot schema v{manifest['schema_version']} written to {SNAPSHOT_DIR} in {elapsed:.2f}s")
+    report = validate_outputs({"attendance": attendance, "housing": housing})
+    print_report(report)
+    return report["ok"]
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
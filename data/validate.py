@@ -0,0 +1,423 @@
+#!/usr/bin/env python
+"""
+Declarative validation of the pipeline outputs.
+
+Each output (merged.csv, the snapshot's housing and attendance tables) is
+described by a spec: the format of every column, the columns that may be
+absent (only fetched by an --all-columns pull), the columns that must be
+filled, counts that may not exceed another column, the (dbn, year) key
+that must be unique within a year and the rows expected per school year.
+validate_frame() turns a spec into vectorized checks and runs them over
+the whole frame in one pass per column; failures are tallied per year
+with a bincount and a few offending rows are kept as samples.
+
+Results are stored per school year next to a content digest of that
+year's rows (data/validation.json), so re-running after a partial
+refresh only re-checks the years whose rows changed. clean_data.py and
+snapshot.py validate their outputs when they finish; running this
+script validates merged.csv and the snapshot and exits non-zero on any
+failure.
+
+Usage: python data/validate.py [--full] [--json]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+data_dir = os.path.dirname(os.path.abspath(__file__))
+
+# Allow `python data/validate.py` to import the data package
+if __package__ in (None, ""):
+    sys.path.insert(0, os.path.dirname(data_dir))
+
+from data.fetch_data import ATTENDANCE_YEARS, HOUSING_DATASETS
+from data.join import DBN_CANONICAL, year_codes, year_digests, year_rows
+
+VALIDATION_PATH = os.path.join(data_dir, "validation.json")
+
+# School years data/fetch_data.py downloads (one housing dataset per year)
+HOUSING_YEARS = sorted(HOUSING_DATASETS)
+YEAR_PATTERN = r"^\d{4}-\d{2}$"
+
+# Every expected school year needs at least this many rows in each output
+MIN_ROWS_PER_YEAR = 1000
+
+# Failing rows kept per check and year
+SAMPLE_ROWS = 3
+
+# Column format -> the dtype it needs and the row rule it implies
+FORMATS = {
+    "dbn": "text",
+    "year": "text",
+    "text": "text",
+    "percent": "numeric",
+    "count": "numeric",
+    "number": "numeric",
+}
+
+MERGED_SPEC = {
+    "year": "school_year",
+    "key": ["dbn", "school_year"],
+    "columns": {
+        "dbn": "dbn",
+        "school_name_housing": "text",
+        "school_year": "year",
+        "borough_housing": "text",
+        "total_enrollment": "count",
+        "n_students_temp_housing": "count",
+        "pct_students_temp_housing": "percent",
+        "n_students_in_shelter": "count",
+        "n_dhs_shelter": "count",
+        "n_non_dhs_shelter": "count",
+        "n_doubled_up": "count",
+        "year": "year",
+        "attendance": "percent",
+        "pct_chronically_absent": "percent",
+        "n_chronically_absent": "count",
+        "n_contributing_students": "count",
+    },
+    # Outside fetch_data.py's default $select projection; checked when present
+    "optional": ["attendance", "n_chronically_absent"],
+    "required": ["dbn", "school_year", "pct_students_temp_housing", "pct_chronically_absent",
+                 "n_students_temp_housing", "total_enrollment"],
+    # (count, bound): count <= bound wherever both are reported
+    "not_above": [
+        ("n_students_temp_housing", "total_enrollment"),
+        ("n_students_in_shelter", "n_students_temp_housing"),
+        ("n_doubled_up", "n_students_temp_housing"),
+        ("n_dhs_shelter", "n_students_in_shelter"),
+        ("n_non_dhs_shelter", "n_students_in_shelter"),
+        ("n_chronically_absent", "n_contributing_students"),
+    ],
+    "years": ATTENDANCE_YEARS,
+}
+
+HOUSING_SPEC = {
+    "year": "school_year",
+    "key": ["dbn", "school_year"],
+    "columns": {
+        "dbn": "dbn",
+        "school_name": "text",
+        "school_year": "year",
+        "borough": "text",
+        "total_students": "count",
+        "students_in_temporary_housing": "count",
+        "students_in_temporary_housing_1": "percent",
+        "students_residing_in_shelter": "count",
+        "residing_in_dhs_shelter": "count",
+        "residing_in_non_dhs_shelter": "count",
+        "doubled_up": "count",
+        "suppressed": "count",
+    },
+    "optional": [],
+    "required": ["dbn", "school_year", "total_students"],
+    "not_above": [
+        ("students_in_temporary_housing", "total_students"),
+        ("students_residing_in_shelter", "students_in_temporary_housing"),
+        ("doubled_up", "students_in_temporary_housing"),
+        ("residing_in_dhs_shelter", "students_residing_in_shelter"),
+        ("residing_in_non_dhs_shelter", "students_residing_in_shelter"),
+    ],
+    "years": HOUSING_YEARS,
+}
+
+ATTENDANCE_SPEC = {
+    "year": "year",
+    "key": ["dbn", "year"],
+    "columns": {
+        "dbn": "dbn",
+        "school_name": "text",
+        "year": "year",
+        "attendance": "percent",
+        "contributing_10_total_days": "count",
+        "chronically_absent": "count",
+        "chronically_absent_1": "percent",
+        "total_enrollment": "count",
+    },
+    "optional": ["attendance", "chronically_absent"],
+    "required": ["dbn", "year", "chronically_absent_1", "total_enrollment"],
+    "not_above": [("chronically_absent", "contributing_10_total_days")],
+    "years": ATTENDANCE_YEARS,
+}
+
+SPECS = {"merged": MERGED_SPEC, "housing": HOUSING_SPEC, "attendance": ATTENDANCE_SPEC}
+
+
+def spec_hash(spec):
+    """
+    Digest of a spec and of this module's code; stored per-year results
+    are only reused under the same one, so editing a check re-runs it.
+    """
+    digest = hashlib.sha256(json.dumps(spec, sort_keys=True, default=str).encode("utf-8"))
+    with open(__file__, "rb") as f:
+        digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def is_text(series):
+    return (pd.api.types.is_string_dtype(series.dtype) or pd.api.types.is_object_dtype(series.dtype)
+            or isinstance(series.dtype, pd.CategoricalDtype))
+
+
+def is_numeric(series):
+    return pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype)
+
+
+def mismatches(values, pattern):
+    """Bool array: non-null values that don't match `pattern` (categoricals via their categories)."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes = values.cat.codes.to_numpy()
+        bad = np.r_[mismatches(pd.Series(values.cat.categories), pattern), False]
+        return bad[codes]
+    text = pa.array(values.astype("str"))
+    if isinstance(text, pa.ChunkedArray):
+        text = text.combine_chunks()
+    matched = pc.fill_null(pc.match_substring_regex(text, pattern), True)
+    return ~matched.to_numpy(zero_copy_only=False)
+
+
+def schema_checks(frame, spec):
+    """Frame-level results: every non-optional spec column present, with a dtype its format allows."""
+    results = []
+    for column, fmt in spec["columns"].items():
+        if column not in frame.columns:
+            if column in spec["optional"]:
+                continue
+            results.append({"check": "present", "column": column, "ok": False, "detail": "missing"})
+            continue
+        kind = FORMATS[fmt]
+        ok = is_text(frame[column]) if kind == "text" else is_numeric(frame[column])
+        results.append({
+            "check": "type", "column": column, "ok": bool(ok),
+            "detail": f"{frame[column].dtype} ({kind} expected)",
+        })
+    return results
+
+
+def row_rules(frame, spec):
+    """
+    {check id: (rule description, column, failing-row mask)} for every row
+    check the spec implies, each one vectorized over the whole frame.
+    Columns that are missing or have the wrong dtype are skipped (the
+    schema checks already report them).
+    """
+    usable = {
+        column for column, fmt in spec["columns"].items()
+        if column in frame.columns
+        and (is_text(frame[column]) if FORMATS[fmt] == "text" else is_numeric(frame[column]))
+    }
+    rules = {}
+    for column in spec["required"]:
+        if column in frame.columns:
+            rules[f"required:{column}"] = ("not null", column, frame[column].isna().to_numpy())
+    for column, fmt in spec["columns"].items():
+        if column not in usable:
+            continue
+        if fmt in ("dbn", "year"):
+            pattern = DBN_CANONICAL if fmt == "dbn" else YEAR_PATTERN
+            rules[f"format:{column}"] = (f"matches {pattern}", column, mismatches(frame[column], pattern))
+            continue
+        values = frame[column].to_numpy(dtype="float64", na_value=np.nan) if FORMATS[fmt] == "numeric" else None
+        with np.errstate(invalid="ignore"):
+            if fmt == "percent":
+                rules[f"range:{column}"] = ("0 <= x <= 100", column, (values < 0) | (values > 100))
+            elif fmt == "count":
+                rules[f"range:{column}"] = ("whole number >= 0", column, (values < 0) | (values % 1 > 0))
+    for column, bound in spec["not_above"]:
+        if column in usable and bound in usable:
+            with np.errstate(invalid="ignore"):
+                over = (frame[column].to_numpy(dtype="float64", na_value=np.nan)
+                        > frame[bound].to_numpy(dtype="float64", na_value=np.nan))
+            rules[f"not_above:{column}"] = (f"<= {bound}", column, over)
+    if all(column in frame.columns for column in spec["key"]):
+        rules["unique:" + ",".join(spec["key"])] = (
+            "unique per year", spec["key"][0], frame.duplicated(spec["key"]).to_numpy(),
+        )
+    return rules
+
+
+def sample_rows(frame, spec, column, rows):
+    """A few failing rows as "dbn year: value" strings."""
+    key = [c for c in spec["key"] if c in frame.columns]
+    picked = frame.iloc[rows[:SAMPLE_ROWS]]
+    labels = picked[key].astype("str").agg(" ".join, axis=1) if key else pd.Series("", index=picked.index)
+    values = picked[column].astype("str") if column in frame.columns else labels
+    return [f"{label}: {value}" for label, value in zip(labels, values)]
+
+
+def check_years(frame, spec, years):
+    """
+    Run every row rule over the rows of `years` in one pass and split the
+    failures by year: {year: {"failures": {check: n}, "samples": {check: [...]}}}.
+    """
+    part = frame[year_rows(frame[spec["year"]], years)] if spec["year"] in frame.columns else frame
+    labels, codes = year_codes(part[spec["year"]])
+    out = {year: {"failures": {}, "samples": {}} for year in years}
+    for check, (_, column, failed) in row_rules(part, spec).items():
+        counts = np.bincount(codes[failed & (codes >= 0)], minlength=len(labels))
+        for y, label in enumerate(labels):
+            if label not in out:
+                continue
+            out[label]["failures"][check] = int(counts[y])
+            if counts[y]:
+                out[label]["samples"][check] = sample_rows(
+                    part, spec, column, np.flatnonzero(failed & (codes == y)),
+                )
+    return out
+
+
+def validate_frame(name, frame, spec, previous=None):
+    """
+    Validate one output. `previous` is this output's stored state from an
+    earlier run; years whose digest matches it are not re-checked.
+    Returns (report, state).
+    """
+    start = time.perf_counter()
+    version = spec_hash(spec)
+    columns = [c for c in spec["columns"] if c in frame.columns]
+    digests = year_digests(frame, spec["year"], columns) if spec["year"] in frame.columns else {}
+    hashed = time.perf_counter()
+
+    stored = (previous or {}).get("years", {}) if (previous or {}).get("spec") == version else {}
+    stale = [year for year, digest in digests.items() if stored.get(year, {}).get("digest") != digest]
+    checked = check_years(frame, spec, stale) if stale else {}
+    years = {}
+    for year, digest in sorted(digests.items()):
+        entry = checked.get(year) or stored[year]
+        years[year] = {"digest": digest, "failures": entry["failures"], "samples": entry["samples"]}
+    checked_at = time.perf_counter()
+
+    labels, codes = year_codes(frame[spec["year"]]) if spec["year"] in frame.columns else ([], np.array([]))
+    rows_per_year = dict(zip(labels, np.bincount(codes[codes >= 0], minlength=len(labels)).tolist()))
+    results = schema_checks(frame, spec)
+    missing_years = [year for year in spec["years"] if year not in rows_per_year]
+    results.append({"check": "years", "ok": not missing_years,
+                    "detail": f"missing {missing_years}" if missing_years else f"{len(rows_per_year)} years"})
+    short = {year: n for year, n in rows_per_year.items() if n < MIN_ROWS_PER_YEAR}
+    results.append({"check": "rows_per_year", "ok": not short,
+                    "detail": f">= {MIN_ROWS_PER_YEAR} rows", "years": rows_per_year})
+
+    for check, (rule, column, _) in row_rules(frame.iloc[:0], spec).items():
+        per_year = {year: entry["failures"].get(check, 0) for year, entry in years.items()}
+        failures = sum(per_year.values())
+        result = {"check": check.split(":")[0], "column": column, "rule": rule,
+                  "ok": failures == 0, "failures": failures}
+        if failures:
+            result["years"] = {year: n for year, n in per_year.items() if n}
+            result["sample"] = [s for entry in years.values() for s in entry["samples"].get(check, [])][:SAMPLE_ROWS]
+        results.append(result)
+
+    report = {
+        "name": name,
+        "ok": all(result["ok"] for result in results),
+        "rows": len(frame),
+        "revalidated": stale,
+        "reused": [year for year in digests if year not in stale],
+        "seconds": {
+            "hash": hashed - start,
+            "checks": checked_at - hashed,
+            "total": time.perf_counter() - start,
+        },
+        "checks": results,
+    }
+    return report, {"spec": version, "years": years}
+
+
+def read_validation(path=VALIDATION_PATH):
+    """The stored {"report", "state"} from the last validation, or {}."""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def validate_outputs(frames, path=VALIDATION_PATH, full=False):
+    """
+    Validate {name: frame} against SPECS, reusing unchanged years from the
+    state at `path` (unless `full`), and store the new state and report there.
+    Returns the report for these frames: {"ok", "seconds", "outputs": {name: report}}.
+    """
+    start = time.perf_counter()
+    stored = read_validation(path)
+    state = dict(stored.get("state", {}))
+    outputs = {}
+    for name, frame in frames.items():
+        outputs[name], state[name] = validate_frame(
+            name, frame, SPECS[name], None if full else state.get(name),
+        )
+    report = {
+        "ok": all(output["ok"] for output in outputs.values()),
+        "validated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "seconds": time.perf_counter() - start,
+        "outputs": outputs,
+    }
+    # The file keeps the latest report of every output (clean_data.py and
+    # snapshot.py each validate only their own)
+    combined = {**stored.get("report", {}).get("outputs", {}), **outputs}
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "report": {**report, "ok": all(o["ok"] for o in combined.values()), "outputs": combined},
+                "state": state,
+            }, f, indent=2)
+        os.replace(tmp_path, path)
+    except OSError:
+        # A read-only checkout still gets the report, just no reuse next time
+        pass
+    return report
+
+
+def print_report(report):
+    """One line per output, plus every failing check."""
+    for name, output in report["outputs"].items():
+        seconds = output["seconds"]
+        print(f"Validated {name}: {output['rows']} rows, "
+              f"{'OK' if output['ok'] else 'FAILED'} in {seconds['total'] * 1000:.1f} ms "
+              f"(re-checked {len(output['revalidated'])} years, reused {len(output['reused'])})")
+        for result in output["checks"]:
+            if result["ok"]:
+                continue
+            where = f" {result['column']}" if result.get("column") else ""
+            detail = result.get("rule") or result.get("detail", "")
+            count = f": {result['failures']} rows" if result.get("failures") else f": {result.get('detail', '')}"
+            print(f"  FAILED {result['check']}{where} ({detail}){count}")
+            for sample in result.get("sample", []):
+                print(f"    {sample}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--full", action="store_true", help="re-check every year, ignoring stored results")
+    parser.add_argument("--json", action="store_true", help="print the full report as JSON")
+    args = parser.parse_args()
+
+    from data.clean_data import read_csv
+    from data.snapshot import read_snapshot
+
+    frames = {"merged": read_csv(os.path.join(data_dir, "merged.csv"))}
+    snapshot = read_snapshot()
+    if snapshot is None:
+        print("Snapshot missing or stale; run data/snapshot.py to validate it too")
+    else:
+        frames["attendance"], frames["housing"] = snapshot
+
+    report = validate_outputs(frames, full=args.full)
+    print_report(report)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    sys.exit(0 if report["ok"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Per-data-version views shared by app.py and api.py.
+
+Both front ends answer the same questions (one year's gap frames, the
+scatter rows of several years, the table behind a download) from the same
+loaded frames, so they build them here and cannot drift apart. GapViews
+wraps one data version's (dbn, year) join: the join runs once on first
+use, and per-year (gap_df, scatter_df) pairs and multi-year scatter stacks
+are memoized in an LRU shared across versions (its keys carry the
+version). export_lookup() maps a data/export.py dataset name to the
+per-year tables it is written from.
+"""
+
+import threading
+
+from data.gap import stack_years, year_frames
+from data.partitions import LRUCache
+
+# Per-year gap frames and multi-year stacks kept across requests and sessions
+GAP_CACHE_ENTRIES = 8
+GAP_CACHE_BYTES = 64 * 1024 * 1024
+
+
+def make_gap_cache():
+    """The bounded LRU GapViews memoize into; one per process."""
+    return LRUCache(max_entries=GAP_CACHE_ENTRIES, max_bytes=GAP_CACHE_BYTES)
+
+
+class GapViews:
+    """
+    Same-year housing x attendance views of one data version. `join` is a
+    data.gap.gap_join() kept across versions (so only changed years
+    re-join) and `cache` a make_gap_cache(). Read-only once joined, so any
+    thread may call it.
+    """
+
+    def __init__(self, data_version, housing, attendance, join, cache):
+        self.data_version = data_version
+        self._frames = (housing, attendance)
+        self._join = join
+        self._cache = cache
+        self._joined = None
+        self._lock = threading.Lock()
+
+    def joined(self):
+        """{year: join rows} for every year, joined on first use."""
+        with self._lock:
+            if self._joined is None:
+                self._joined = self._join.update(*self._frames)[0]
+        return self._joined
+
+    def year(self, year):
+        """(gap_df, scatter_df) for one school year."""
+        joined = self.joined()
+        return self._cache.get_or_compute((self.data_version, year), lambda: year_frames(joined[year]))
+
+    def scatter(self, years):
+        """Full-resolution scatter rows of one or more years (stacked in the given order)."""
+        years = tuple(years)
+        if len(years) == 1:
+            return self.year(years[0])[1]
+        return self._cache.get_or_compute(
+            (self.data_version, years), lambda: stack_years([self.year(year)[1] for year in years]),
+        )
+
+
+def export_lookup(cube, gap, dataset):
+    """year -> the table a `dataset` download is written from (cube views or GapViews frames)."""
+    if dataset in ("gap", "scatter"):
+        position = int(dataset == "scatter")
+        return lambda year: gap.year(year)[position]
+    views = cube["years"]
+    return lambda year: views[year][dataset]
@@ -0,0 +1,382 @@
+"""
+Cold-start profiling and per-rerun tracing for the dashboard.
+
+Cold start: the process-wide recorder keeps how long each lazily imported
+module took the first time the app needed it, each named stage's first
+run, and how long after the first script run each tab first finished
+rendering. Shown in the sidebar with ?profile=1 (or ABSGAP_PROFILE=1) and
+appended as JSON lines to $ABSGAP_PROFILE_FILE when that is set.
+
+Reruns: app.py opens a trace with start_run() and closes it with
+end_run(). In between, stage() records nested timed spans,
+track_cache() counts st.cache_data/st.cache_resource hits and misses, and
+record_payload() notes serialized figure sizes. Finished runs are kept
+per session (bounded) for p50/p95 in the ?debug=1 panel. They are
+written to $ABSGAP_TRACE_FILE as JSON lines, or as Chrome trace events
+(chrome://tracing, Perfetto) when ABSGAP_TRACE_FORMAT=chrome.
+`python profiling.py TRACE_FILE` prints p50/p95 per stage across runs.
+"""
+
+import functools
+import importlib
+import json
+import math
+import os
+import sys
+import threading
+import time
+import uuid
+import zlib
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+# app.py imports this module first, so this approximates the first script run
+PROCESS_START = time.perf_counter()
+
+# Per-session history kept for the debug panel
+MAX_SESSIONS = 100
+MAX_SAMPLES = 200
+
+_lock = threading.Lock()
+_imports = {}
+_stages = {}
+_first_renders = {}
+_sessions = OrderedDict()
+_local = threading.local()
+
+
+def enabled(query_params=None):
+    """True if profiling output was requested via env var or ?profile=1."""
+    if os.environ.get("ABSGAP_PROFILE") == "1":
+        return True
+    return bool(query_params and query_params.get("profile"))
+
+
+def lazy_import(name):
+    """
+    Import a module on first use, recording how long the import took.
+    Always goes through importlib, which waits for an import another thread
+    has in progress instead of handing back a half-initialized module.
+    """
+    loaded = name in sys.modules
+    start = time.perf_counter()
+    module = importlib.import_module(name)
+    if not loaded:
+        with _lock:
+            _imports.setdefault(name, time.perf_counter() - start)
+    return module
+
+
+class RunTrace:
+    """Spans, cache hits/misses and payload sizes of one script run."""
+
+    def __init__(self, session, run, verbose=False):
+        self.session = session
+        self.run = run
+        self.verbose = verbose
+        self.wall_start = time.time()
+        self.start = time.perf_counter()
+        self.total = None
+        self.depth = 0
+        self.spans = []
+        self.cache = {}
+        self.payloads = {}
+
+    def count_cache(self, name, outcome):
+        counts = self.cache.setdefault(name, {"hits": 0, "misses": 0})
+        counts[outcome] += 1
+
+    def to_dict(self):
+        return {
+            "session": self.session,
+            "run": self.run,
+            "pid": os.getpid(),
+            "timestamp": self.wall_start,
+            "total_seconds": self.total,
+            "stages": [
+                {"name": name, "start_seconds": start, "seconds": seconds, "depth": depth}
+                for name, start, seconds, depth in sorted(self.spans, key=lambda span: span[1])
+            ],
+            "cache": self.cache,
+            "payload_bytes": self.payloads,
+        }
+
+
+def current_run():
+    """The trace of the script run on this thread, or None outside a run."""
+    return getattr(_local, "trace", None)
+
+
+def start_run(session_state, verbose=False):
+    """
+    Open a trace for this script run. session_state is st.session_state (any
+    mutable mapping); it holds the session's trace id. verbose turns on
+    figure payload measurement, which costs an extra serialization.
+    """
+    session = session_state.setdefault("_profiling_session", uuid.uuid4().hex[:12])
+    with _lock:
+        history = _sessions.pop(session, None) or {"runs": 0, "stages": {}, "cache": {}}
+        _sessions[session] = history
+        while len(_sessions) > MAX_SESSIONS:
+            _sessions.popitem(last=False)
+        history["runs"] += 1
+        run = history["runs"]
+    _local.trace = RunTrace(session, run, verbose or bool(os.environ.get("ABSGAP_TRACE_FILE")))
+    return _local.trace
+
+
+def end_run():
+    """Close this thread's trace, fold it into the session history and export it."""
+    trace = current_run()
+    if trace is None:
+        return None
+    _local.trace = None
+    trace.total = time.perf_counter() - trace.start
+    with _lock:
+        history = _sessions.get(trace.session)
+        if history is not None:
+            for name, _, seconds, _ in trace.spans + [("rerun", 0.0, trace.total, 0)]:
+                history["stages"].setdefault(name, deque(maxlen=MAX_SAMPLES)).append(seconds)
+            for name, counts in trace.cache.items():
+                totals = history["cache"].setdefault(name, {"hits": 0, "misses": 0})
+                totals["hits"] += counts["hits"]
+                totals["misses"] += counts["misses"]
+    export_trace(trace)
+    return trace.to_dict()
+
+
+@contextmanager
+def stage(name):
+    """
+    Time a named stage: recorded as a span of the current run (if any) and,
+    the first time it runs in the process, as a cold-start stage.
+    """
+    trace = current_run()
+    start = time.perf_counter()
+    if trace is not None:
+        trace.depth += 1
+    try:
+        yield
+    finally:
+        end = time.perf_counter()
+        if trace is not None:
+            trace.depth -= 1
+            trace.spans.append((name, start - trace.start, end - start, trace.depth))
+        with _lock:
+            _stages.setdefault(name, end - start)
+
+
+@contextmanager
+def first_render(tab):
+    """Time a tab's render; its first render also records time-since-start."""
+    start = time.perf_counter()
+    with stage(f"tab: {tab}"):
+        yield
+    end = time.perf_counter()
+    with _lock:
+        _first_renders.setdefault(tab, {
+            "render_seconds": end - start,
+            "seconds_since_start": end - PROCESS_START,
+        })
+
+
+def track_cache(cache, **options):
+    """
+    Decorator: cache a function with `cache` (st.cache_data or
+    st.cache_resource, plus its options) and count hits and misses per run.
+    The inner function body only executes on a miss: each call pushes a
+    flag on this thread's stack that the body sets when it runs, so nested
+    and concurrent calls each see only their own outcome. Each call is
+    timed as stage "fn()".
+    """
+    def decorate(fn):
+        name = fn.__name__
+        label = f"{name}()"
+
+        @functools.wraps(fn)
+        def body(*args, **kwargs):
+            calls = getattr(_local, "cache_calls", None)
+            if calls:
+                calls[-1] = True
+            return fn(*args, **kwargs)
+
+        cached = cache(body, **options) if options else cache(body)
+
+        @functools.wraps(fn)
+        def call(*args, **kwargs):
+            calls = _local.__dict__.setdefault("cache_calls", [])
+            calls.append(False)
+            try:
+                with stage(label):
+                    return cached(*args, **kwargs)
+            finally:
+                missed = calls.pop()
+                trace = current_run()
+                if trace is not None:
+                    trace.count_cache(name, "misses" if missed else "hits")
+
+        call.clear = cached.clear
+        return call
+
+    return decorate
+
+
+def record_payload(name, fig):
+    """Record the serialized size of a Plotly figure (only in verbose runs)."""
+    trace = current_run()
+    if trace is None or not trace.verbose:
+        return
+    trace.payloads[name] = len(fig.to_json())
+
+
+def percentile(values, q):
+    """Nearest-rank percentile (q in 0..100) of a non-empty sequence."""
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, math.ceil(q / 100 * len(ordered)) - 1))]
+
+
+def stage_summary(durations):
+    """{stage: count/p50/p95/max} from {stage: [seconds, ...]}."""
+    return {
+        name: {
+            "count": len(values),
+            "p50_ms": percentile(values, 50) * 1000,
+            "p95_ms": percentile(values, 95) * 1000,
+            "max_ms": max(values) * 1000,
+        }
+        for name, values in durations.items() if values
+    }
+
+
+def session_summary(session_state):
+    """Per-stage p50/p95 and cache totals for the current session."""
+    session = session_state.get("_profiling_session")
+    with _lock:
+        history = _sessions.get(session)
+        if history is None:
+            return {}
+        durations = {name: list(values) for name, values in history["stages"].items()}
+        cache = {name: dict(counts) for name, counts in history["cache"].items()}
+        runs = history["runs"]
+    return {"runs": runs, "stages": stage_summary(durations), "cache": cache}
+
+
+def chrome_events(trace):
+    """Chrome trace 'complete' events for one run (timestamps in microseconds)."""
+    tid = zlib.crc32(trace.session.encode())
+    base = trace.wall_start * 1e6
+    events = [{
+        "name": "rerun", "cat": "run", "ph": "X", "ts": base, "dur": trace.total * 1e6,
+        "pid": os.getpid(), "tid": tid,
+        "args": {"session": trace.session, "run": trace.run, "cache": trace.cache,
+                 "payload_bytes": trace.payloads},
+    }]
+    for name, start, seconds, _ in trace.spans:
+        events.append({
+            "name": name, "cat": "stage", "ph": "X", "ts": base + start * 1e6, "dur": seconds * 1e6,
+            "pid": os.getpid(), "tid": tid, "args": {"run": trace.run},
+        })
+    return events
+
+
+def export_trace(trace, path=None, fmt=None):
+    """Append a finished run to path (or $ABSGAP_TRACE_FILE) as JSON lines or Chrome events."""
+    path = path or os.environ.get("ABSGAP_TRACE_FILE")
+    if not path:
+        return
+    fmt = fmt or os.environ.get("ABSGAP_TRACE_FORMAT", "jsonl")
+    with _lock:
+        if fmt == "chrome":
+            # The Chrome trace array format allows the closing bracket to be omitted,
+            # so events can be appended as runs finish
+            new = not os.path.exists(path) or os.path.getsize(path) == 0
+            with open(path, "a") as f:
+                if new:
+                    f.write("[\n")
+                for event in chrome_events(trace):
+                    f.write(json.dumps(event) + ",\n")
+        else:
+            with open(path, "a") as f:
+                f.write(json.dumps(trace.to_dict()) + "\n")
+
+
+def read_trace_file(path):
+    """{stage: [seconds]} and cache totals from a JSON lines or Chrome trace file."""
+    durations, cache = {}, {}
+    with open(path) as f:
+        text = f.read()
+    if text.lstrip().startswith("["):
+        body = text.strip().rstrip(",").rstrip("]").rstrip().rstrip(",")
+        events = json.loads(body + "]")
+        for event in events:
+            if event.get("ph") == "X":
+                durations.setdefault(event["name"], []).append(event["dur"] / 1e6)
+                for name, counts in event.get("args", {}).get("cache", {}).items():
+                    totals = cache.setdefault(name, {"hits": 0, "misses": 0})
+                    totals["hits"] += counts["hits"]
+                    totals["misses"] += counts["misses"]
+    else:
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            run = json.loads(line)
+            durations.setdefault("rerun", []).append(run["total_seconds"])
+            for span in run["stages"]:
+                durations.setdefault(span["name"], []).append(span["seconds"])
+            for name, counts in run["cache"].items():
+                totals = cache.setdefault(name, {"hits": 0, "misses": 0})
+                totals["hits"] += counts["hits"]
+                totals["misses"] += counts["misses"]
+    return durations, cache
+
+
+def report():
+    """Snapshot of everything recorded so far in this process."""
+    with _lock:
+        return {
+            "pid": os.getpid(),
+            "imports": dict(_imports),
+            "stages": dict(_stages),
+            "first_renders": {tab: dict(r) for tab, r in _first_renders.items()},
+            "modules_loaded": sorted(
+                name for name in ("plotly.express", "plotly.graph_objects", "statsmodels", "scipy")
+                if name in sys.modules
+            ),
+        }
+
+
+def export(path=None):
+    """Append the current report as one JSON line to path (or $ABSGAP_PROFILE_FILE)."""
+    path = path or os.environ.get("ABSGAP_PROFILE_FILE")
+    if not path:
+        return
+    with open(path, "a") as f:
+        f.write(json.dumps(report()) + "\n")
+
+
+def main(argv=None):
+    """Print p50/p95 per stage and cache hit rates from one or more trace files."""
+    paths = (argv if argv is not None else sys.argv[1:])
+    if not paths:
+        sys.exit("usage: python profiling.py TRACE_FILE [TRACE_FILE ...]")
+    durations, cache = {}, {}
+    for path in paths:
+        file_durations, file_cache = read_trace_file(path)
+        for name, values in file_durations.items():
+            durations.setdefault(name, []).extend(values)
+        for name, counts in file_cache.items():
+            totals = cache.setdefault(name, {"hits": 0, "misses": 0})
+            totals["hits"] += counts["hits"]
+            totals["misses"] += counts["misses"]
+
+    summary = stage_summary(durations)
+    print(f"{'stage':<40} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+    for name, s in sorted(summary.items(), key=lambda item: -item[1]["p95_ms"]):
+        print(f"{name:<40} {s['count']:>7} {s['p50_ms']:>9.1f} {s['p95_ms']:>9.1f} {s['max_ms']:>9.1f}")
+    for name, counts in sorted(cache.items()):
+        calls = counts["hits"] + counts["misses"]
+        print(f"cache {name}: {counts['hits']}/{calls} hits ({counts['hits'] / calls:.0%})")
+
+
+if __name__ == "__main__":
+    main()
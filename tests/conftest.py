@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Import the app's modules (data.*, profiling, api) the way the scripts do
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, repo_root)
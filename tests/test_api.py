@@ -0,0 +1,74 @@
+"""The JSON API's status codes: 200, 304 on a matching ETag, 400, 404 and 500."""
+
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+import api
+
+
+@pytest.fixture(scope="module")
+def base_url():
+    server = api.make_server(port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def get(url, headers=None):
+    request = urllib.request.Request(url, headers=headers or {})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, response.read(), response.headers
+    except urllib.error.HTTPError as e:
+        return e.code, e.read(), e.headers
+
+
+def test_health_and_etag(base_url):
+    status, body, _ = get(base_url + "/api/health")
+    assert status == 200 and json.loads(body)["years"]
+
+    status, body, headers = get(base_url + "/api/borough?year=all")
+    assert status == 200 and "borough" in json.loads(body)
+    status, body, _ = get(base_url + "/api/borough?year=all", {"If-None-Match": headers["ETag"]})
+    assert status == 304 and body == b""
+    # A different query has a different ETag
+    assert get(base_url + "/api/borough", {"If-None-Match": headers["ETag"]})[0] == 200
+
+
+@pytest.mark.parametrize("path", [
+    "/api/gap?year=1999",
+    "/api/gap?group=planet",
+    "/api/export?dataset=gap&year=2019-20&year=2020-21",
+    "/api/export?dataset=nope",
+    "/api/export?dataset=gap&format=xls",
+    "/api/export?dataset=gap&year=1999",
+])
+def test_bad_request(base_url, path):
+    status, body, _ = get(base_url + path)
+    assert status == 400 and json.loads(body)["error"] is True
+
+
+def test_bad_request_ignores_if_none_match(base_url):
+    status, _, _ = get(base_url + "/api/gap?year=1999", {"If-None-Match": "*"})
+    assert status == 400
+
+
+def test_unknown_endpoint(base_url):
+    status, body, _ = get(base_url + "/api/nope")
+    assert status == 404 and "/api/gap" in json.loads(body)["endpoints"]
+
+
+def test_failing_route_returns_500(base_url, monkeypatch):
+    def broken(data, query):
+        raise RuntimeError("boom")
+
+    monkeypatch.setitem(api.ROUTES, "/api/broken", (api.gap_query, broken))
+    status, body, _ = get(base_url + "/api/broken")
+    assert status == 500 and json.loads(body)["error"] is True
+    # The server keeps answering
+    assert get(base_url + "/api/health")[0] == 200
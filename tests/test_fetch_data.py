@@ -0,0 +1,42 @@
+"""fetch_data.fetch_pages paging against an in-memory dataset."""
+
+import pytest
+
+from data.fetch_data import fetch_pages
+
+
+class Response:
+    def __init__(self, rows):
+        self.status_code = 200
+        self.headers = {}
+        self.rows = rows
+
+    def json(self):
+        return self.rows
+
+    def raise_for_status(self):
+        pass
+
+
+class Session:
+    """Serves $offset/$limit slices of `rows` and counts the requests."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.requests = 0
+
+    def get(self, url, params, headers, timeout):
+        self.requests += 1
+        offset, limit = params["$offset"], params["$limit"]
+        return Response(self.rows[offset:offset + limit])
+
+
+@pytest.mark.parametrize("n_rows, requests", [(0, 1), (4, 1), (5, 1), (10, 2), (11, 3), (15, 3)])
+def test_pages_without_trailing_empty_request(n_rows, requests):
+    rows = [{"id": i} for i in range(n_rows)]
+    session = Session(rows)
+    pages, _, _ = fetch_pages(session, "abcd-1234", base_url="http://stand-in", page_size=5)
+    pages = list(pages)
+    assert [row for page in pages for row in page] == rows
+    assert all(len(page) <= 5 for page in pages)
+    assert session.requests == requests
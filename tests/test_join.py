@@ -0,0 +1,70 @@
+"""DBN normalization and the year-aware (dbn, year) join against DataFrame.merge."""
+
+import pandas as pd
+
+from data.join import YearJoin, join_years, normalize_dbn
+
+
+def test_normalize_dbn():
+    values = pd.Series([" 1m15", "01M015", "7x1234", "001k05 ", "not a dbn", "", None])
+    assert normalize_dbn(values).tolist()[:5] == ["01M015", "01M015", "07X1234", "01K005", "NOT A DBN"]
+    assert normalize_dbn(values).isna().tolist()[5:] == [True, True]
+
+
+def test_normalize_dbn_categorical():
+    values = pd.Series([" 1m15", None, "02x3"], dtype="category")
+    assert normalize_dbn(values).tolist()[::2] == ["01M015", "02X003"]
+    assert pd.isna(normalize_dbn(values)[1])
+
+
+def frames():
+    left = pd.DataFrame({
+        "dbn": ["01M015", " 1m15", "02X003", "03K100", "02X003"],
+        "school_year": ["2019-20", "2020-21", "2019-20", "2019-20", "2020-21"],
+        "housed": [1, 2, 3, 4, 5],
+    })
+    right = pd.DataFrame({
+        "dbn": ["01M015", "01M015", "02X003", "02x3", "09Q999"],
+        "year": ["2019-20", "2020-21", "2019-20", "2020-21", "2019-20"],
+        "housed": [10, 20, 30, 40, 50],
+        "attendance": [0.9, 0.8, 0.7, 0.6, 0.5],
+    })
+    return left, right
+
+
+def test_join_years_matches_merge_on_normalized_keys():
+    left, right = frames()
+    joined, diagnostics = join_years(left, right)
+    expected = left.assign(dbn=normalize_dbn(left["dbn"])).merge(
+        right.assign(dbn=normalize_dbn(right["dbn"])),
+        left_on=["dbn", "school_year"], right_on=["dbn", "year"],
+    )
+    assert joined["housed_x"].tolist() == expected["housed_x"].tolist() == [1, 2, 3, 5]
+    assert joined["housed_y"].tolist() == expected["housed_y"].tolist()
+    # Left's values are kept as they were, only the keys are normalized
+    assert joined["dbn"].tolist() == ["01M015", " 1m15", "02X003", "02X003"]
+    year = diagnostics["years"]["2019-20"]
+    assert year["unmatched_left"] == 1 and year["unmatched_left_sample"] == ["03K100"]
+    assert year["unmatched_right_sample"] == ["09Q999"]
+    assert diagnostics["years"]["2020-21"]["normalized_left"] == 1
+    assert diagnostics["cardinality"] == "one-to-one"
+
+
+def test_join_years_keeps_last_duplicate_right_row():
+    left, right = frames()
+    right = pd.concat([right, right.iloc[[0]].assign(attendance=0.1)], ignore_index=True)
+    joined, diagnostics = join_years(left, right)
+    assert joined.loc[joined["housed_x"] == 1, "attendance"].tolist() == [0.1]
+    assert diagnostics["years"]["2019-20"]["cardinality"] == "one-to-many"
+
+
+def test_year_join_rejoins_changed_years_only():
+    left, right = frames()
+    join = YearJoin()
+    first, _ = join.update(left, right)
+    changed = right.copy()
+    changed.loc[changed["year"] == "2020-21", "attendance"] = 0.0
+    second, update = join.update(left, changed)
+    assert update["recomputed"] == ["2020-21"] and update["reused"] == ["2019-20"]
+    assert second["2019-20"] is first["2019-20"]
+    assert second["2020-21"]["attendance"].tolist() == [0.0, 0.0]
@@ -0,0 +1,40 @@
+"""parse_numeric on the raw files' mixed cells, and suppression bit packing."""
+
+import numpy as np
+import pandas as pd
+
+from data.numeric import is_suppressed, parse_numeric, suppression_bits
+
+
+def test_parse_numeric_mixed_cells():
+    values = pd.Series(["12", " 30.7% ", "1,234", "s", "S", "", "nan", "junk", "-4.5"])
+    numbers, suppressed = parse_numeric(values)
+    assert numbers.dtype == "float64"
+    np.testing.assert_array_equal(
+        numbers.to_numpy(), [12, 30.7, 1234, np.nan, np.nan, np.nan, np.nan, np.nan, -4.5],
+    )
+    assert suppressed.tolist() == [False, False, False, True, True, False, False, False, False]
+
+
+def test_parse_numeric_passes_numbers_through():
+    values = pd.Series([1, 2, 3], dtype="int16", index=[5, 6, 7])
+    numbers, suppressed = parse_numeric(values)
+    assert numbers.dtype == "float64" and numbers.index.tolist() == [5, 6, 7]
+    assert numbers.tolist() == [1.0, 2.0, 3.0] and not suppressed.any()
+
+
+def test_parse_numeric_keeps_index_and_nulls():
+    values = pd.Series(["5", None, "s"], index=["a", "b", "c"])
+    numbers, suppressed = parse_numeric(values)
+    assert numbers.index.tolist() == ["a", "b", "c"]
+    assert numbers.isna().tolist() == [False, True, True]
+    assert suppressed.tolist() == [False, False, True]
+
+
+def test_suppression_bits_round_trip():
+    masks = [pd.Series([True, False, True]), pd.Series([False, False, True]), pd.Series([False, True, False])]
+    bits = suppression_bits(masks)
+    assert bits.dtype == "uint8" and bits.tolist() == [1, 4, 3]
+    for position, mask in enumerate(masks):
+        assert is_suppressed(bits, position).tolist() == mask.tolist()
+    assert suppression_bits([pd.Series([False])] * 9).dtype == "uint16"
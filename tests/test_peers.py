@@ -0,0 +1,72 @@
+"""The NumPy k-d tree and peer queries against brute force."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.gap import ABSENT_PCT, HOUSING_PCT
+from data.peers import KDTree, build_peer_index, peer_table
+
+
+def brute_force(points, point):
+    return np.sqrt(((points - point) ** 2).sum(axis=1))
+
+
+@pytest.mark.parametrize("leaf_size", [1, 8, 256])
+def test_nearest_and_within_match_brute_force(leaf_size):
+    rng = np.random.default_rng(0)
+    points = rng.normal(size=(2000, 3))
+    # Ties and duplicates too
+    points[1000:1100] = points[0]
+    tree = KDTree(points, leaf_size=leaf_size)
+    for point in [points[0], points[1500], rng.normal(size=3), np.array([10.0, 0, 0])]:
+        distances = brute_force(points, point)
+        rows, found = tree.nearest(point, 25)
+        np.testing.assert_allclose(found, np.sort(distances)[:25])
+        np.testing.assert_allclose(distances[rows], found)
+
+        rows, found = tree.within(point, 0.75)
+        assert set(rows.tolist()) == set(np.flatnonzero(distances <= 0.75).tolist())
+        assert (np.diff(found) >= 0).all()
+
+
+def test_nearest_edge_cases():
+    tree = KDTree(np.zeros((3, 2)))
+    assert len(tree.nearest(np.zeros(2), 0)[0]) == 0
+    assert len(tree.nearest(np.zeros(2), 10)[0]) == 3
+    assert len(KDTree(np.empty((0, 2))).within(np.zeros(2), 1.0)[0]) == 0
+
+
+def scatter_rows():
+    rng = np.random.default_rng(1)
+    n = 300
+    students = rng.integers(100, 3000, n).astype("float64")
+    frame = pd.DataFrame({
+        # 150 schools, each with a row in both years
+        "dbn": [f"{i % 150 // 10 + 1:02d}X{i % 150:03d}" for i in range(n)],
+        "school_name_housing": [f"School {i % 150}" for i in range(n)],
+        "borough": "Bronx",
+        "school_year": np.where(np.arange(n) < 150, "2019-20", "2020-21"),
+        HOUSING_PCT: rng.uniform(0, 40, n),
+        "total_students": students,
+        "doubled_up": np.floor(students * rng.uniform(0, 0.2, n)),
+        ABSENT_PCT: rng.uniform(5, 60, n),
+    })
+    frame.loc[3, "doubled_up"] = np.nan
+    return frame
+
+
+def test_peers_skip_incomplete_rows_and_own_years():
+    index = build_peer_index(scatter_rows())
+    assert index.skipped == 1 and len(index) == 299
+    row = 10
+    rows, distances = index.peers(row, k=5)
+    own = set(index.rows(index.frame["dbn"].iat[row]).tolist())
+    assert len(own) == 2 and len(rows) == 5 and not own & set(rows.tolist())
+    # Brute force over the other schools' standardized rows
+    distances_all = brute_force(index.features, index.features[row])
+    others = np.array([r for r in range(len(index)) if r not in own])
+    np.testing.assert_allclose(distances, np.sort(distances_all[others])[:5])
+
+    table = peer_table(index, row, rows, distances)
+    assert len(table) == 5 and {"absent_gap", "absent_z", "outlier"} <= set(table.columns)
@@ -0,0 +1,60 @@
+"""Nearest-rank percentiles and cache hit/miss counting."""
+
+import functools
+
+import pytest
+
+import profiling
+
+
+@pytest.mark.parametrize("values, q, expected", [
+    (range(1, 11), 50, 5),
+    (range(1, 21), 95, 19),
+    (range(1, 21), 50, 10),
+    (range(1, 101), 99, 99),
+    (range(1, 11), 0, 1),
+    (range(1, 11), 100, 10),
+    ([7.5], 50, 7.5),
+    ([7.5], 95, 7.5),
+    ([3, 1, 2], 50, 2),
+])
+def test_percentile_nearest_rank(values, q, expected):
+    assert profiling.percentile(list(values), q) == expected
+
+
+def memoize(fn):
+    """A stand-in for st.cache_data: caches on the positional arguments."""
+    cached = functools.lru_cache(maxsize=None)(fn)
+    wrapper = functools.wraps(fn)(lambda *args: cached(*args))
+    wrapper.clear = cached.cache_clear
+    return wrapper
+
+
+def test_track_cache_counts_nested_calls():
+    @profiling.track_cache(memoize)
+    def inner(x):
+        return x + 1
+
+    @profiling.track_cache(memoize)
+    def outer(x):
+        # One miss and one hit of inner inside a single miss of outer
+        return inner(x) + inner(x)
+
+    profiling.start_run({})
+    assert outer(1) == 4
+    assert outer(1) == 4
+    trace = profiling.end_run()
+    assert trace["cache"]["outer"] == {"hits": 1, "misses": 1}
+    assert trace["cache"]["inner"] == {"hits": 1, "misses": 1}
+
+
+def test_track_cache_counts_a_failed_call_as_miss():
+    @profiling.track_cache(memoize)
+    def broken(x):
+        raise ValueError(x)
+
+    profiling.start_run({})
+    with pytest.raises(ValueError):
+        broken(1)
+    trace = profiling.end_run()
+    assert trace["cache"]["broken"] == {"hits": 0, "misses": 1}
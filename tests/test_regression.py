@@ -0,0 +1,51 @@
+"""t_quantile against closed forms (and SciPy when installed) and fit_line against np.polyfit."""
+
+import math
+
+import numpy as np
+import pytest
+
+from data.regression import EXACT_T_BELOW, confidence_band, fit_line, t_quantile
+
+PROBABILITIES = [1e-4, 0.01, 0.025, 0.2, 0.4, 0.6, 0.8, 0.975, 0.99, 0.9999]
+
+
+@pytest.mark.parametrize("p", PROBABILITIES)
+def test_t_quantile_closed_forms(p):
+    # Cauchy (dof 1) and dof 2 have closed-form quantiles
+    assert t_quantile(p, 1) == pytest.approx(math.tan(math.pi * (p - 0.5)), rel=1e-12)
+    assert t_quantile(p, 2) == pytest.approx((2 * p - 1) / math.sqrt(2 * p * (1 - p)), rel=1e-12)
+
+
+def test_t_quantile_median_and_symmetry():
+    for dof in (1, 3, 30, 5000):
+        assert t_quantile(0.5, dof) == 0.0
+        assert t_quantile(0.1, dof) == pytest.approx(-t_quantile(0.9, dof), rel=1e-12)
+
+
+@pytest.mark.parametrize("dof", [3, 4, 7, 29, 50, 120, EXACT_T_BELOW - 1, EXACT_T_BELOW, 5000])
+def test_t_quantile_matches_scipy(dof):
+    stats = pytest.importorskip("scipy.stats")
+    for p in PROBABILITIES:
+        assert t_quantile(p, dof) == pytest.approx(stats.t.ppf(p, dof), rel=2e-12)
+
+
+def test_fit_line_matches_polyfit():
+    rng = np.random.default_rng(0)
+    x = rng.uniform(0, 40, 200)
+    y = 3.0 + 0.5 * x + rng.normal(0, 2, 200)
+    y[::17] = np.nan
+    fit = fit_line(x, y)
+    finite = np.isfinite(y)
+    slope, intercept = np.polyfit(x[finite], y[finite], 1)
+    assert fit["n"] == finite.sum() and fit["dof"] == fit["n"] - 2
+    assert fit["slope"] == pytest.approx(slope) and fit["intercept"] == pytest.approx(intercept)
+    yhat, lower, upper = confidence_band(fit, [0, 20, 40])
+    assert (lower < yhat).all() and (yhat < upper).all()
+    # The band is narrowest at the mean of x
+    assert (upper - lower)[1] < (upper - lower)[0]
+
+
+def test_fit_line_undefined():
+    assert fit_line([1, 2], [3, 4]) is None
+    assert fit_line([1, 1, 1], [3, 4, 5]) is None
@@ -0,0 +1,46 @@
+"""Density sampling of the scatter and the full-resolution rows behind a selection."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.sampling import density_sample, rows_for_selection, rows_near
+
+
+def points(n=50_000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({"x": rng.normal(20, 5, n), "y": rng.normal(30, 8, n), "id": np.arange(n)})
+
+
+def test_density_sample_weights_add_up():
+    frame = points()
+    frame.loc[:9, "x"] = np.nan
+    sample = density_sample(frame, "x", "y", max_points=5000)
+    assert len(sample) <= 5000
+    # Each kept row stands for its cell's share of the finite rows
+    assert sample["weight"].sum() == pytest.approx(len(frame) - 10)
+    assert sample.equals(density_sample(frame, "x", "y", max_points=5000))
+
+
+def test_density_sample_small_frames_pass_through():
+    frame = points(100)
+    sample = density_sample(frame, "x", "y", max_points=2000)
+    assert len(sample) == 100 and (sample["weight"] == 1.0).all()
+
+
+def test_rows_near_matches_brute_force():
+    frame = points(5000)
+    near = rows_near(frame, "x", "y", 20.0, 30.0, k=7)
+    xspan, yspan = np.ptp(frame["x"]), np.ptp(frame["y"])
+    dist = ((frame["x"] - 20) / xspan) ** 2 + ((frame["y"] - 30) / yspan) ** 2
+    assert near["id"].tolist() == frame["id"].to_numpy()[np.argsort(dist.to_numpy(), kind="stable")[:7]].tolist()
+
+
+def test_rows_for_selection():
+    frame = points(5000)
+    box = {"x": [25, 15], "y": [25, 35]}
+    rows = rows_for_selection(frame, "x", "y", {"box": [box], "points": [{"x": 20, "y": 30}]}, k=5)
+    inside = frame[frame["x"].between(15, 25) & frame["y"].between(25, 35)]
+    # The point's nearest rows fall inside the box, so nothing is listed twice
+    assert sorted(rows["id"]) == sorted(inside["id"])
+    assert rows_for_selection(frame, "x", "y", {}).empty
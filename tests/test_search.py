@@ -0,0 +1,57 @@
+"""School search: DBN prefixes, folded trigram name matches and their ranking."""
+
+import pytest
+
+from data.search import SchoolIndex, fold
+
+DBNS = ["01M015", "01M019", "07X001", "07X012", "07X154", "13K282", "31R044"]
+NAMES = [
+    "P.S. 015 Roberto Clemente",
+    "P.S. 019 Asher Levy",
+    "P.S. 001 Courtlandt School",
+    "Academy of Applied Mathematics",
+    "P.S. 154 Jonathan D. Hyatt",
+    "Park Slope Collegiate",
+    "Intermediate School 044 Thomas C. Brown",
+]
+
+
+@pytest.fixture
+def index():
+    return SchoolIndex(DBNS, NAMES)
+
+
+def test_fold():
+    assert fold(["P.S. 015", "Écoles--Café", None]).tolist() == ["ps 15", "ecoles cafe", ""]
+
+
+def test_dbn_prefix(index):
+    assert [m.dbn for m in index.search("07X")] == ["07X001", "07X012", "07X154"]
+    assert [m.dbn for m in index.search("7x0")] == ["07X001", "07X012"]
+    assert [m.dbn for m in index.search("07x1")] == ["07X154"]
+    assert [m.dbn for m in index.search("1m01")] == ["01M015", "01M019"]
+    assert {m.kind for m in index.search("07X")} == {"dbn"}
+
+
+def test_name_match_ranks_whole_words_first(index):
+    matches = index.search("clemente")
+    assert matches[0].dbn == "01M015" and matches[0].kind == "name" and matches[0].score == 1.0
+    # Leading zeros and punctuation fold away
+    assert index.search("ps 15")[0].dbn == "01M015"
+    assert index.search("P.S. 0154")[0].dbn == "07X154"
+
+
+def test_name_match_tolerates_a_typo(index):
+    assert index.search("colegiate")[0].dbn == "13K282"
+    assert index.search("zzzzzz") == []
+
+
+def test_limit_and_blank_query(index):
+    assert len(index.search("p", limit=2)) <= 2
+    assert index.search("   ") == []
+    assert len(index) == len(DBNS) and index.nbytes() > 0
+
+
+def test_unsorted_dbns_rejected():
+    with pytest.raises(ValueError):
+        SchoolIndex(DBNS[::-1], NAMES[::-1])
@@ -0,0 +1,31 @@
+"""benchmarks/synthetic.py writes files shaped like the shipped raw CSVs."""
+
+import os
+import sys
+
+import pytest
+
+from data.cleaning import read_csv
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(repo_root, "benchmarks"))
+
+import synthetic  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def generated(tmp_path_factory):
+    out_dir = tmp_path_factory.mktemp("synthetic")
+    synthetic.generate(out_dir, scale=1, seed=0)
+    return out_dir
+
+
+@pytest.mark.parametrize("filename", sorted(
+    name for name in os.listdir(os.path.join(repo_root, "data"))
+    if name.endswith(".csv") and name != "merged.csv"
+))
+def test_matches_shipped_schema(generated, filename):
+    shipped = read_csv(os.path.join(repo_root, "data", filename)).dtypes
+    made = read_csv(os.path.join(generated, filename)).dtypes
+    assert list(made.index) == list(shipped.index)
+    assert made.astype(str).to_dict() == shipped.astype(str).to_dict()
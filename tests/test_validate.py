@@ -0,0 +1,67 @@
+"""The validator against what a default refresh actually writes."""
+
+import os
+
+import pytest
+
+from data import clean_data, fetch_data
+from data.cleaning import clean_attendance, clean_housing, read_csv
+from data.compact import compact_frames
+from data.validate import (
+    ATTENDANCE_SPEC, HOUSING_SPEC, MERGED_SPEC, validate_frame,
+)
+
+DATA_DIR = os.path.dirname(fetch_data.__file__)
+
+
+@pytest.fixture(scope="module")
+def fetched():
+    """The shipped raw CSVs cut down to fetch_data's default $select (and $where) projection."""
+    housing = read_csv(os.path.join(DATA_DIR, "housing_all_years.csv"))
+    attendance = read_csv(os.path.join(DATA_DIR, fetch_data.ATTENDANCE_FILE))
+    for column, value in fetch_data.ATTENDANCE_FILTERS.items():
+        attendance = attendance[attendance[column] == value]
+    housing = housing[fetch_data.HOUSING_COLUMNS + list(fetch_data.HOUSING_EXTRA)]
+    attendance = attendance[fetch_data.ATTENDANCE_COLUMNS].reset_index(drop=True)
+    return housing, attendance
+
+
+def failed(report):
+    return [(check["check"], check.get("column"), check["detail"] if "detail" in check else check["failures"])
+            for check in report["checks"] if not check["ok"]]
+
+
+def test_default_projection_merged_validates(fetched):
+    housing, attendance = fetched
+    merged, _ = clean_data.merge_years(clean_data.clean_housing(housing), clean_data.clean_attendance(attendance))
+    report, _ = validate_frame("merged", merged, MERGED_SPEC)
+    assert report["ok"], failed(report)
+
+
+def test_default_projection_snapshot_validates(fetched):
+    housing, attendance = fetched
+    attendance, housing = compact_frames(clean_attendance(attendance.copy()), clean_housing(housing.copy()))
+    for name, frame, spec in (("housing", housing, HOUSING_SPEC), ("attendance", attendance, ATTENDANCE_SPEC)):
+        report, _ = validate_frame(name, frame, spec)
+        assert report["ok"], (name, failed(report))
+
+
+def test_specs_expect_every_fetched_year():
+    assert HOUSING_SPEC["years"] == sorted(fetch_data.HOUSING_DATASETS)
+    assert ATTENDANCE_SPEC["years"] == MERGED_SPEC["years"] == fetch_data.ATTENDANCE_YEARS
+
+
+def test_missing_required_column_fails(fetched):
+    housing, attendance = fetched
+    attendance = clean_data.clean_attendance(attendance).drop(columns="pct_chronically_absent")
+    merged, _ = clean_data.merge_years(clean_data.clean_housing(housing), attendance)
+    report, _ = validate_frame("merged", merged, MERGED_SPEC)
+    assert ("present", "pct_chronically_absent", "missing") in failed(report)
+
+
+@pytest.mark.parametrize("failing", ["clean_data", "snapshot"])
+def test_refresh_reports_validation_failure(monkeypatch, failing):
+    from data import snapshot
+    for module in (clean_data, snapshot):
+        monkeypatch.setattr(module, "main", lambda module=module: module.__name__ != f"data.{failing}")
+    assert fetch_data.rebuild_downstream(["housing_all_years.csv"]) is False